@@ -0,0 +1,117 @@
+"""Streaming a long markdown answer into the AI chat: incremental vs full re-render.
+
+Streams a 20 KB response a few characters at a time, the way the agent's tokens
+arrive. The old renderer converted the whole response to HTML for every token and
+loaded it into the HTML widget as a new document; the new one converts completed
+blocks once and only the trailing open block again, once per frame. Tokens are
+taken to arrive every --interval ms, so the new renderer updates once per
+`Renderer.frame` ms worth of tokens. Only the markdown conversion is timed, loading
+the HTML into tkinterweb comes on top of it and scales with the same amount of HTML.
+
+    python scripts/benchmarks/chat_stream.py [--size 20000] [--token 4] [--interval 10]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from biscuit.views.ai.renderer import (
+    HighlightRenderer,
+    Renderer,
+    complete_blocks,
+    create_markdown,
+)
+
+WORDS = (
+    "the renderer converts each block once while the agent keeps streaming tokens "
+    "into the chat view and only the open block is converted again"
+).split()
+
+CODE = '''```python
+def stream(chunks):
+    for chunk in chunks:
+        renderer.feed(chunk)
+    return renderer.text
+```'''
+
+
+def response(size: int, rng: random.Random) -> str:
+    """Markdown like an assistant writes: headings, paragraphs, lists and code"""
+
+    blocks = []
+    length = 0
+    while length < size:
+        match rng.randrange(5):
+            case 0:
+                block = "## " + " ".join(rng.choices(WORDS, k=4)).capitalize()
+            case 1 | 2:
+                block = " ".join(rng.choices(WORDS, k=60)).capitalize() + "."
+            case 3:
+                block = "\n".join(
+                    f"- **{rng.choice(WORDS)}**: {' '.join(rng.choices(WORDS, k=10))}"
+                    for _ in range(4)
+                )
+            case 4:
+                block = CODE
+        blocks.append(block)
+        length += len(block) + 2
+    return "\n\n".join(blocks)[:size]
+
+
+def old(tokens: list[str], markdown) -> tuple[float, int, int]:
+    start = time.perf_counter()
+    buffer = ""
+    html = 0
+    for token in tokens:
+        buffer += token
+        html += len(markdown(buffer))
+    return time.perf_counter() - start, len(tokens), html
+
+
+def new(tokens: list[str], markdown, per_frame: int) -> tuple[float, int, int]:
+    start = time.perf_counter()
+    text = ""
+    done = 0
+    updates = 0
+    html = 0
+    for i, token in enumerate(tokens, 1):
+        text += token
+        if i % per_frame and i != len(tokens):
+            continue
+
+        updates += 1
+        cut = complete_blocks(text, done)
+        if cut > done:
+            html += len(markdown(text[done:cut]))
+            done = cut
+        html += len(markdown(text[done:]))
+    return time.perf_counter() - start, updates, html
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=20000, help="characters of markdown")
+    parser.add_argument("--token", type=int, default=4, help="characters per token")
+    parser.add_argument("--interval", type=float, default=10, help="ms between tokens")
+    args = parser.parse_args()
+
+    text = response(args.size, random.Random(0))
+    tokens = [text[i : i + args.token] for i in range(0, len(text), args.token)]
+    markdown = create_markdown(HighlightRenderer(escape=False))
+    per_frame = max(1, round(Renderer.frame / args.interval))
+
+    print(f"{len(text)} characters in {len(tokens)} tokens\n")
+    print(f"{'renderer':<12} {'seconds':>8} {'updates':>8} {'KB of HTML':>11}")
+    for name, (elapsed, updates, html) in (
+        ("full", old(tokens, markdown)),
+        ("incremental", new(tokens, markdown, per_frame)),
+    ):
+        print(f"{name:<12} {elapsed:>8.2f} {updates:>8} {html / 1000:>11.0f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+"""Time to diff a large file with the diff engine vs difflib.Differ.
+
+Generates a Python-like file and a copy with scattered edits (changed, inserted and
+deleted lines, and a rewritten block), then times `DiffLayout.compare`, which diffs
+the lines and lays out both panes including the word diffs of changed lines, against
+`difflib.Differ.compare`, which the diff editor used before. Differ runs in a child
+process and is stopped after --timeout seconds. Most of the time the old diff
+editor took went into inserting every line separately through the editor's change
+pipeline, which needs a display and isn't measured here.
+
+    python scripts/benchmarks/diff.py [--lines 10000] [--edits 200] [--timeout 60]
+"""
+
+import argparse
+import difflib
+import multiprocessing
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from biscuit.git.diffengine import EQUAL, DiffLayout
+
+
+def document(lines: int, rng: random.Random) -> list[str]:
+    words = ["self", "value", "items", "result", "index", "name", "data", "count"]
+    out = []
+    for i in range(lines):
+        match i % 8:
+            case 0:
+                out.append(f"def {rng.choice(words)}_{i}(self, {rng.choice(words)}):")
+            case 1 | 7:
+                out.append("")
+            case 2:
+                out.append(f"    {rng.choice(words)} = {rng.randint(0, 1000)}")
+            case 3:
+                out.append(f"    for {rng.choice(words)} in self.{rng.choice(words)}:")
+            case 4:
+                out.append(f"        {rng.choice(words)} += {rng.choice(words)}")
+            case 5:
+                out.append("    }")
+            case 6:
+                out.append(f"    return {rng.choice(words)}")
+    return out
+
+
+def edit(lines: list[str], edits: int, rng: random.Random) -> list[str]:
+    out = list(lines)
+    for _ in range(edits):
+        i = rng.randrange(len(out))
+        match rng.randrange(3):
+            case 0:
+                out[i] = out[i].replace(" = ", " = 2 * ", 1) + "  # changed"
+            case 1:
+                out.insert(i, f"    inserted = {i}")
+            case 2:
+                del out[i]
+
+    # a rewritten block
+    start = rng.randrange(len(out) - 100)
+    out[start : start + 100] = [f"    rewritten({n})" for n in range(120)]
+    return out
+
+
+def run_differ(a: list[str], b: list[str]) -> None:
+    lhs = [line + "\n" for line in a]
+    rhs = [line + "\n" for line in b]
+    start = time.perf_counter()
+    diff = list(difflib.Differ().compare(lhs, rhs))
+    print(f"{'difflib':<10} {time.perf_counter() - start:>10.3f} {len(diff):>12} lines of output")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--lines", type=int, default=10000)
+    parser.add_argument("--edits", type=int, default=200)
+    parser.add_argument("--timeout", type=float, default=60)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    a = document(args.lines, rng)
+    b = edit(a, args.edits, rng)
+    print(f"{len(a)} lines vs {len(b)} lines, {args.edits} edits\n")
+    print(f"{'engine':<10} {'seconds':>10}")
+
+    start = time.perf_counter()
+    layout = DiffLayout.compare(a, b)
+    elapsed = time.perf_counter() - start
+    changed = sum(hunk.tag != EQUAL for hunk in layout.hunks)
+    print(f"{'patience':<10} {elapsed:>10.3f} {changed:>12} changed hunks")
+
+    process = multiprocessing.Process(target=run_differ, args=(a, b))
+    process.start()
+    process.join(args.timeout)
+    if process.is_alive():
+        process.terminate()
+        print(f"{'difflib':<10} {'>' + format(args.timeout, '.0f'):>10} stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""Minimal stand-in for a language server, used by the LSP transport benchmark.
+
+Reads `Content-Length` framed JSON-RPC messages from stdin. A `bench/echo` request
+with `{"size": n, "count": k}` params is answered with k responses carrying a
+string of n bytes each, every other message is ignored.
+"""
+
+import json
+import sys
+
+
+def read_message(stdin) -> dict | None:
+    length = None
+    while True:
+        line = stdin.readline()
+        if not line:
+            return None
+        line = line.strip()
+        if not line:
+            break
+        name, _, value = line.partition(b":")
+        if name.strip().lower() == b"content-length":
+            length = int(value)
+
+    return json.loads(stdin.read(length))
+
+
+def write_message(stdout, message: dict) -> None:
+    body = json.dumps(message).encode()
+    stdout.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+
+
+def main() -> None:
+    stdin, stdout = sys.stdin.buffer, sys.stdout.buffer
+    while True:
+        message = read_message(stdin)
+        if message is None:
+            return
+        if message.get("method") != "bench/echo":
+            continue
+
+        params = message["params"]
+        payload = "x" * params["size"]
+        for _ in range(params["count"]):
+            write_message(
+                stdout, {"jsonrpc": "2.0", "id": message["id"], "result": payload}
+            )
+        stdout.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,123 @@
+"""Keystroke latency of the incremental highlighter vs full-document lexing.
+
+Types characters into the middle of a large Python and JSON document and measures
+the time spent highlighting after each keystroke. Requires a display.
+
+    python scripts/benchmarks/highlighter.py [--lines 20000] [--keystrokes 50]
+"""
+
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+import tkinter as tk
+from types import SimpleNamespace
+
+from pygments import lex
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from biscuit.editor.text.highlighter import Highlighter
+
+SAMPLE = os.path.join(
+    os.path.dirname(__file__), "..", "..", "src", "biscuit", "editor", "text", "text.py"
+)
+
+
+class BenchText(tk.Text):
+    """Bare text widget with the attributes the highlighter reads"""
+
+    def __init__(self, master, path: str) -> None:
+        super().__init__(master, width=120, height=50)
+        self.base = SimpleNamespace(notifications=None)
+        self.path = path
+        self.encoding = "utf-8"
+        self.language = None
+        self.language_alias = ""
+
+
+def full_highlight(highlighter: Highlighter) -> None:
+    """Highlighting as it was done before: clear and re-lex the whole document"""
+
+    text = highlighter.text
+    for token in highlighter.tag_colors:
+        text.tag_remove(str(token), "1.0", tk.END)
+
+    text.mark_set("range_start", "1.0")
+    for token, content in lex(text.get("1.0", tk.END), highlighter.lexer):
+        text.mark_set("range_end", f"range_start + {len(content)}c")
+        text.tag_add(str(token), "range_start", "range_end")
+        text.mark_set("range_start", "range_end")
+
+
+def python_document(lines: int) -> str:
+    with open(SAMPLE, encoding="utf-8") as f:
+        sample = f.read().splitlines()
+    return "\n".join(sample[i % len(sample)] for i in range(lines))
+
+
+def json_document(lines: int) -> str:
+    record = {"id": 1, "name": "biscuit", "tags": ["a", "b"], "nested": {"x": 1.5}}
+    return json.dumps([record] * (lines // 12), indent=2)
+
+
+def run(root: tk.Tk, name: str, content: str, keystrokes: int) -> None:
+    results = {}
+    for mode in ("full", "incremental"):
+        text = BenchText(root, name)
+        text.pack()
+        text.insert("1.0", content)
+        highlighter = Highlighter(text)
+
+        line = int(text.index("end-1c").split(".")[0]) // 2
+        text.see(f"{line}.0")
+        root.update()
+        highlighter.highlight()
+        while highlighter._job:
+            root.update()
+
+        timings = []
+        for i in range(keystrokes):
+            index = f"{line}.0"
+            start = time.perf_counter()
+            text.insert(index, "x" if i % 2 else '"')
+            if mode == "full":
+                full_highlight(highlighter)
+            else:
+                highlighter.invalidate(line)
+                highlighter.highlight()
+            timings.append(time.perf_counter() - start)
+            root.update()
+
+        results[mode] = timings
+        text.destroy()
+
+    lines = content.count("\n") + 1
+    print(f"{name} ({lines} lines, {keystrokes} keystrokes)")
+    for mode, timings in results.items():
+        print(
+            f"  {mode:<12} median {statistics.median(timings) * 1000:8.2f} ms"
+            f"   max {max(timings) * 1000:8.2f} ms"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=20000)
+    parser.add_argument("--keystrokes", type=int, default=50)
+    args = parser.parse_args()
+
+    try:
+        root = tk.Tk()
+    except tk.TclError as e:
+        sys.exit(f"benchmark needs a display: {e}")
+
+    run(root, "bench.py", python_document(args.lines), args.keystrokes)
+    run(root, "bench.json", json_document(args.lines), args.keystrokes)
+    root.destroy()
+
+
+if __name__ == "__main__":
+    main()
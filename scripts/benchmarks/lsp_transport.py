@@ -0,0 +1,170 @@
+"""Throughput and latency of the LSP transport (common.io.IO) vs the old one.
+
+The old transport read the server output one byte at a time into a queue that
+the UI polled every 50 ms. Both are run against a local fake language server
+(fake_lsp_server.py) with a small stand-in for the Tk event loop.
+
+    python scripts/benchmarks/lsp_transport.py [--size 1000000] [--count 5] [--pings 50]
+"""
+
+import argparse
+import heapq
+import itertools
+import json
+import os
+import queue
+import statistics
+import sys
+import threading
+import time
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from biscuit.common.dispatcher import Dispatcher
+from biscuit.common.io import IO, split_messages
+
+SERVER = os.path.join(os.path.dirname(__file__), "fake_lsp_server.py")
+
+
+class EventLoop:
+    """Stand-in for the Tk event loop, `after` may be called from any thread"""
+
+    def __init__(self) -> None:
+        self.jobs = []
+        self.counter = itertools.count()
+        self.cond = threading.Condition()
+        self.logger = SimpleNamespace(info=lambda *_: None)
+        # no file handlers, the dispatcher wakes up through `after`
+        self.tk = SimpleNamespace()
+        self.dispatcher = Dispatcher(self)
+
+    def after(self, ms: int, callback) -> None:
+        with self.cond:
+            due = time.perf_counter() + ms / 1000
+            heapq.heappush(self.jobs, (due, next(self.counter), callback))
+            self.cond.notify()
+
+    def run_until(self, done, timeout: float = 60) -> None:
+        end = time.perf_counter() + timeout
+        while not done():
+            with self.cond:
+                now = time.perf_counter()
+                if now > end:
+                    raise TimeoutError
+                if not self.jobs or self.jobs[0][0] > now:
+                    wait = self.jobs[0][0] - now if self.jobs else end - now
+                    self.cond.wait(min(wait, end - now))
+                    continue
+                _, _, callback = heapq.heappop(self.jobs)
+            callback()
+
+
+class LegacyIO(IO):
+    """The transport as it was: byte-wise reads, consumer polls"""
+
+    def read(self) -> bytes | None:
+        buf = bytearray()
+        while True:
+            try:
+                buf += self.out_queue.get(block=False)
+            except queue.Empty:
+                break
+
+        if self.t_out.is_alive() and not buf:
+            return None
+        return bytes(buf)
+
+    def _process_out(self) -> None:
+        while self.alive:
+            data = self.p.stdout.read(1)
+            if not data:
+                break
+            self.out_queue.put(data)
+
+
+class Consumer:
+    """Counts the messages the UI thread receives"""
+
+    def __init__(self, loop: EventLoop, legacy: bool) -> None:
+        self.loop = loop
+        self.received = 0
+        self.buf = bytearray()
+        self.ids = itertools.count(1)
+
+        cmd = f'"{sys.executable}" "{SERVER}"'
+        master = SimpleNamespace(base=loop)
+        if legacy:
+            self.io = LegacyIO(master, cmd, os.getcwd())
+            self.io.start()
+            self.poll()
+        else:
+            self.io = IO(master, cmd, os.getcwd(), callback=self.on_output)
+            self.io.start()
+
+    def poll(self) -> None:
+        self.on_output()
+        if self.io.alive:
+            self.loop.after(50, self.poll)
+
+    def on_output(self) -> None:
+        data = self.io.read()
+        if data:
+            self.buf += data
+            self.received += len(split_messages(self.buf))
+
+    def request(self, size: int, count: int) -> None:
+        body = json.dumps(
+            {
+                "jsonrpc": "2.0",
+                "id": next(self.ids),
+                "method": "bench/echo",
+                "params": {"size": size, "count": count},
+            }
+        ).encode()
+        self.io.write(b"Content-Length: %d\r\n\r\n" % len(body) + body)
+
+    def roundtrip(self, size: int, count: int) -> float:
+        expected = self.received + count
+        start = time.perf_counter()
+        self.request(size, count)
+        self.loop.run_until(lambda: self.received >= expected)
+        return time.perf_counter() - start
+
+
+def bench(legacy: bool, args) -> tuple[float, list[float]]:
+    loop = EventLoop()
+    consumer = Consumer(loop, legacy)
+    try:
+        # warm up, the server process has to start
+        consumer.roundtrip(16, 1)
+
+        elapsed = consumer.roundtrip(args.size, args.count)
+        throughput = args.size * args.count / elapsed / 1e6
+
+        latencies = [consumer.roundtrip(64, 1) * 1000 for _ in range(args.pings)]
+    finally:
+        consumer.io.stop()
+
+    return throughput, latencies
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=int, default=1_000_000)
+    parser.add_argument("--count", type=int, default=5)
+    parser.add_argument("--pings", type=int, default=50)
+    args = parser.parse_args()
+
+    print(f"{args.count} responses of {args.size} bytes, {args.pings} small round trips\n")
+    print(f"{'transport':<10} {'MB/s':>10} {'median ms':>10} {'max ms':>10}")
+    for name, legacy in (("old", True), ("new", False)):
+        throughput, latencies = bench(legacy, args)
+        print(
+            f"{name:<10} {throughput:>10.1f} {statistics.median(latencies):>10.2f} "
+            f"{max(latencies):>10.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
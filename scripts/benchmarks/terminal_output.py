@@ -0,0 +1,219 @@
+"""Throughput of the terminal output pipeline vs the old one.
+
+Pipes output through a local shell on a PTY, the way the integrated terminal runs
+commands: a stream of 100 character lines, and a colored progress bar redrawn with
+carriage returns. The old pipeline read 1 KB at a time, stripped escape sequences,
+and the UI took a single chunk off a queue every 10 ms frame. The new one reads
+64 KB at a time into an OutputBuffer (views/terminal/output.py) that the UI drains
+every frame into the screen emulator (views/terminal/screen.py), which then
+updates the widget. The Tk text widget is replaced with a sink that keeps the
+lines in memory, trimmed to the scrollback limit like the terminal does.
+
+Runs stop after --timeout seconds, the old pipeline usually does.
+
+    python scripts/benchmarks/terminal_output.py [--size 100] [--scrollback 10000] [--timeout 30]
+"""
+
+import argparse
+import os
+import queue
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from ptyprocess import PtyProcessUnicode as PTY
+
+from biscuit.views.terminal.ansi import replace_newline, strip_ansi_escape_sequences
+from biscuit.views.terminal.output import OutputBuffer
+from biscuit.views.terminal.screen import Screen
+
+FRAME = 0.01
+
+
+def clean(buf: str) -> str:
+    """What the terminal does to each read before it is queued"""
+
+    buf = replace_newline(buf)
+    lines = [strip_ansi_escape_sequences(i) for i in buf.splitlines()]
+    if buf.endswith("\n"):
+        lines.append("")
+    return "\n".join(lines)
+
+
+class Sink:
+    """Stand-in for the terminal text widget, as used by the old pipeline"""
+
+    def __init__(self) -> None:
+        self.lines = [""]
+        self.received = 0
+        self.inserts = 0
+        self.peak_lines = 1
+
+    def insert(self, text: str) -> None:
+        self.inserts += 1
+        self.received += len(text)
+        parts = text.split("\n")
+        self.lines[-1] += parts[0]
+        self.lines.extend(parts[1:])
+        self.peak_lines = max(self.peak_lines, len(self.lines))
+
+
+class ScreenSink(Sink):
+    """Stand-in for the terminal text widget, with what Screen.flush uses of it"""
+
+    def __init__(self, screen: Screen, scrollback: int) -> None:
+        super().__init__()
+        self.screen = screen
+        self.scrollback = scrollback
+
+    def line(self, index: str) -> int:
+        return int(index.split(".")[0]) - 1
+
+    def get(self, start: str, end: str) -> str:
+        return ""
+
+    def delete(self, start: str, end: str) -> None:
+        if end == "end-1c":
+            del self.lines[self.line(start) + 1 :]
+        else:
+            self.lines[self.line(start)] = ""
+
+    def insert(self, index: str, *runs: str) -> None:
+        text = "".join(runs[0::2])
+        if index == "end-1c":
+            super().insert(text)
+        else:
+            self.inserts += 1
+            self.received += len(text)
+            self.lines[self.line(index)] = text + self.lines[self.line(index)]
+
+    def mark_set(self, *_) -> None: ...
+
+    def tag_configure(self, *_, **__) -> None: ...
+
+    def cget(self, _) -> str:
+        return "TkFixedFont"
+
+    def trim(self) -> None:
+        excess = len(self.lines) - self.scrollback + self.scrollback // 10
+        excess = min(excess, self.screen.first - 1)
+        if len(self.lines) > self.scrollback and excess > 0:
+            del self.lines[:excess]
+            self.screen.scrolled_off(excess)
+
+
+COMMANDS = {
+    "lines": "head -c {size} /dev/zero | tr '\\0' x | fold -w 99",
+    "progress": (
+        "yes $'\\r\\x1b[32m[##########          ]\\x1b[0m 50%' "
+        "| tr -d '\\n' | head -c {size}"
+    ),
+}
+
+
+def spawn(workload: str, size: int) -> PTY:
+    command = COMMANDS[workload].format(size=size)
+    return PTY.spawn(["/bin/bash", "-c", command])
+
+
+def run_old(workload: str, args) -> tuple[float, Sink, int]:
+    p = spawn(workload, args.size)
+    chunks = queue.Queue()
+    done = threading.Event()
+
+    def write_loop() -> None:
+        try:
+            while True:
+                if buf := p.read():
+                    chunks.put(clean(buf))
+        except EOFError:
+            done.set()
+
+    threading.Thread(target=write_loop, daemon=True).start()
+
+    sink = Sink()
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.timeout:
+        if not chunks.empty():
+            sink.insert(chunks.get())
+        elif done.is_set():
+            break
+        time.sleep(FRAME)
+
+    elapsed = time.perf_counter() - start
+    behind = sum(len(c) for c in list(chunks.queue))
+    p.terminate(force=True)
+    return elapsed, sink, behind
+
+
+def run_new(workload: str, args) -> tuple[float, Sink, int]:
+    p = spawn(workload, args.size)
+    output = OutputBuffer()
+    done = threading.Event()
+
+    def write_loop() -> None:
+        try:
+            while True:
+                if buf := p.read(1 << 16):
+                    if not output.put(buf):
+                        break
+        except EOFError:
+            done.set()
+
+    threading.Thread(target=write_loop, daemon=True).start()
+
+    screen = Screen()
+    sink = ScreenSink(screen, args.scrollback)
+    start = time.perf_counter()
+    while time.perf_counter() - start < args.timeout:
+        # as TerminalBase.on_output does
+        budget = 1 << 20
+        fed = False
+        while budget > 0 and (data := output.drain(min(1 << 14, budget))):
+            budget -= len(data)
+            screen.feed(data)
+            fed = True
+            if len(screen.lines) - screen.flushed > args.scrollback // 10:
+                screen.flush(sink)
+                sink.trim()
+        if fed:
+            screen.flush(sink)
+            sink.trim()
+        elif done.is_set() and not output.pending:
+            break
+        time.sleep(FRAME)
+
+    elapsed = time.perf_counter() - start
+    behind = output.pending
+    output.close()
+    p.terminate(force=True)
+    return elapsed, sink, behind
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size", type=float, default=100, help="MB of output")
+    parser.add_argument("--scrollback", type=int, default=10000)
+    parser.add_argument("--timeout", type=float, default=30)
+    args = parser.parse_args()
+    args.size = int(args.size * 1_000_000)
+
+    print(f"{args.size / 1e6:.0f} MB through /bin/bash, {args.timeout:.0f} s limit\n")
+    print(
+        f"{'output':<9} {'pipeline':<9} {'seconds':>8} {'MB inserted':>11} {'MB/s':>8} "
+        f"{'inserts':>8} {'MB behind':>10} {'peak lines':>11}"
+    )
+    for workload in COMMANDS:
+        for name, run in (("old", run_old), ("new", run_new)):
+            elapsed, sink, behind = run(workload, args)
+            print(
+                f"{workload:<9} {name:<9} {elapsed:>8.2f} {sink.received / 1e6:>11.1f} "
+                f"{sink.received / 1e6 / elapsed:>8.1f} {sink.inserts:>8} "
+                f"{behind / 1e6:>10.1f} {sink.peak_lines:>11}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""Workspace search: the parallel search engine vs the old line-by-line scan.
+
+Builds a synthetic tree of small source files with some binaries, a few large
+files and an ignored node_modules directory, then searches it for a plain term,
+a whole word and a regex with both implementations.
+
+    python scripts/benchmarks/workspace_search.py [--files 100000] [--dir /tmp/tree]
+"""
+
+import argparse
+import os
+import random
+import re
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "src"))
+
+from biscuit.views.search.engine import SearchJob, SearchQuery
+
+IGNORE = [".git", "__pycache__", "venv", "node_modules", "build", "dist"]
+
+WORDS = (
+    "def class return import self value result items config editor buffer "
+    "widget render update index search token parse state event handler"
+).split()
+
+
+def build_tree(root: str, files: int) -> None:
+    rng = random.Random(0)
+    for i in range(files):
+        directory = os.path.join(
+            root,
+            *(f"pkg{rng.randrange(20)}" for _ in range(rng.randint(1, 3))),
+        )
+        if i % 50 == 0:
+            directory = os.path.join(root, "node_modules", f"dep{i % 7}")
+        os.makedirs(directory, exist_ok=True)
+
+        path = os.path.join(directory, f"module{i}.py")
+        if i % 100 == 1:
+            with open(path.replace(".py", ".bin"), "wb") as f:
+                f.write(bytes(rng.randrange(256) for _ in range(2048)))
+            continue
+
+        lines = 2000 if i % 5000 == 2 else rng.randint(10, 80)
+        with open(path, "w") as f:
+            for _ in range(lines):
+                f.write(" ".join(rng.choice(WORDS) for _ in range(8)) + "\n")
+            if i % 997 == 0:
+                f.write("needle_marker = 42\n")
+
+
+def old_search(root: str, term: str, case_sensitive=False, whole_word=False, regex=False):
+    """The search as it was, minus the UI updates"""
+
+    results = 0
+    for dirpath, _, files in os.walk(root):
+        if dirpath in IGNORE:
+            continue
+        for file in files:
+            try:
+                with open(os.path.join(dirpath, file), "r", encoding="utf-8") as f:
+                    for line in f:
+                        if case_sensitive:
+                            found = term in line
+                        elif whole_word:
+                            found = re.search(r"\b" + term + r"\b", line)
+                        elif regex:
+                            found = re.search(term, line)
+                        else:
+                            found = term.lower() in line.lower()
+                        if found:
+                            results += 1
+            except UnicodeDecodeError:
+                continue
+    return results
+
+
+def new_search(root: str, term: str, **options):
+    job = SearchJob(
+        root, SearchQuery(term, **options), ignore_dirs=IGNORE, max_results=10**9
+    )
+    results = 0
+    while not job.done or not job.results.empty():
+        for result in job.drain():
+            results += len(result.lines)
+        job.wait(0.01)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--files", type=int, default=100_000)
+    parser.add_argument("--dir", help="reuse or create the tree here")
+    args = parser.parse_args()
+
+    root = args.dir or tempfile.mkdtemp(prefix="biscuit-search-")
+    try:
+        if not os.listdir(root):
+            start = time.perf_counter()
+            build_tree(root, args.files)
+            print(f"built {args.files} files in {time.perf_counter() - start:.1f}s\n")
+
+        cases = [
+            ("plain", "needle_marker", {}),
+            ("whole word", "index", {"whole_word": True}),
+            ("regex", r"render\s+update", {"regex": True}),
+        ]
+        print(f"{'search':<12} {'old s':>8} {'new s':>8} {'old hits':>10} {'new hits':>10}")
+        for name, term, options in cases:
+            start = time.perf_counter()
+            old = old_search(root, term, **options)
+            old_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            new = new_search(root, term, **options)
+            new_time = time.perf_counter() - start
+
+            print(f"{name:<12} {old_time:>8.2f} {new_time:>8.2f} {old:>10} {new:>10}")
+
+        print("\nold hits include the ignored node_modules directory")
+    finally:
+        if not args.dir:
+            shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from .actionset import ActionSet
 from .classdrill import *
+from .dispatcher import Channel, Dispatcher
 from .fixedstack import FixedSizeStack
 from .games import *
 from .helpers import *
@@ -1,6 +1,18 @@
+import functools
 from typing import Callable, List, Tuple
 
 
+def _invalidating(method: Callable) -> Callable:
+    """Wrap a list method that changes the items to drop the cached keys"""
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        self._keys = None
+        return method(self, *args, **kwargs)
+
+    return wrapper
+
+
 class ActionSet(list):
     """Action Set
     Actions are represented by tuples of the form (command: str, callback: Callable).
@@ -36,6 +48,7 @@ class ActionSet(list):
         self.pinned: List[Tuple[str, Callable[[str], None]]] = (
             pinned  # [[command, callback], ...]
         )
+        self._keys: List[str] = None
 
     def __repr__(self) -> str:
         return self.description
@@ -49,6 +62,17 @@ class ActionSet(list):
         self.clear()
         self += items
 
+    def keys(self) -> List[str]:
+        """Lowercase commands of the items, computed once and reused while filtering.
+
+        The list methods that change the items drop them, see `_invalidating`."""
+
+        if self._keys is None:
+            self._keys = [
+                str(item[0]).lower() if item and item[0] else "" for item in self
+            ]
+        return self._keys
+
     def add_action(self, command: str, callback: Callable) -> None:
         """Add an item to the actionset.
 
@@ -72,3 +96,21 @@ class ActionSet(list):
         """Not to be called directly. Returns the pinned actions with the search term formatted."""
 
         return [[item[0].format(term or "...")] + item[1:] for item in self.pinned]
+
+
+for _name in (
+    "__setitem__",
+    "__delitem__",
+    "__iadd__",
+    "__imul__",
+    "append",
+    "extend",
+    "insert",
+    "pop",
+    "remove",
+    "clear",
+    "sort",
+    "reverse",
+):
+    setattr(ActionSet, _name, _invalidating(getattr(list, _name)))
+del _name
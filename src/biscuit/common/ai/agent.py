@@ -19,6 +19,7 @@ import asyncio
 import json
 import logging
 import os
+import random
 import re
 import time
 import typing
@@ -29,7 +30,7 @@ from google.genai import types
 import anthropic
 
 from .state import AgentState, AgentStep, AgentTask
-from .tools import get_biscuit_tools
+from .tools import BiscuitTool, get_biscuit_tools
 
 if typing.TYPE_CHECKING:
     from biscuit import App
@@ -60,6 +61,11 @@ class Agent:
         # Step tracking
         self.max_steps = 15
         self.iteration_count = 0
+
+        # Retrying rate limited requests, with exponential backoff (seconds)
+        self.max_retries = 5
+        self.backoff_base = 2.0
+        self.backoff_max = 60.0
         
         # Token usage tracking
         self.input_tokens = 0
@@ -187,8 +193,6 @@ class Agent:
 
     async def _run_gemini_session(self, task: AgentTask, inputs: str):
         """Execute task using native Google GenAI async chat sessions with real-time streaming."""
-        
-        tools_map = {t.name: t for t in self.tools}
 
 
 
@@ -208,56 +212,62 @@ class Agent:
                 break
             
             self.iteration_count = i + 1
-            if i > 0:
-                await asyncio.sleep(1)
 
             # 1. Generate Response (Async Stream)
             self._stream_content("[START_THOUGHT]")
-            model_parts = []
-            try:
-                stream = await self.gemini_client.aio.models.generate_content_stream(
-                    model=self.model_name,
-                    contents=contents,
-                    config=types.GenerateContentConfig(
-                        system_instruction=system_instruction,
-                        tools=[types.Tool(function_declarations=self._get_tool_declarations())],
-                        temperature=0)
-                )
+            attempt = 0
+            while True:
+                model_parts = []
+                try:
+                    stream = await self.gemini_client.aio.models.generate_content_stream(
+                        model=self.model_name,
+                        contents=contents,
+                        config=types.GenerateContentConfig(
+                            system_instruction=system_instruction,
+                            tools=[types.Tool(function_declarations=self._get_tool_declarations())],
+                            temperature=0)
+                    )
 
-                async for response in stream:
-                    if not response.candidates:
-                        continue
-                    
-                    candidate = response.candidates[0]
-                    if not candidate.content or not candidate.content.parts:
+                    async for response in stream:
+                        if not response.candidates:
+                            continue
+
+                        candidate = response.candidates[0]
+                        if not candidate.content or not candidate.content.parts:
+                            continue
+
+                        for part in candidate.content.parts:
+                            if part.text:
+                                # Stream text chunks to UI immediately
+                                self._stream_content(part.text)
+                                model_parts.append(part)
+                            if part.function_call:
+                                # Collector tool calls to execute after stream ends
+                                model_parts.append(part)
+
+                        if response.usage_metadata:
+                            # Gemini returns total usage in metadata, we update based on diff or just total
+                            # For simplicity, we'll just track the absolute values from the last chunk
+                            self._update_usage(
+                                input_tokens=max(0, response.usage_metadata.prompt_token_count - self.input_tokens),
+                                output_tokens=max(0, response.usage_metadata.candidates_token_count - self.output_tokens)
+                            )
+                    break
+
+                except Exception as e:
+                    # nothing was streamed yet, the request can be made again
+                    if not model_parts and await self._backoff(attempt, e):
+                        attempt += 1
                         continue
-                        
-                    for part in candidate.content.parts:
-                        if part.text:
-                            # Stream text chunks to UI immediately
-                            self._stream_content(part.text)
-                            model_parts.append(part)
-                        if part.function_call:
-                            # Collector tool calls to execute after stream ends
-                            model_parts.append(part)
-                    
-                    if response.usage_metadata:
-                        # Gemini returns total usage in metadata, we update based on diff or just total
-                        # For simplicity, we'll just track the absolute values from the last chunk
-                        self._update_usage(
-                            input_tokens=max(0, response.usage_metadata.prompt_token_count - self.input_tokens),
-                            output_tokens=max(0, response.usage_metadata.candidates_token_count - self.output_tokens)
-                        )
-
-            except Exception as e:
-                err_msg = str(e).lower()
-                if "429" in err_msg or "resource_exhausted" in err_msg:
-                    self._stream_content("\n\n⚠️ **Rate Limit Exceeded**\nYou've hit your API quota for the current model. \nPlease wait a few seconds or switch to a different model in the sidebar.")
-                elif "401" in err_msg or "authentication" in err_msg:
-                    self._stream_content("\n\n🔑 **Invalid API Key**: The Google Gemini API key is invalid or missing. Please check your configuration.")
-                else:
-                    self._stream_content(f"Gemini API Error: {e}")
-                raise e
+
+                    err_msg = str(e).lower()
+                    if "429" in err_msg or "resource_exhausted" in err_msg:
+                        self._stream_content("\n\n⚠️ **Rate Limit Exceeded**\nYou've hit your API quota for the current model. \nPlease wait a few seconds or switch to a different model in the sidebar.")
+                    elif "401" in err_msg or "authentication" in err_msg:
+                        self._stream_content("\n\n🔑 **Invalid API Key**: The Google Gemini API key is invalid or missing. Please check your configuration.")
+                    else:
+                        self._stream_content(f"Gemini API Error: {e}")
+                    raise e
 
             self._stream_content("[END_THOUGHT] 1")
 
@@ -274,46 +284,22 @@ class Agent:
                 return
 
             # 3. Execute Tools
-            tool_responses = []
-            for call in tool_calls:
-                name = call.name
-                args = call.args
-                
-                try:
-                    if name in tools_map:
-                        tool = tools_map[name]
-                        observation = tool.run(args)
-                        self._stream_tool(name, json.dumps(args), str(observation))
-                        
-                        step = AgentStep(
-                            step_number=self.iteration_count,
-                            state=AgentState.EDITING if any(x in name for x in ["edit", "write", "delete"]) else AgentState.SEARCHING,
-                            action=name,
-                            reasoning="Executing tool call.",
-                            result=str(observation)
-                        )
-                        task.steps.append(step)
-                        self._notify_step(step)
-                    else:
-                        observation = f"Error: Tool '{name}' not found."
-                        self._stream_content(observation)
-                except Exception as e:
-                    observation = f"Error executing tool: {e}"
-                    self._stream_content(observation)
-
-                tool_responses.append(types.Part(
+            observations = await self._execute_tools(task, [(call.name, call.args) for call in tool_calls])
+            tool_responses = [
+                types.Part(
                     function_response=types.FunctionResponse(
-                        name=name,
+                        name=call.name,
                         response={"result": observation}
                     )
-                ))
+                )
+                for call, observation in zip(tool_calls, observations)
+            ]
 
             # Update history with tool observations
             contents.append(types.Content(role="user", parts=tool_responses))
 
     async def _run_anthropic_session(self, task: AgentTask, inputs: str):
         """Execute task using Anthropic's native async SDK with streaming."""
-        tools_map = {t.name: t for t in self.tools}
         anthropic_tools = self._get_anthropic_tools()
 
 
@@ -333,102 +319,186 @@ class Agent:
                 break
             
             self.iteration_count = i + 1
-            if i > 0:
-                await asyncio.sleep(1)
 
             # 1. Generate Response (Async Stream)
             self._stream_content("[START_THOUGHT]")
-            
-            full_content = []
-            current_text = ""
-            
+
+            attempt = 0
             try:
-                # We use the simplified stream helper from Anthropic
-                async with self.anthropic_client.messages.stream(
-                    model=self.model_name,
-                    max_tokens=4000,
-                    system=system_instruction,
-                    tools=anthropic_tools,
-                    messages=messages,
-                    temperature=0
-                ) as stream:
-                    async for event in stream:
-                        if event.type == "text":
-                            self._stream_content(event.text)
-                            current_text += event.text
-                        elif event.type == "input_json":
-                            # We'll get the final message at the end
-                            pass
-                
-                # Get the final response to handle tool usage
-                final_message = await stream.get_final_message()
-                messages.append({"role": "assistant", "content": final_message.content})
-                
-                # Anthropic returns usage in the final message
-                # Update usage metadata
-                if final_message.usage:
-                    self._update_usage(
-                        input_tokens=final_message.usage.input_tokens,
-                        output_tokens=final_message.usage.output_tokens
-                    )
-                
-                tool_calls = [c for c in final_message.content if c.type == "tool_use"]
-                
-                # If no tool calls, we are done
-                if not tool_calls:
-                    self.chat_history.append({"role": "User", "content": inputs})
-                    self.chat_history.append({"role": "AI", "content": current_text})
-                    return
-
-                # 2. Execute Tools
-                tool_results = []
-                for call in tool_calls:
-                    name = call.name
-                    args = call.input
-                    
+                while True:
+                    current_text = ""
                     try:
-                        if name in tools_map:
-                            tool = tools_map[name]
-                            observation = tool.run(args)
-                            self._stream_tool(name, json.dumps(args), str(observation))
-                            
-                            step = AgentStep(
-                                step_number=self.iteration_count,
-                                state=AgentState.EDITING if any(x in name for x in ["edit", "write", "delete"]) else AgentState.SEARCHING,
-                                action=name,
-                                reasoning="Executing tool call.",
-                                result=str(observation)
-                            )
-                            task.steps.append(step)
-                            self._notify_step(step)
-                        else:
-                            observation = f"Error: Tool '{name}' not found."
-                            self._stream_content(observation)
+                        # We use the simplified stream helper from Anthropic
+                        async with self.anthropic_client.messages.stream(
+                            model=self.model_name,
+                            max_tokens=4000,
+                            system=system_instruction,
+                            tools=anthropic_tools,
+                            messages=messages,
+                            temperature=0
+                        ) as stream:
+                            async for event in stream:
+                                if event.type == "text":
+                                    self._stream_content(event.text)
+                                    current_text += event.text
+                                elif event.type == "input_json":
+                                    # We'll get the final message at the end
+                                    pass
+
+                        # Get the final response to handle tool usage
+                        final_message = await stream.get_final_message()
+                        break
+
                     except Exception as e:
-                        observation = f"Error executing tool: {e}"
-                        self._stream_content(observation)
-
-                    tool_results.append({
-                        "type": "tool_result",
-                        "tool_use_id": call.id,
-                        "content": str(observation)
-                    })
-
-                # Update history with tool observations
-                messages.append({"role": "user", "content": tool_results})
-
-            except Exception as e:
-                err_msg = str(e).lower()
-                if "429" in err_msg or "rate_limit" in err_msg:
-                    self._stream_content("\n\n⚠️ **Rate Limit Exceeded**\nYou've hit your Anthropic API quota. Please wait a moment or switch models.")
-                elif "401" in err_msg or "authentication" in err_msg:
-                    self._stream_content("\n\n🔑 **Invalid API Key**: The Anthropic API key is invalid or missing. Please check your configuration.")
-                else:
-                    self._stream_content(f"Anthropic API Error: {e}")
-                raise e
+                        # nothing was streamed yet, the request can be made again
+                        if not current_text and await self._backoff(attempt, e):
+                            attempt += 1
+                            continue
+
+                        err_msg = str(e).lower()
+                        if "429" in err_msg or "rate_limit" in err_msg:
+                            self._stream_content("\n\n⚠️ **Rate Limit Exceeded**\nYou've hit your Anthropic API quota. Please wait a moment or switch models.")
+                        elif "401" in err_msg or "authentication" in err_msg:
+                            self._stream_content("\n\n🔑 **Invalid API Key**: The Anthropic API key is invalid or missing. Please check your configuration.")
+                        else:
+                            self._stream_content(f"Anthropic API Error: {e}")
+                        raise e
             finally:
                 self._stream_content("[END_THOUGHT] 1")
 
+            messages.append({"role": "assistant", "content": final_message.content})
+
+            # Anthropic returns usage in the final message
+            # Update usage metadata
+            if final_message.usage:
+                self._update_usage(
+                    input_tokens=final_message.usage.input_tokens,
+                    output_tokens=final_message.usage.output_tokens
+                )
+
+            tool_calls = [c for c in final_message.content if c.type == "tool_use"]
+
+            # If no tool calls, we are done
+            if not tool_calls:
+                self.chat_history.append({"role": "User", "content": inputs})
+                self.chat_history.append({"role": "AI", "content": current_text})
+                return
+
+            # 2. Execute Tools
+            observations = await self._execute_tools(task, [(call.name, call.input) for call in tool_calls])
+            tool_results = [
+                {
+                    "type": "tool_result",
+                    "tool_use_id": call.id,
+                    "content": str(observation)
+                }
+                for call, observation in zip(tool_calls, observations)
+            ]
+
+            # Update history with tool observations
+            messages.append({"role": "user", "content": tool_results})
+
+    # --- Tool Execution ---
+
+    async def _execute_tools(self, task: AgentTask, calls: List[Tuple[str, Any]]) -> List[str]:
+        """Run the tool calls of a model turn, returning the observations in call order.
+
+        Calls run on worker threads, so a turn takes about as long as its slowest call.
+        A call only waits for the earlier calls of the turn it conflicts with: read-only
+        tools never conflict with each other, other tools conflict with calls on the
+        same file, and with every call when they may touch anything in the workspace
+        (commands, or searches after an edit)."""
+        tools_map = {t.name: t for t in self.tools}
+
+        scheduled: List[Tuple[Optional[BiscuitTool], Optional[str], asyncio.Task]] = []
+        for name, args in calls:
+            tool = tools_map.get(name)
+            target = tool.target(args) if tool else None
+            waits = [
+                other_call
+                for other, other_target, other_call in scheduled
+                if self._conflicts(tool, target, other, other_target)
+            ]
+            scheduled.append((tool, target, asyncio.ensure_future(
+                self._execute_tool(task, tool, name, args, waits)
+            )))
+
+        return await asyncio.gather(*(call for _, _, call in scheduled))
+
+    @staticmethod
+    def _conflicts(tool: Optional[BiscuitTool], target: Optional[str], other: Optional[BiscuitTool], other_target: Optional[str]) -> bool:
+        if tool is None or other is None or (tool.read_only and other.read_only):
+            return False
+        return target is None or other_target is None or target == other_target
+
+    async def _execute_tool(self, task: AgentTask, tool: Optional[BiscuitTool], name: str, args: Any, waits: List[asyncio.Task]) -> str:
+        if waits:
+            await asyncio.wait(waits)
+
+        try:
+            if tool is not None:
+                observation = await asyncio.to_thread(tool.run, args)
+                self._stream_tool(name, json.dumps(args), str(observation))
+
+                step = AgentStep(
+                    step_number=self.iteration_count,
+                    state=AgentState.EDITING if any(x in name for x in ["edit", "write", "delete"]) else AgentState.SEARCHING,
+                    action=name,
+                    reasoning="Executing tool call.",
+                    result=str(observation)
+                )
+                task.steps.append(step)
+                self._notify_step(step)
+            else:
+                observation = f"Error: Tool '{name}' not found."
+                self._stream_content(observation)
+        except Exception as e:
+            observation = f"Error executing tool: {e}"
+            self._stream_content(observation)
+
+        return observation
+
+    # --- Rate Limits ---
+
+    async def _backoff(self, attempt: int, error: Exception) -> bool:
+        """Wait before retrying a rate limited or overloaded request.
+
+        The delay asked for by the API (Retry-After header or retry delay in the error)
+        is used when there is one, else it doubles with each attempt, with some jitter.
+        Returns False if the request shouldn't be retried."""
+        if attempt >= self.max_retries or not self.is_running or not self._is_rate_limited(error):
+            return False
+
+        delay = self._retry_after(error)
+        if delay is None:
+            delay = min(self.backoff_base * 2 ** attempt, self.backoff_max)
+        delay *= 1 + random.random() * 0.25
+
+        logging.warning(f"Rate limited, retrying in {delay:.1f}s (attempt {attempt + 1}/{self.max_retries})")
+        await asyncio.sleep(delay)
+        return self.is_running
+
+    @staticmethod
+    def _is_rate_limited(error: Exception) -> bool:
+        status = getattr(error, "status_code", None) or getattr(error, "code", None)
+        if status in (429, 529):
+            return True
+        err_msg = str(error).lower()
+        return any(k in err_msg for k in ("429", "rate_limit", "resource_exhausted", "overloaded"))
+
+    @staticmethod
+    def _retry_after(error: Exception) -> Optional[float]:
+        """Seconds the API asked to wait before retrying, if it did."""
+        headers = getattr(getattr(error, "response", None), "headers", None)
+        if headers is not None:
+            try:
+                return max(0.0, float(headers.get("retry-after")))
+            except (TypeError, ValueError):
+                pass
+
+        match = re.search(r"retry.?delay\W+(\d+(?:\.\d+)?)s", str(error), re.IGNORECASE)
+        return float(match.group(1)) if match else None
+
     def _get_anthropic_tools(self) -> List[Dict[str, Any]]:
         """Convert tools to Anthropic's format."""
         anthropic_tools = []
@@ -15,15 +15,24 @@ import re
 import subprocess
 import typing
 from pathlib import Path
-from typing import Any, ClassVar, Dict, List, Optional
+from typing import Any, ClassVar, Dict, Iterator, List, Optional, Tuple
 
 
 from pydantic import BaseModel, Field
 
+from ..files import list_files
+
 if typing.TYPE_CHECKING:
     from biscuit import App
 
 
+SKIP_DIRS = {'.git', 'node_modules', '__pycache__', 'venv', '.venv', 'dist', 'build'}
+
+CODE_EXTENSIONS = {'.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.go', '.rs', '.c', '.cpp', '.h', '.hpp', '.rb', '.php', '.cs', '.swift', '.kt', '.scala', '.vue', '.svelte'}
+
+STOP_WORDS = {'how', 'does', 'what', 'where', 'is', 'the', 'a', 'an', 'in', 'to', 'for', 'of', 'and', 'or', 'are', 'this', 'that', 'it', 'be', 'with', 'on', 'as', 'at', 'by', 'from'}
+
+
 # --- Input Schemas ---
 
 class ReadFileInput(BaseModel):
@@ -101,6 +110,9 @@ class BiscuitTool:
     args_schema: typing.Type[BaseModel]
     base: typing.Any = None
 
+    # read-only tools run concurrently with each other, see Agent._execute_tools
+    read_only: bool = False
+
     def run(self, args: Dict[str, Any]) -> str:
         """Execute the tool with the given arguments."""
         if isinstance(args, str):
@@ -117,6 +129,11 @@ class BiscuitTool:
         arbitrary_types_allowed = True
         populate_by_name = True
 
+    def target(self, args: Dict[str, Any]) -> Optional[str]:
+        """File a call works on, None if it may touch anything in the workspace."""
+        path = args.get('target_file') if isinstance(args, dict) else None
+        return os.path.normcase(self._get_abs_path(path)) if path else None
+
     def _get_abs_path(self, path: str) -> str:
         """Resolve path relative to workspace active directory."""
         if os.path.isabs(path):
@@ -135,6 +152,54 @@ class BiscuitTool:
         """Get the workspace root directory."""
         return getattr(self.base, 'active_directory', None) or os.getcwd()
 
+    def _get_content_index(self, path: str) -> Tuple[Any, Optional[str]]:
+        """Content index of the workspace and `path` relative to its root, if it covers `path`.
+
+        The index is built on first use; until it is ready, (None, None) is returned
+        right away and the caller walks the directory instead."""
+        index = getattr(getattr(self.base, 'explorer', None), 'contentindex', None)
+        if index is None:
+            return None, None
+
+        rel = index.available(path)
+        return (index, rel) if rel is not None else (None, None)
+
+    def _ignored(self) -> Tuple[set, tuple]:
+        """Directory names and file extensions left out of searches, as the explorer has them."""
+        directory = getattr(getattr(self.base, 'explorer', None), 'directory', None)
+        if directory is None:
+            return set(SKIP_DIRS), ()
+        return SKIP_DIRS | set(directory.search_ignore_dirs), tuple(directory.ignore_exts)
+
+    def _included(self, rel_path: str) -> bool:
+        """Whether a file is searched, skipping hidden and vendored files. Both the walk and the content index go through this."""
+        parts = rel_path.replace('\\', '/').split('/')
+        return not any(part.startswith('.') or part in SKIP_DIRS for part in parts)
+
+    def _walk_files(self, root: str) -> Iterator[Tuple[str, str]]:
+        """Files of a directory, as (full path, path relative to root).
+
+        Files are listed like the content index lists them, leaving out gitignored files
+        in a git repository."""
+        ignore_dirs, ignore_exts = self._ignored()
+        for path in list_files(root, ignore_dirs, ignore_exts):
+            if self._included(path):
+                full_path = os.path.join(root, path)
+                yield full_path, os.path.relpath(full_path, root)
+
+    def _indexed_files(self, index, rel: str, root: str) -> List[Tuple[str, str]]:
+        """Files of the content index under `rel`, as (full path, path relative to root)."""
+        ignore_dirs, ignore_exts = self._ignored()
+        files = []
+        for path in index.paths(rel):
+            if path.endswith(ignore_exts) or ignore_dirs.intersection(path.split('/')[:-1]):
+                continue
+            full_path = os.path.join(index.root, path)
+            rel_path = os.path.relpath(full_path, root)
+            if self._included(rel_path):
+                files.append((full_path, rel_path))
+        return files
+
 
 # --- Tool Implementations ---
 
@@ -143,6 +208,7 @@ class ReadFileTool(BiscuitTool):
     description: str = """Read contents of a file. Returns line-numbered content.
 Use offset and limit for large files. Can read images (returns description)."""
     args_schema: ClassVar[type[BaseModel]] = ReadFileInput
+    read_only: bool = True
 
     def _run(self, target_file: str, offset: Optional[int] = None, limit: Optional[int] = None) -> str:
         try:
@@ -344,6 +410,7 @@ class ListDirTool(BiscuitTool):
     description: str = """List files and directories in a given path.
 Does not display dot-files by default."""
     args_schema: ClassVar[type[BaseModel]] = ListDirInput
+    read_only: bool = True
 
     def _run(self, target_directory: str, ignore_globs: Optional[List[str]] = None) -> str:
         try:
@@ -388,6 +455,7 @@ class GlobFileSearchTool(BiscuitTool):
     description: str = """Search for files matching a glob pattern.
 Returns matching file paths sorted by modification time."""
     args_schema: ClassVar[type[BaseModel]] = GlobFileSearchInput
+    read_only: bool = True
 
     def _run(self, glob_pattern: str, target_directory: Optional[str] = None) -> str:
         try:
@@ -438,6 +506,7 @@ class GrepTool(BiscuitTool):
     description: str = """Search for patterns in files using regex.
 Supports ripgrep-style options: -i (case insensitive), -A/-B/-C (context), output modes."""
     args_schema: ClassVar[type[BaseModel]] = GrepInput
+    read_only: bool = True
 
     def _run(
         self,
@@ -489,7 +558,6 @@ Supports ripgrep-style options: -i (case insensitive), -A/-B/-C (context), outpu
 
             results = []
             file_counts = {}
-            skip_dirs = {'.git', 'node_modules', '__pycache__', 'venv', '.venv', 'dist', 'build'}
 
             def should_include_file(filepath: str) -> bool:
                 if glob:
@@ -498,52 +566,37 @@ Supports ripgrep-style options: -i (case insensitive), -A/-B/-C (context), outpu
                     return any(filepath.endswith(ext) for ext in file_extensions)
                 return True
 
-            for dirpath, dirnames, filenames in os.walk(search_path):
-                dirnames[:] = [d for d in dirnames if d not in skip_dirs and not d.startswith('.')]
+            for full_path, rel_path in self._files(search_path, regex, should_include_file):
+                try:
+                    with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+                        content = f.read()
+                        lines = content.split('\n')
+                except:
+                    continue
 
-                for filename in filenames:
-                    if filename.startswith('.'):
-                        continue
-
-                    full_path = os.path.join(dirpath, filename)
-                    rel_path = os.path.relpath(full_path, search_path)
-
-                    if not should_include_file(rel_path):
-                        continue
-
-                    try:
-                        with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read()
-                            lines = content.split('\n')
-                    except:
-                        continue
-
-                    file_matches = []
-                    for i, line in enumerate(lines, 1):
-                        if regex.search(line):
-                            file_matches.append((i, line))
-                            file_counts[rel_path] = file_counts.get(rel_path, 0) + 1
-
-                    if file_matches and output_mode == "content":
-                        ctx_b = context_before or context or 0
-                        ctx_a = context_after or context or 0
-
-                        for line_num, line in file_matches:
-                            if ctx_b or ctx_a:
-                                # Add context lines
-                                start = max(0, line_num - 1 - ctx_b)
-                                end = min(len(lines), line_num + ctx_a)
-                                for j in range(start, end):
-                                    prefix = ':' if j == line_num - 1 else '-'
-                                    results.append(f"{rel_path}{prefix}{j+1}{prefix}{lines[j][:200]}")
-                            else:
-                                results.append(f"{rel_path}:{line_num}:{line[:200]}")
-
-                            if head_limit and len(results) >= head_limit:
-                                break
-
-                    if head_limit and len(results) >= head_limit:
-                        break
+                file_matches = []
+                for i, line in enumerate(lines, 1):
+                    if regex.search(line):
+                        file_matches.append((i, line))
+                        file_counts[rel_path] = file_counts.get(rel_path, 0) + 1
+
+                if file_matches and output_mode == "content":
+                    ctx_b = context_before or context or 0
+                    ctx_a = context_after or context or 0
+
+                    for line_num, line in file_matches:
+                        if ctx_b or ctx_a:
+                            # Add context lines
+                            start = max(0, line_num - 1 - ctx_b)
+                            end = min(len(lines), line_num + ctx_a)
+                            for j in range(start, end):
+                                prefix = ':' if j == line_num - 1 else '-'
+                                results.append(f"{rel_path}{prefix}{j+1}{prefix}{lines[j][:200]}")
+                        else:
+                            results.append(f"{rel_path}:{line_num}:{line[:200]}")
+
+                        if head_limit and len(results) >= head_limit:
+                            break
 
                 if head_limit and len(results) >= head_limit:
                     break
@@ -566,6 +619,30 @@ Supports ripgrep-style options: -i (case insensitive), -A/-B/-C (context), outpu
         except Exception as e:
             return f"Error searching: {e}"
 
+    def _files(self, search_path: str, regex: re.Pattern, include: typing.Callable[[str], bool]) -> Iterator[Tuple[str, str]]:
+        """Files to search, as (full path, path relative to search_path).
+
+        With the workspace content index, only the files containing the literal parts
+        of the pattern are read, otherwise the directory is walked."""
+        if os.path.isfile(search_path):
+            yield search_path, os.path.basename(search_path)
+            return
+
+        index, rel = self._get_content_index(search_path)
+        if index is None:
+            for full_path, rel_path in self._walk_files(search_path):
+                if include(rel_path):
+                    yield full_path, rel_path
+            return
+
+        files = {
+            os.path.relpath(full_path, index.root).replace('\\', '/'): (full_path, rel_path)
+            for full_path, rel_path in self._indexed_files(index, rel, search_path)
+            if include(rel_path)
+        }
+        for path in index.grep_candidates(regex, list(files)):
+            yield files[path]
+
 
 class CodebaseSearchTool(BiscuitTool):
     name: str = "codebase_search"
@@ -573,14 +650,14 @@ class CodebaseSearchTool(BiscuitTool):
 Use for "how/where/what" questions about the codebase.
 For exact text, use grep instead."""
     args_schema: ClassVar[type[BaseModel]] = CodebaseSearchInput
+    read_only: bool = True
 
     def _run(self, query: str, target_directories: List[str], explanation: str) -> str:
-        """Perform semantic-like search by extracting keywords and searching."""
+        """Rank files for the query with BM25 over the workspace content index."""
         try:
             # Extract keywords from the query
-            stop_words = {'how', 'does', 'what', 'where', 'is', 'the', 'a', 'an', 'in', 'to', 'for', 'of', 'and', 'or', 'are', 'this', 'that', 'it', 'be', 'with', 'on', 'as', 'at', 'by', 'from'}
             words = re.findall(r'\b\w+\b', query.lower())
-            keywords = [w for w in words if w not in stop_words and len(w) > 2]
+            keywords = [w for w in words if w not in STOP_WORDS and len(w) > 2]
 
             if not keywords:
                 return "Could not extract meaningful keywords from query."
@@ -589,52 +666,22 @@ For exact text, use grep instead."""
             if target_directories and target_directories[0]:
                 search_root = self._get_abs_path(target_directories[0])
 
-            results = []
-            skip_dirs = {'.git', 'node_modules', '__pycache__', 'venv', '.venv', 'dist', 'build'}
-
-            # Score files by keyword matches
-            file_scores: Dict[str, Dict] = {}
-
-            for dirpath, dirnames, filenames in os.walk(search_root):
-                dirnames[:] = [d for d in dirnames if d not in skip_dirs and not d.startswith('.')]
-
-                for filename in filenames:
-                    if filename.startswith('.'):
-                        continue
-
-                    ext = os.path.splitext(filename)[1].lower()
-                    if ext not in {'.py', '.js', '.ts', '.jsx', '.tsx', '.java', '.go', '.rs', '.c', '.cpp', '.h', '.hpp', '.rb', '.php', '.cs', '.swift', '.kt', '.scala', '.vue', '.svelte'}:
-                        continue
-
-                    full_path = os.path.join(dirpath, filename)
-                    rel_path = os.path.relpath(full_path, self._get_workspace_root())
-
-                    try:
-                        with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            content = f.read().lower()
-                    except:
-                        continue
-
-                    # Score based on keyword matches
-                    score = 0
-                    matched_lines = []
-                    lines = content.split('\n')
-
-                    for i, line in enumerate(lines, 1):
-                        line_score = sum(1 for kw in keywords if kw in line.lower())
-                        if line_score > 0:
-                            score += line_score
-                            if len(matched_lines) < 3:
-                                matched_lines.append((i, line.strip()[:100]))
-
-                    if score > 0:
-                        file_scores[rel_path] = {
-                            'score': score,
-                            'matches': matched_lines
-                        }
-
-            # Sort by score and return top results
-            sorted_files = sorted(file_scores.items(), key=lambda x: x[1]['score'], reverse=True)[:10]
+            index, rel = self._get_content_index(search_root)
+            if index is None:
+                sorted_files = self._scan(search_root, keywords)
+            else:
+                # identifiers are split into words, so `FileWatcher` finds `file_watcher` too
+                terms = [t for t in index.tokenize(query) if t not in STOP_WORDS]
+                workspace_root = self._get_workspace_root()
+                files = {
+                    os.path.relpath(full_path, index.root).replace('\\', '/'): os.path.relpath(full_path, workspace_root)
+                    for full_path, _ in self._indexed_files(index, rel, search_root)
+                    if os.path.splitext(full_path)[1].lower() in CODE_EXTENSIONS
+                }
+                sorted_files = [
+                    (files[path], {'score': round(score, 2), 'matches': self._matched_lines(os.path.join(index.root, path), keywords)})
+                    for path, score in index.rank(terms, list(files), limit=10)
+                ]
 
             if not sorted_files:
                 return f"No relevant code found for: {query}"
@@ -650,6 +697,57 @@ For exact text, use grep instead."""
         except Exception as e:
             return f"Error in codebase search: {e}"
 
+    def _matched_lines(self, full_path: str, keywords: List[str], limit: int = 3) -> List[Tuple[int, str]]:
+        """First lines of a file containing any of the keywords."""
+        matched_lines = []
+        try:
+            with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+                for i, line in enumerate(f, 1):
+                    lower = line.lower()
+                    if any(kw in lower for kw in keywords):
+                        matched_lines.append((i, lower.strip()[:100]))
+                        if len(matched_lines) >= limit:
+                            break
+        except OSError:
+            pass
+        return matched_lines
+
+    def _scan(self, search_root: str, keywords: List[str]) -> List[Tuple[str, Dict]]:
+        """Score files by keyword counts, reading every file. Used without the content index."""
+        file_scores: Dict[str, Dict] = {}
+
+        for full_path, _ in self._walk_files(search_root):
+            ext = os.path.splitext(full_path)[1].lower()
+            if ext not in CODE_EXTENSIONS:
+                continue
+
+            rel_path = os.path.relpath(full_path, self._get_workspace_root())
+
+            try:
+                with open(full_path, 'r', encoding='utf-8', errors='ignore') as f:
+                    content = f.read().lower()
+            except:
+                continue
+
+            # Score based on keyword matches
+            score = 0
+            matched_lines = []
+            for i, line in enumerate(content.split('\n'), 1):
+                line_score = sum(1 for kw in keywords if kw in line)
+                if line_score > 0:
+                    score += line_score
+                    if len(matched_lines) < 3:
+                        matched_lines.append((i, line.strip()[:100]))
+
+            if score > 0:
+                file_scores[rel_path] = {
+                    'score': score,
+                    'matches': matched_lines
+                }
+
+        # Sort by score and return top results
+        return sorted(file_scores.items(), key=lambda x: x[1]['score'], reverse=True)[:10]
+
 
 class RunTerminalCmdTool(BiscuitTool):
     name: str = "run_terminal_cmd"
@@ -753,6 +851,7 @@ class GetWorkspaceInfoTool(BiscuitTool):
     name: str = "get_workspace_info"
     description: str = "Get information about current workspace and environment."
     args_schema: ClassVar[type[BaseModel]] = GetWorkspaceInfoInput
+    read_only: bool = True
 
     def _run(self) -> str:
         cwd = self._get_workspace_root()
@@ -804,6 +903,7 @@ class GetActiveEditorTool(BiscuitTool):
     name: str = "get_active_editor"
     description: str = "Get the path and status of the currently focused editor."
     args_schema: ClassVar[type[BaseModel]] = GetActiveEditorInput
+    read_only: bool = True
 
     def _run(self) -> str:
         try:
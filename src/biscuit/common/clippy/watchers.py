@@ -42,7 +42,7 @@ class ASTWatcher(BaseWatcher):
             except queue.Empty:
                 continue
             except Exception as e:
-                print(f"DEBUG: ASTWatcher worker error: {e}")
+                self.engine.base.logger.error(f"Clippy AST watcher failed: {e}")
 
     def report_change(self, file_path, content, indentation_level):
         if not self.active: return
@@ -72,7 +72,7 @@ class ASTWatcher(BaseWatcher):
         self.last_report_time = now
 
         # 4. Python Specific AST Analysis
-        if file_path.endswith(".py"):
+        if file_path and file_path.endswith(".py"):
             try:
                 tree = ast.parse(content)
                 nodes = len(list(ast.walk(tree)))
@@ -0,0 +1,277 @@
+from __future__ import annotations
+
+import os
+import threading
+import time
+import tkinter as tk
+import traceback
+import typing
+from collections import deque
+
+if typing.TYPE_CHECKING:
+    from biscuit import App
+
+
+class Channel:
+    """A stream of work for the UI thread, see `Dispatcher`
+
+    Anything can be posted from any thread. The handler is called on the UI thread
+    with a batch of the posted items (at most `batch_size`) and returns True when it
+    has more work left that it wants to be called again for, even without items.
+    Posting without items only wakes the handler, for producers that keep their
+    own buffer."""
+
+    def __init__(
+        self,
+        dispatcher: Dispatcher,
+        name: str,
+        handler: typing.Callable[[list], bool | None] = None,
+        batch_size: int = None,
+    ) -> None:
+        self.dispatcher = dispatcher
+        self.name = name
+        self.handler = handler
+        self.batch_size = batch_size
+        self.closed = False
+
+        # (time posted, item)
+        self.items: deque[tuple[float, typing.Any]] = deque()
+        # time of the first item-less post not handled yet
+        self.signalled: float | None = None
+
+        self.posted = 0
+        self.handled = 0
+        self.batches = 0
+        self.max_depth = 0
+        self.latency_total = 0.0
+        self.latency_count = 0
+        self.latency_max = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self.items)
+
+    def connect(self, handler: typing.Callable[[list], bool | None]) -> None:
+        """Set the handler, items posted before are handed over on the next dispatch"""
+
+        self.handler = handler
+        if self.items or self.signalled is not None:
+            self.dispatcher.wake(self)
+
+    def post(self, *items) -> None:
+        """Queue items for the handler and wake the UI thread. Safe to call from any thread."""
+
+        if self.closed:
+            return
+
+        now = time.perf_counter()
+        if items:
+            self.items.extend((now, item) for item in items)
+            self.posted += len(items)
+            self.max_depth = max(self.max_depth, len(self.items))
+        elif self.signalled is None:
+            self.signalled = now
+
+        if self.handler:
+            self.dispatcher.wake(self)
+
+    def close(self) -> None:
+        """Drop the pending items and stop taking new ones"""
+
+        self.closed = True
+        self.items.clear()
+        self.dispatcher.remove(self)
+
+    def process(self) -> bool:
+        """Hand a batch over to the handler
+
+        Returns:
+            bool: True if there is work left"""
+
+        if self.closed or not self.handler:
+            return False
+
+        batch = []
+        count = len(self.items)
+        if self.batch_size:
+            count = min(count, self.batch_size)
+        for _ in range(count):
+            batch.append(self.items.popleft())
+        signalled, self.signalled = self.signalled, None
+
+        try:
+            more = self.handler([item for _, item in batch])
+        except Exception:
+            traceback.print_exc()
+            more = False
+
+        now = time.perf_counter()
+        times = [t for t, _ in batch]
+        if signalled is not None:
+            times.append(signalled)
+        if times:
+            self.latency_total += sum(now - t for t in times)
+            self.latency_count += len(times)
+            self.latency_max = max(self.latency_max, now - min(times))
+        self.handled += len(batch)
+        self.batches += 1
+
+        return not self.closed and bool(more or self.items)
+
+    def stats(self) -> dict[str, float]:
+        """Queue depth and latency (ms from post to handled) of the channel"""
+
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "posted": self.posted,
+            "handled": self.handled,
+            "batches": self.batches,
+            "latency_avg": (
+                self.latency_total / self.latency_count * 1000
+                if self.latency_count
+                else 0.0
+            ),
+            "latency_max": self.latency_max * 1000,
+        }
+
+
+class Dispatcher:
+    """Single entry point for work that background threads hand to the UI thread
+
+    Instead of every widget polling its own queue with `after`, producers post to a
+    `Channel` and the dispatcher wakes the Tk event loop once per burst: through a
+    pipe registered as a Tk file handler where available, else with `after(0)`.
+    While idle nothing is scheduled at all.
+
+    When woken, the channels with work are served in turns, a batch each, until
+    they are drained or the `budget` for the frame is used up, then the rest is
+    continued after Tk had the chance to handle input and redraw."""
+
+    # seconds of handler work per turn of the event loop
+    budget = 0.008
+
+    def __init__(self, base: App) -> None:
+        self.base = base
+        self.channels: dict[str, Channel] = {}
+        # channels with work, in the order they were woken (dict as ordered set)
+        self.ready: dict[Channel, None] = {}
+        self.woken = False
+        self._lock = threading.Lock()
+
+        self._pipe = None
+        if os.name == "posix" and hasattr(self.base.tk, "createfilehandler"):
+            try:
+                r, w = os.pipe()
+                os.set_blocking(r, False)
+                os.set_blocking(w, False)
+                self.base.tk.createfilehandler(r, tk.READABLE, self._on_pipe)
+                self._pipe = (r, w)
+            except (OSError, tk.TclError):
+                pass
+
+    def channel(
+        self,
+        name: str,
+        handler: typing.Callable[[list], bool | None] = None,
+        batch_size: int = None,
+    ) -> Channel:
+        """Create a channel
+
+        Args:
+            name (str): Name of the channel in `stats`, made unique if taken
+            handler (Callable, optional): Called on the UI thread with a batch of
+                posted items, can be connected later.
+            batch_size (int, optional): Most items handed over per call.
+                Defaults to all pending items."""
+
+        with self._lock:
+            unique = name
+            n = 1
+            while unique in self.channels:
+                n += 1
+                unique = f"{name} #{n}"
+
+            channel = Channel(self, unique, handler, batch_size)
+            self.channels[unique] = channel
+            return channel
+
+    def remove(self, channel: Channel) -> None:
+        with self._lock:
+            if self.channels.get(channel.name) is channel:
+                del self.channels[channel.name]
+            self.ready.pop(channel, None)
+
+    def wake(self, channel: Channel) -> None:
+        """Schedule a channel to be served, wakes the event loop if it's asleep"""
+
+        with self._lock:
+            self.ready[channel] = None
+            if self.woken:
+                return
+            self.woken = True
+
+        if self._pipe:
+            try:
+                os.write(self._pipe[1], b"\0")
+                return
+            except OSError:
+                pass
+
+        try:
+            self.base.after(0, self.dispatch)
+        except (RuntimeError, tk.TclError):
+            # UI is gone
+            pass
+
+    def _on_pipe(self, *_) -> None:
+        try:
+            os.read(self._pipe[0], 4096)
+        except OSError:
+            pass
+        self.dispatch()
+
+    def dispatch(self) -> None:
+        """Serve the channels with work until drained or out of budget"""
+
+        with self._lock:
+            pending = deque(self.ready)
+            self.ready.clear()
+
+        deadline = time.perf_counter() + self.budget
+        while pending:
+            channel = pending.popleft()
+            if channel.process():
+                pending.append(channel)
+            if time.perf_counter() >= deadline:
+                break
+
+        with self._lock:
+            for channel in pending:
+                self.ready[channel] = None
+            if not self.ready:
+                self.woken = False
+                return
+
+        # more work, either left over or posted meanwhile
+        try:
+            self.base.after(1, self.dispatch)
+        except tk.TclError:
+            pass
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Queue depth and latency metrics of every channel, by name"""
+
+        with self._lock:
+            channels = list(self.channels.values())
+        return {channel.name: channel.stats() for channel in channels}
+
+    def destroy(self) -> None:
+        if self._pipe:
+            try:
+                self.base.tk.deletefilehandler(self._pipe[0])
+            except tk.TclError:
+                pass
+            for fd in self._pipe:
+                os.close(fd)
+            self._pipe = None
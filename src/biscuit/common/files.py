@@ -0,0 +1,82 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import typing
+
+
+def list_files(
+    root: str, ignore_dirs: typing.Iterable[str] = (), ignore_exts: typing.Iterable[str] = ()
+) -> list[str]:
+    """Relative paths of the files in a directory that are not ignored, with `/` separators
+
+    In a git repository the files are listed by git, so gitignored files are left out.
+    Otherwise the directory is walked.
+
+    Args:
+        root (str): Directory to list
+        ignore_dirs (Iterable[str], optional): Names of directories to skip
+        ignore_exts (Iterable[str], optional): File extensions to skip"""
+
+    ignore_dirs, ignore_exts = set(ignore_dirs), tuple(ignore_exts)
+
+    try:
+        out = subprocess.run(
+            ["git", "ls-files", "-z", "--cached", "--others", "--exclude-standard"],
+            cwd=root,
+            capture_output=True,
+            check=True,
+            **(
+                {"creationflags": subprocess.CREATE_NO_WINDOW}
+                if os.name == "nt"
+                else {}
+            ),
+        ).stdout
+    except (OSError, subprocess.CalledProcessError):
+        return walk_files(root, ignore_dirs, ignore_exts)
+
+    paths = []
+    for path in out.decode("utf-8", errors="replace").split("\0"):
+        if not path or path.endswith(ignore_exts) or "\n" in path:
+            continue
+        if ignore_dirs.intersection(path.split("/")[:-1]):
+            continue
+        paths.append(path)
+
+    return paths
+
+
+def walk_files(
+    root: str, ignore_dirs: typing.Iterable[str] = (), ignore_exts: typing.Iterable[str] = ()
+) -> list[str]:
+    """Walk a directory, skipping ignored directories
+
+    Args:
+        root (str): Directory to walk
+        ignore_dirs (Iterable[str], optional): Names of directories to skip
+        ignore_exts (Iterable[str], optional): File extensions to skip"""
+
+    ignore_dirs, ignore_exts = set(ignore_dirs), tuple(ignore_exts)
+
+    paths = []
+    stack = [""]
+    while stack:
+        rel = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, rel))
+        except OSError:
+            continue
+
+        with entries:
+            for entry in entries:
+                path = f"{rel}{entry.name}"
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        if entry.name not in ignore_dirs:
+                            stack.append(path + "/")
+                    elif not entry.name.endswith(ignore_exts) and "\n" not in path:
+                        paths.append(path)
+                except OSError:
+                    continue
+
+    return paths
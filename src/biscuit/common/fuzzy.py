@@ -0,0 +1,125 @@
+"""Fuzzy matching used for filtering the palette
+
+A term matches a text when all of its characters appear in the text in order.
+Matches are scored higher when the characters are consecutive, start words
+(after a separator or at a camelCase hump) or start the text.
+"""
+
+from __future__ import annotations
+
+MATCH = 16
+CONSECUTIVE = 8
+START = 12
+BOUNDARY = 10
+CAMEL = 8
+GAP = 3
+GAP_EXTENSION = 1
+
+
+def fuzzy_match(term: str, text: str, lower: str = None) -> tuple[float, list[int]] | None:
+    """Match a term against a text
+
+    Args:
+        term (str): The lowercase search term
+        text (str): The text to match against
+        lower (str, optional): The text in lowercase, if already known
+
+    Returns:
+        tuple[float, list[int]] | None: The score and the matched positions in the
+            text, None if the term does not match"""
+
+    if lower is None:
+        lower = text.lower()
+    if not term:
+        return 0, []
+
+    # leftmost end of a match, then walk back for the shortest match ending there
+    pos = -1
+    for c in term:
+        pos = lower.find(c, pos + 1)
+        if pos < 0:
+            return None
+
+    positions = [0] * len(term)
+    pos += 1
+    for k in range(len(term) - 1, -1, -1):
+        pos = lower.rfind(term[k], 0, pos)
+        positions[k] = pos
+
+    best = (score_positions(text, lower, positions), positions)
+
+    # characters at the start of words, eg. "ce" in "Close Editor"
+    if len(term) > 1 and (initials := word_start_positions(term, text, lower)):
+        score = score_positions(text, lower, initials)
+        if score > best[0]:
+            best = (score, initials)
+
+    # the term as a whole, preferably where a word starts
+    index = lower.find(term)
+    while index >= 0:
+        substring = list(range(index, index + len(term)))
+        score = score_positions(text, lower, substring)
+        if score > best[0]:
+            best = (score, substring)
+        if index == 0 or not lower[index - 1].isalnum():
+            break
+        index = lower.find(term, index + 1)
+
+    return best
+
+
+def is_word_start(text: str, lower: str, i: int) -> bool:
+    return (
+        i == 0
+        or not lower[i - 1].isalnum()
+        or (text[i].isupper() and text[i - 1].islower())
+    )
+
+
+def word_start_positions(term: str, text: str, lower: str) -> list[int] | None:
+    """Match each character of the term at the next word start, or the next
+    occurrence if no word starts with it"""
+
+    positions = []
+    pos = -1
+    for c in term:
+        first = i = lower.find(c, pos + 1)
+        while i >= 0 and not is_word_start(text, lower, i):
+            i = lower.find(c, i + 1)
+
+        pos = i if i >= 0 else first
+        if pos < 0:
+            return None
+        positions.append(pos)
+
+    return positions
+
+
+def score_positions(text: str, lower: str, positions: list[int]) -> float:
+    """Score matched positions of a text
+
+    Args:
+        text (str): The text
+        lower (str): The text in lowercase
+        positions (list[int]): Positions of the matched characters, in order"""
+
+    score = 0.0
+    previous = -1
+    for i in positions:
+        score += MATCH
+        if i == 0:
+            score += START
+        elif not lower[i - 1].isalnum():
+            score += BOUNDARY
+        elif text[i].isupper() and text[i - 1].islower():
+            score += CAMEL
+
+        if previous >= 0:
+            if i == previous + 1:
+                score += CONSECUTIVE
+            else:
+                score -= GAP + GAP_EXTENSION * (i - previous - 2)
+        previous = i
+
+    # prefer shorter texts when everything else is the same
+    return score - len(text) / 100
@@ -3,8 +3,9 @@
 import inspect
 import os
 import subprocess as sp
+import tkinter as tk
 import webbrowser
-from tkinter import messagebox
+from tkinter import messagebox, ttk
 
 import filetype
 
@@ -53,6 +54,25 @@ def is_image(file_path):
     return filetype.is_image(file_path)
 
 
+def is_dark(widget: tk.Misc) -> bool:
+    """Check if a widget is drawn on a dark background.
+
+    Args:
+        widget (tk.Misc): the widget, ttk widgets are looked up in their style
+    """
+
+    try:
+        background = widget.cget("background")
+    except tk.TclError:
+        style = ttk.Style(widget)
+        background = style.lookup(
+            widget.cget("style") or widget.winfo_class(), "fieldbackground"
+        ) or style.lookup(".", "background")
+
+    r, g, b = (c / 65535 for c in widget.winfo_rgb(background))
+    return 0.2126 * r + 0.7152 * g + 0.0722 * b < 0.5
+
+
 def search_google(query: str) -> None:
     webbrowser.open(f"https://www.google.com/search?q={query}")
 
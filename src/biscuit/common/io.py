@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import os
 import queue
 import subprocess
 import typing
@@ -10,15 +11,26 @@ if typing.TYPE_CHECKING:
 
 
 class IO:
-    """Handling input/output of a process in a separate thread"""
+    """Handling input/output of a process in a separate thread
 
-    def __init__(self, master, cmd: str, cwd: str) -> None:
+    The output of the process is read in large blocks and split into messages
+    framed with a `Content-Length` header (as used by the language server protocol)
+    off the UI thread. The UI thread is woken up through the dispatcher once a
+    complete message is ready, and not again until it has read the pending output."""
+
+    read_size = 1 << 16
+
+    def __init__(
+        self, master, cmd: str, cwd: str, callback: typing.Callable[[], typing.Any] = None
+    ) -> None:
         """Initialize the IO class
 
         Args:
             master: The parent object
             cmd (str): The command to run
-            cwd (str): The working directory"""
+            cwd (str): The working directory
+            callback (Callable, optional): Called on the UI thread when output is
+                ready to be read or the process has exited"""
 
         self.master = master
         self.base: App = master.base
@@ -26,6 +38,9 @@ class IO:
         self.cmd = cmd
         self.cwd = cwd
 
+        self.callback = callback
+        self.channel = self.base.dispatcher.channel("io", self._dispatch)
+
         self.in_queue = queue.Queue()  # input data
         self.out_queue = queue.Queue()  # output results
 
@@ -36,9 +51,16 @@ class IO:
             buf: The data to write to the process
         """
 
-        self.in_queue.put(buf)
+        if buf:
+            self.in_queue.put(buf)
+
+    def read(self) -> bytes | None:
+        """Read the complete messages received from the process
+
+        Returns:
+            bytes | None: The messages, None if there are none yet and
+                empty bytes once the process has exited"""
 
-    def read(self) -> None:
         buf = bytearray()
         while True:
             try:
@@ -46,7 +68,7 @@ class IO:
             except queue.Empty:
                 break
 
-        if self.t_out.is_alive() and not buf:
+        if self.alive and not buf:
             return None
         return bytes(buf)
 
@@ -93,17 +115,82 @@ class IO:
                 pass
 
     def _process_out(self) -> None:
+        fd = self.p.stdout.fileno()
+        buf = bytearray()
         while self.alive:
-            data = self.p.stdout.read(1)
+            try:
+                data = os.read(fd, self.read_size)
+            except OSError:
+                break
             if not data:
                 break
-            self.out_queue.put(data)
+
+            buf += data
+            messages = split_messages(buf)
+            if messages:
+                self.out_queue.put(b"".join(messages))
+                self._notify()
+
+        # wake up the reader to notice the process has exited
+        self.alive = False
+        self._notify()
+
+    def _notify(self) -> None:
+        """Wake the callback on the UI thread, wake-ups pending are merged into one"""
+
+        if self.callback:
+            self.channel.post()
+
+    def _dispatch(self, _) -> None:
+        if self.callback() is False:
+            self.channel.close()
 
     def _process_err(self) -> None:
         while self.alive:
-            data = self.p.stderr.read(1)
+            data = self.p.stderr.read1(self.read_size)
             if not data:
                 break
             print(
                 data.decode(errors="ignore"), end="", flush=True
             )  # Print to the console
+
+
+def split_messages(buf: bytearray) -> list[bytes]:
+    """Remove the complete `Content-Length` framed messages from the buffer
+
+    Args:
+        buf (bytearray): Data received so far, modified in place
+
+    Returns:
+        list[bytes]: The complete messages, with their headers"""
+
+    messages = []
+    start = 0
+    while True:
+        header_end = buf.find(b"\r\n\r\n", start)
+        if header_end < 0:
+            break
+
+        length = None
+        for line in bytes(buf[start:header_end]).split(b"\r\n"):
+            name, _, value = line.partition(b":")
+            if name.strip().lower() == b"content-length":
+                try:
+                    length = int(value)
+                except ValueError:
+                    pass
+
+        if length is None:
+            # malformed header, skip it
+            start = header_end + 4
+            continue
+
+        end = header_end + 4 + length
+        if len(buf) < end:
+            break
+
+        messages.append(bytes(buf[start:end]))
+        start = end
+
+    del buf[:start]
+    return messages
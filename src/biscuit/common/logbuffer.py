@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import os
+import pprint
+import sys
+import threading
+import typing
+from collections import deque
+from datetime import datetime
+from itertools import islice
+
+TRACE, INFO, WARNING, ERROR = range(4)
+LEVELS = ("trace", "info", "warning", "error")
+
+
+class LogRecord(typing.NamedTuple):
+    """A log entry as it is kept in memory, formatted only when it's shown"""
+
+    time: float
+    level: int
+    caller: str
+    message: str
+    args: tuple
+
+    @property
+    def text(self) -> str:
+        if not self.args:
+            return self.message
+        try:
+            return self.message % self.args
+        except (TypeError, ValueError):
+            return " ".join(map(str, (self.message,) + self.args))
+
+    @property
+    def timestamp(self) -> str:
+        return datetime.fromtimestamp(self.time).strftime("%H:%M:%S:%f")
+
+    def format(self) -> str:
+        return f"[{self.timestamp}] [{LEVELS[self.level]}] [{self.caller}]: {self.text}"
+
+
+class Pretty:
+    """Log argument that is pretty printed, once the record is formatted"""
+
+    __slots__ = ("value",)
+
+    def __init__(self, value) -> None:
+        self.value = value
+
+    def __str__(self) -> str:
+        return pprint.pformat(self.value)
+
+
+class LogBuffer:
+    """Ring buffer of the most recent log records
+
+    Records below `level` are dropped before anything is done with them, the rest
+    are stored as they were logged: the message and its arguments are formatted
+    only when the record is displayed or exported. Once `capacity` records are
+    kept, the oldest ones make room.
+
+    Records are numbered in the order they were logged, `start` is the number of
+    the oldest record still kept and `end` the number the next one will get.
+    """
+
+    def __init__(self, capacity: int = 10000, level: int = INFO) -> None:
+        self.records: deque[LogRecord] = deque(maxlen=max(capacity, 1))
+        self.level = level
+        self.end = 0
+        self._lock = threading.Lock()
+
+        self.exporter: LogExporter | None = None
+
+    @property
+    def start(self) -> int:
+        return self.end - len(self.records)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def enabled(self, level: int) -> bool:
+        return level >= self.level
+
+    def add(self, time: float, level: int, caller: str, message: str, args: tuple = ()) -> bool:
+        """Keep a record. Safe to call from any thread.
+
+        Returns:
+            bool: False if the level is filtered out"""
+
+        if level < self.level:
+            return False
+
+        with self._lock:
+            self.records.append(LogRecord(time, level, caller, message, args))
+            self.end += 1
+        return True
+
+    def window(self, first: int, count: int) -> list[LogRecord]:
+        """Records `first` to `first + count` (by number) that are still kept"""
+
+        with self._lock:
+            start = self.end - len(self.records)
+            last = min(first + count, self.end)
+            first = max(first, start)
+            if last <= first:
+                return []
+            # walk in from whichever end of the deque is nearer
+            if first - start <= self.end - last:
+                return list(islice(self.records, first - start, last - start))
+
+            records = list(islice(reversed(self.records), self.end - last, self.end - first))
+            records.reverse()
+            return records
+
+    def clear(self) -> None:
+        with self._lock:
+            self.records.clear()
+
+    def export(self, path: str, max_bytes: int = 1 << 20, backups: int = 3) -> None:
+        """Also write the records to a file, rotated when it grows over `max_bytes`"""
+
+        self.exporter = LogExporter(path, max_bytes, backups, self.end) if path else None
+
+    def flush(self) -> None:
+        """Write the records logged since the last flush to the export file"""
+
+        if not self.exporter:
+            return
+
+        records = self.window(self.exporter.next, self.end - self.exporter.next)
+        self.exporter.next = self.end
+        if records:
+            self.exporter.write(records)
+
+
+class LogExporter:
+    """Writes log records to a file, keeping `backups` rotated copies
+
+    When the file exceeds `max_bytes` it's renamed to `<path>.1` (the previous
+    `.1` to `.2` and so on) and a new file is started."""
+
+    def __init__(self, path: str, max_bytes: int, backups: int, next: int = 0) -> None:
+        self.path = path
+        self.max_bytes = max_bytes
+        self.backups = backups
+        # number of the next record to write
+        self.next = next
+
+    def write(self, records: list[LogRecord]) -> None:
+        data = "".join(record.format() + "\n" for record in records)
+        try:
+            if self.max_bytes and os.path.exists(self.path):
+                if os.path.getsize(self.path) + len(data) > self.max_bytes:
+                    self.rotate()
+
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(data)
+        except OSError as e:
+            print(f"Log export failed: {e}", file=sys.stderr)
+
+    def rotate(self) -> None:
+        if self.backups <= 0:
+            os.remove(self.path)
+            return
+
+        for i in range(self.backups - 1, 0, -1):
+            src = f"{self.path}.{i}"
+            if os.path.exists(src):
+                os.replace(src, f"{self.path}.{i + 1}")
+        os.replace(self.path, f"{self.path}.1")
+
+
+def caller_name(depth: int) -> str:
+    """Class name of the caller `depth` frames up, or the function name outside of classes
+
+    Unlike `caller_class_name`, this doesn't build the whole stack."""
+
+    try:
+        frame = sys._getframe(depth + 1)
+    except ValueError:
+        return ""
+
+    caller = frame.f_locals.get("self")
+    if caller is not None:
+        return caller.__class__.__name__
+    return frame.f_code.co_name
@@ -4,6 +4,7 @@ import tkinter as tk
 from tkinter import ttk
 import typing
 
+from ..fuzzy import fuzzy_match
 from ..ui import Text
 
 if typing.TYPE_CHECKING:
@@ -11,22 +12,24 @@ if typing.TYPE_CHECKING:
 
 
 class PaletteItem(Text):
-    """Palette Item - represents an action that can be performed by the user."""
+    """Palette Item - represents an action that can be performed by the user.
+
+    Items are pooled by the palette and reused for different actions with `set_data`."""
 
     def __init__(
         self,
         master: tk.Frame | ttk.Frame,
         palette: Palette,
-        text: str,
-        command: str,
+        text: str = "",
+        command: str = None,
         description="",
         *args,
         **kwargs,
     ) -> None:
         super().__init__(master, *args, **kwargs)
         self.palette = palette
-        self.text = text
-        self.description = description
+        self.text = ""
+        self.description = ""
         self.command = command
 
         self.config(
@@ -45,16 +48,35 @@ class PaletteItem(Text):
         self.tag_config("term", font=self.base.settings.uifont_bold)
         self.tag_config("description", font=self.base.settings.font)
 
-        self.insert(tk.END, text)
-        if description:
-            self.insert(tk.END, f"   {description}", "description")
-        self.config(state=tk.DISABLED)
+        self.set_data(text, command, description)
 
         self.bind("<Button-1>", self.on_click)
 
         self.selected = False
         self.hovered = False
 
+    def set_data(self, text: str, command, description="", *_) -> None:
+        """Show an action in this item
+
+        Args:
+            text (str): The command text
+            command (Callable): Called with the search term when the item is chosen
+            description (str, optional): Shown after the text. Defaults to ""."""
+
+        self.command = command
+        if text == self.text and description == self.description:
+            return
+
+        self.text = text
+        self.description = description
+
+        self.config(state=tk.NORMAL)
+        self.delete("1.0", tk.END)
+        self.insert(tk.END, text)
+        if description:
+            self.insert(tk.END, f"   {description}", "description")
+        self.config(state=tk.DISABLED)
+
     def on_click(self, *args) -> None:
         term = self.palette.searchbar.term
         self.palette.hide()
@@ -67,10 +89,16 @@ class PaletteItem(Text):
             self.deselect()
 
     def mark_term(self, term: str) -> None:
-        start_pos = self.text.lower().find(term.lower())
-        end_pos = start_pos + len(term)
+        """Mark the characters of the text matching the search term"""
+
         self.tag_remove("term", 1.0, tk.END)
-        self.tag_add("term", f"1.{start_pos}", f"1.{end_pos}")
+        term = term.lower()
+        match = fuzzy_match(term, self.text) or fuzzy_match("".join(term.split()), self.text)
+        if not match:
+            return
+
+        for pos in match[1]:
+            self.tag_add("term", f"1.{pos}")
 
     def select(self) -> None:
         self.selected = True
@@ -55,11 +55,17 @@ class Palette(Toplevel):
 
         self.row = 1
         self.selected = 0
+        self.offset = 0
+
+        # only the visible items get a widget, widgets are pooled and reused for
+        # whatever is scrolled into view
+        self.pool_size = 20
+        self.item_pool: list[PaletteItem] = []
+        self.shown_items: list[PaletteItem] = []
 
-        self.shown_items = []
         self.actionsets = []
         self.active_set = None
-        self.active_items = None
+        self.active_items = []
 
         self.searchbar = SearchBar(self)
         self.searchbar.grid(row=0, sticky=tk.EW, padx=5, pady=(5, 2))
@@ -73,7 +79,7 @@ class Palette(Toplevel):
         self.canvas.grid(row=0, column=0, sticky=tk.NSEW)
 
         self.scrollbar = Scrollbar(
-            self.items_container, orient=tk.VERTICAL, command=self.canvas.yview
+            self.items_container, orient=tk.VERTICAL, command=self.on_scrollbar
         )
         self.scrollbar.grid(row=0, column=1, sticky=tk.NS)
         self.canvas.configure(yscrollcommand=self.scrollbar.set)
@@ -83,12 +89,7 @@ class Palette(Toplevel):
             (0, 0), window=self.items_frame, anchor=tk.NW
         )
 
-        self.items_frame.bind(
-            "<Configure>",
-            lambda e: self.canvas.configure(scrollregion=self.canvas.bbox("all")))
-        self.canvas.bind(
-            "<Configure>",
-            lambda e: self.canvas.itemconfig(self.items_window, width=e.width))
+        self.canvas.bind("<Configure>", self.on_canvas_configure)
 
         self.configure_bindings()
 
@@ -109,12 +110,6 @@ class Palette(Toplevel):
 
         self.register_actionset(lambda: self.help_actionset)
 
-    def add_item(self, text: str, command, *args, **kwargs) -> PaletteItem:
-        new_item = PaletteItem(self.items_frame, self, text, command, *args, **kwargs)
-        new_item.pack(fill=tk.X)
-        self.shown_items.append(new_item)
-        return new_item
-
     def configure_bindings(self) -> None:
         self.bind("<FocusOut>", self.hide)
         self.bind("<Escape>", self.hide)
@@ -124,9 +119,21 @@ class Palette(Toplevel):
         if not self.active_items:
             return "break"
 
-        self.canvas.yview_scroll(int(-1 * (event.delta / 120)), "units")
+        self.scroll_to(self.offset + int(-1 * (event.delta / 120)))
         return "break"
 
+    def on_scrollbar(self, action: str, amount: str, unit: str = None) -> None:
+        if action == "moveto":
+            self.scroll_to(round(float(amount) * len(self.active_items)))
+        elif unit == "pages":
+            self.scroll_to(self.offset + int(amount) * self.visible_rows())
+        else:
+            self.scroll_to(self.offset + int(amount))
+
+    def on_canvas_configure(self, event) -> None:
+        self.canvas.itemconfig(self.items_window, width=event.width)
+        self.render()
+
     def pick_actionset(self, actionset: ActionSet) -> None:
         self.active_set = actionset
 
@@ -134,8 +141,8 @@ class Palette(Toplevel):
         self.active_set = self.base.explorer.get_actionset(term)
 
     def choose(self, *_) -> None:
-        if item := self.shown_items[self.selected]:
-            picked_command = item.command
+        if self.selected < len(self.active_items):
+            picked_command = self.active_items[self.selected][1]
             term = self.searchbar.term
 
             self.hide()
@@ -151,50 +158,70 @@ class Palette(Toplevel):
 
     def hide_all_items(self) -> None:
         for i in self.shown_items:
-            i.destroy()
+            i.pack_forget()
         self.shown_items = []
-        self.canvas.yview_moveto(0)
+        self.active_items = []
+        self.offset = 0
 
     def reset_selection(self) -> None:
         self.selected = 0
         self.refresh_selected()
 
     def refresh_selected(self) -> None:
-        if not self.shown_items:
-            return
-
-        for i in self.shown_items:
-            i.deselect()
-
-        try:
-            item = self.shown_items[self.selected]
-            item.select()
-            self.after(10, self.ensure_visible, item)
-        except IndexError as e:
-            self.base.logger.error(f"Item '{self.selected}' doesnt exist: {e}")
+        """Scroll the selected item into view and mark it"""
 
-    def ensure_visible(self, item):
-        if not item.winfo_exists():
+        if not self.active_items:
             return
 
-        try:
-            self.update_idletasks()
-            item_y = item.winfo_y()
-            item_h = item.winfo_height()
-
-            cw_h = self.canvas.winfo_height()
-            cv_y = self.canvas.yview()[0] * self.items_frame.winfo_height()
-
-            total_h = self.items_frame.winfo_reqheight()
-            if total_h == 0:
-                return
-
-            if item_y < cv_y:
-                self.canvas.yview_moveto(item_y / total_h)
-            elif item_y + item_h > cv_y + cw_h:
-                self.canvas.yview_moveto((item_y + item_h - cw_h) / total_h)
-        except tk.TclError:
-            pass
+        rows = self.visible_rows()
+        if self.selected < self.offset:
+            self.offset = self.selected
+        elif self.selected >= self.offset + rows:
+            self.offset = self.selected - rows + 1
+        self.render()
+
+    def visible_rows(self) -> int:
+        """Number of items that fit in the palette"""
+
+        height = self.canvas.winfo_height()
+        if not self.item_pool or height <= 1:
+            return self.pool_size
+
+        return max(1, min(self.pool_size, height // self.item_pool[0].winfo_reqheight()))
+
+    def scroll_to(self, offset: int) -> None:
+        rows = self.visible_rows()
+        self.offset = max(0, min(offset, len(self.active_items) - rows))
+        self.render()
+
+    def render(self) -> None:
+        """Show the items from `offset` on in the pooled item widgets"""
+
+        items = self.active_items[self.offset : self.offset + self.visible_rows()]
+        while len(self.item_pool) < len(items):
+            self.item_pool.append(PaletteItem(self.items_frame, self))
+
+        term = self.searchbar.term
+        for index, data in enumerate(items):
+            item = self.item_pool[index]
+            item.set_data(*data)
+            item.mark_term(term)
+            if self.offset + index == self.selected:
+                item.select()
+            else:
+                item.deselect()
+            if index >= len(self.shown_items):
+                item.pack(fill=tk.X)
+
+        for item in self.shown_items[len(items) :]:
+            item.pack_forget()
+        self.shown_items = self.item_pool[: len(items)]
+
+        if self.active_items:
+            total = len(self.active_items)
+            self.scrollbar.set(self.offset / total, (self.offset + len(items)) / total)
+        else:
+            self.scrollbar.set(0, 1)
 
     def reset(self) -> None:
         self.searchbar.clear()
@@ -205,25 +232,21 @@ class Palette(Toplevel):
         return "break"
 
     def show_no_results(self) -> None:
-        self.hide_all_items()
-        self.reset_selection()
-        self.add_item("No results found", lambda _: ...)
+        self.show_items([("No results found", lambda _: ...)])
 
     def select(self, delta: int) -> None:
-        if not self.shown_items:
+        if not self.active_items:
             return "break"
 
         self.selected += delta
-        self.selected = min(max(0, self.selected), len(self.shown_items) - 1)
+        self.selected = min(max(0, self.selected), len(self.active_items) - 1)
         self.refresh_selected()
 
-    def show_items(self, items: list[PaletteItem]) -> None:
-        self.hide_all_items()
+    def show_items(self, items: list) -> None:
         self.active_items = items
-
-        for i in self.active_items:
-            item = self.add_item(*i)
-            item.mark_term(self.searchbar.term)
+        self.offset = 0
+        self.selected = 0
+        self.render()
 
     def show(self, prefix: str = None, default: str = None) -> None:
         self.update_idletasks()
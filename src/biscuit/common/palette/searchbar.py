@@ -5,9 +5,11 @@ import typing
 from itertools import chain
 from tkinter import ttk
 
+from ..fuzzy import fuzzy_match
 from ..ui import Frame
 
 if typing.TYPE_CHECKING:
+    from ..actionset import ActionSet
     from . import Palette
 
 
@@ -19,6 +21,9 @@ class SearchBar(Frame):
         self.master: Palette = master
         self.term = ""
 
+        # keys, term and indices of the last matches, typing on only narrows them down
+        self._last_match = (None, "", [])
+
         self.text_variable = tk.StringVar()
         self.text_variable.trace_add("write", self.filter)
 
@@ -70,24 +75,45 @@ class SearchBar(Frame):
 
         self.term = term
         if not prefix_found:
+            # file search results come filtered and ranked from the file index
             self.master.pick_file_search(term)
+            new = list(self.master.active_set)
+        else:
+            new = list(chain(actionset.get_pinned(term), self.match(actionset, term)))
+        if new:
+            self.master.show_items(new)
+        else:
+            self.master.show_no_results()
 
-        exact, starts, includes = [], [], []
-        temp = term.lower()
-        for i in self.master.active_set:
-            if not i or not i[0]:
-                continue
+    def match(self, actionset: ActionSet, term: str) -> list:
+        """Fuzzy match the items of an actionset, best matches first
 
-            item = i[0].lower()
-            if item == temp:
-                exact.append(i)
-            elif item.startswith(temp):
-                starts.append(i)
-            elif temp in item:
-                includes.append(i)
+        When the term extends the previous term, only the items that matched
+        the previous term are matched again.
 
-        new = list(chain(actionset.get_pinned(term), exact, starts, includes))
-        if any(new):
-            self.master.show_items(new)
+        Args:
+            actionset (ActionSet): The actionset to filter
+            term (str): The search term"""
+
+        keys = actionset.keys()
+        term = term.lower()
+        if not term:
+            return [item for item, key in zip(actionset, keys) if key]
+
+        last_keys, last_term, last_indices = self._last_match
+        if last_keys is keys and term.startswith(last_term):
+            candidates = last_indices
         else:
-            self.master.show_no_results()
+            candidates = range(len(keys))
+
+        matches = []
+        for i in candidates:
+            if not keys[i] or len(keys[i]) < len(term):
+                continue
+            if result := fuzzy_match(term, actionset[i][0], keys[i]):
+                matches.append((-result[0], i))
+
+        matches.sort()
+        indices = [i for _, i in matches]
+        self._last_match = (keys, term, indices)
+        return [actionset[i] for i in indices]
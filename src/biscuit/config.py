@@ -10,7 +10,7 @@ from biscuit.layout.statusbar.statusbar import Statusbar
 from .api import ExtensionsAPI
 from .binder import Binder
 from .commands import Commands
-from .common import GameManager, SysInfo
+from .common import Dispatcher, GameManager, SysInfo
 from .debugger import DebuggerManager
 from .execution import ExecutionManager
 from .extensions import ExtensionManager
@@ -79,6 +79,7 @@ class ConfigManager:
         self.frozen = getattr(sys, "frozen", False) and hasattr(sys, "_MEIPASS")
         self.testing = os.environ.get("ENVIRONMENT") == "test"
 
+        self.dispatcher = Dispatcher(self)
         self.system = SysInfo(self)
         self.settings = Settings(self)
         self.history = HistoryManager(self)
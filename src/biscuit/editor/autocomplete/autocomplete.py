@@ -1,12 +1,11 @@
 from __future__ import annotations
 
-import re
 import tkinter as tk
 import typing
-from itertools import chain
 
 if typing.TYPE_CHECKING:
     from biscuit.editor.text import Text
+    from biscuit.editor.text.wordindex import WordIndex
     from biscuit.language.data import Completion, Completions
 
 from biscuit.common.ui import Toplevel
@@ -179,7 +178,9 @@ class AutoComplete(Toplevel):
 
     def update_completions(self, tab: Text):
         """Update the completions with words generated from the current tab.
-        The words are filtered and prioritized based on exact match, starts with, and includes.
+        The words are looked up in the tab's word index, exact match first, then the
+        words starting with the term by distance to the cursor and frequency, then
+        the nearby words including it.
 
         Args:
             tab (Text): The current tab."""
@@ -193,15 +194,12 @@ class AutoComplete(Toplevel):
             self.hide()
             return
 
-        exact, starts, includes = [], [], []
-        for word in tab.words:
-            if word == term:
-                exact.append(word)
-            elif word.startswith(term):
-                starts.append(word)
-            elif term in word:
-                includes.append(word)
-        new = list(chain(exact, starts, includes))
+        new = tab.wordindex.complete(
+            term,
+            tab.line,
+            exclude=tab.get("insert-1c wordstart", "insert-1c wordend"),
+            others=self.shared_indexes(tab),
+        )
 
         if new:
             self.lsp_mode = False
@@ -210,6 +208,21 @@ class AutoComplete(Toplevel):
         else:
             self.hide()
 
+    def shared_indexes(self, tab: Text) -> list[WordIndex]:
+        """Word indexes of the other open editors in the language of the tab,
+        if words are shared across editors"""
+
+        if not self.base.settings.config.autocomplete_shared_words:
+            return []
+
+        indexes = []
+        for editor in self.base.editorsmanager.active_editors:
+            if editor.content and editor.content.editable:
+                text = editor.content.text
+                if text is not tab and text.language == tab.language:
+                    indexes.append(text.wordindex)
+        return indexes
+
     def select(self, delta):
         """Select the next or previous item.
 
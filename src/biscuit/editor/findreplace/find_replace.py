@@ -3,6 +3,7 @@ from __future__ import annotations
 import re
 import tkinter as tk
 import typing
+from bisect import bisect_left, bisect_right
 
 from biscuit.common.icons import Icons
 from biscuit.common.ui import ButtonsEntry, Frame, IconButton, Toplevel
@@ -14,7 +15,20 @@ from .results import FindResults
 
 
 class FindReplace(Toplevel):
-    """Floating find and replace window"""
+    """Floating find and replace window
+
+    Matches are found in a snapshot of the text and kept sorted by position, so
+    going to the next or previous match is a binary search. Only the matches in
+    view (and `margin` lines around it) are tagged, again when the text scrolls.
+    Replace all builds the replaced text from the snapshot in one pass and applies
+    it as a single edit, undone in one step.
+
+    Edits make the snapshot stale, the matches are found again once the text
+    stopped changing for `refresh_delay` ms, or right away when they are used."""
+
+    # lines above and below the view whose matches are tagged too
+    margin = 50
+    refresh_delay = 150
 
     def __init__(self, base, *args, **kwargs) -> None:
         super().__init__(base, *args, **kwargs)
@@ -29,6 +43,18 @@ class FindReplace(Toplevel):
         self.matches = None
         self.term = tk.StringVar()
 
+        # text the matches were found in, offsets where its lines start, and the
+        # matches sorted by position along with their start offsets
+        self.snapshot = ""
+        self.line_starts: list[int] = [0]
+        self.found: list[re.Match] = []
+        self.positions: list[int] = []
+        # whether the text changed since the snapshot was taken
+        self.stale = False
+        self._refresh = None
+        # text widgets whose scrolling and edits update the matches
+        self.bound: set[str] = set()
+
         self.container = Frame(self)
         self.container.pack(fill=tk.BOTH)
         self.container.grid_columnconfigure(0, weight=1)
@@ -89,6 +115,7 @@ class FindReplace(Toplevel):
         self.text = text
         self.active = True
         self.update_idletasks()
+        self.bind_text(text)
 
         if self.text.tag_ranges(tk.SEL):
             selection = self.text.get(tk.SEL_FIRST, tk.SEL_LAST)
@@ -108,20 +135,68 @@ class FindReplace(Toplevel):
         self.text.tag_remove("foundcurrent", "1.0", "end")
         self.withdraw()
 
+    def bind_text(self, text: Text) -> None:
+        if str(text) in self.bound:
+            return
+
+        text.bind("<<Scroll>>", self.on_scroll, add=True)
+        text.bind("<<Change>>", self.on_change, add=True)
+        self.bound.add(str(text))
+
+    def on_scroll(self, event: tk.Event) -> None:
+        if self.active and self.matches and not self.stale and event.widget is self.text:
+            self.highlight_matches()
+
+    def on_change(self, event: tk.Event) -> None:
+        if not (self.active and self.matchstring and event.widget is self.text):
+            return
+
+        self.stale = True
+        if self._refresh is not None:
+            self.after_cancel(self._refresh)
+        self._refresh = self.after(self.refresh_delay, self.refresh)
+
+    def refresh(self) -> None:
+        """Find the matches again in the edited text"""
+
+        self._refresh = None
+        if self.active and self.stale:
+            self.get_find_input()
+
     @property
     def current(self):
-        if not self.text.count("1.0", self.text.index(tk.INSERT), "chars"):
-            return 0
-        return self.text.count("1.0", self.text.index(tk.INSERT), "chars")[0]
+        """Offset of the cursor in the snapshot"""
+
+        line, column = (int(i) for i in self.text.index(tk.INSERT).split("."))
+        if line > len(self.line_starts):
+            return len(self.snapshot)
+        return self.line_starts[line - 1] + column
+
+    def index(self, offset: int) -> str:
+        """Text index of an offset in the snapshot"""
+
+        line = bisect_right(self.line_starts, offset)
+        return f"{line}.{offset - self.line_starts[line - 1]}"
 
     def highlight_matches(self):
         self.text.tag_remove("found", "1.0", "end")
         self.text.tag_remove("foundcurrent", "1.0", "end")
 
-        for pos, match in self.matches.items():
-            start = match.start()
-            end = match.end()
-            self.text.tag_add("found", f"1.0+{start}c", f"1.0+{end}c")
+        # offsets of the lines in view and the margin around them
+        height = self.text.winfo_height()
+        first = int(self.text.index("@0,0").split(".")[0]) - self.margin
+        last = int(self.text.index(f"@0,{height}").split(".")[0]) + self.margin
+        lines = len(self.line_starts)
+        start = self.line_starts[min(max(first, 1), lines) - 1]
+        end = self.line_starts[last] if last < lines else len(self.snapshot)
+
+        ranges = []
+        for match in self.found[
+            bisect_left(self.positions, start) : bisect_left(self.positions, end)
+        ]:
+            ranges.extend((self.index(match.start()), self.index(match.end())))
+        if ranges:
+            self.text.tag_add("found", *ranges)
 
         if self.is_on_match():
             self.highlight_current()
@@ -134,24 +209,38 @@ class FindReplace(Toplevel):
 
         start = match.start()
         end = match.end()
-        self.text.tag_add("foundcurrent", f"1.0+{start}c", f"1.0+{end}c")
+        self.text.tag_add("foundcurrent", self.index(start), self.index(end))
 
     def get_find_input(self):
+        self.matches = {}
+        self.found = []
+        self.positions = []
+        self.stale = False
+        if self._refresh is not None:
+            self.after_cancel(self._refresh)
+            self._refresh = None
+
         if self.findbox.get() == "":
             self.text.tag_remove("found", "1.0", "end")
             self.text.tag_remove("foundcurrent", "1.0", "end")
             return
 
-        current = self.current
-        self.matches = {}
         self.matchstring = self.findbox.get()
-        self.re_ = re.compile(self.matchstring)
+        self.snapshot = self.text.get("1.0", "end-1c")
+        self.line_starts = [0]
+        self.line_starts.extend(m.end() for m in re.finditer("\n", self.snapshot))
 
-        for match in self.re_.finditer(self.text.get_all_text()):
-            self.matches[match.start()] = match
+        try:
+            self.re_ = re.compile(self.matchstring)
+        except re.error:
+            # incomplete pattern while typing
+            self.re_ = None
+        else:
+            self.found = list(self.re_.finditer(self.snapshot))
+            self.positions = [match.start() for match in self.found]
+            self.matches = dict(zip(self.positions, self.found))
 
         self.highlight_matches()
-        self.text.mark_set("insert", f"1.0 + {current}c")
         self.results_count.show(len(self.matches))
 
     def find(self, *_):
@@ -164,50 +253,43 @@ class FindReplace(Toplevel):
         self.lift()
 
     def next_match(self, *_):
-        if self.findbox.get() != self.matchstring:
+        if self.findbox.get() != self.matchstring or self.stale:
             self.get_find_input()
 
-        matchpos = [i for i in sorted(self.matches.keys()) if i > self.current]
-
-        if len(matchpos) > 0:
-            next_index = f"1.0 + {matchpos[0]}c"
-            self.text.mark_set("insert", next_index)
-            self.text.see(next_index)
-            self.highlight_current()
-        elif len(self.matches) > 0:
-            self.text.mark_set("insert", "1.0")
-
-            if self.is_on_match():
-                self.highlight_current()
-            else:
-                self.next_match()
+        if self.positions:
+            # the first match after the cursor, or the first one from the top
+            i = bisect_right(self.positions, self.current)
+            self.go_to_match(self.positions[i % len(self.positions)])
 
         self.lift()
         self.text.focus()
 
     def prev_match(self, *_):
-        if self.findbox.get() != self.matchstring:
+        if self.findbox.get() != self.matchstring or self.stale:
             self.get_find_input()
-        matchpos = [i for i in sorted(self.matches.keys()) if i < self.current]
-        if len(matchpos) > 0:
-            next_index = f"1.0 + {matchpos[-1]}c"
-            self.text.mark_set("insert", next_index)
-            self.text.see(next_index)
-            self.highlight_current()
-        elif len(self.matches) > 0:
-            self.text.mark_set("insert", "end")
-            self.prev_match()
+        if self.positions:
+            # the last match before the cursor, or the last one from the bottom
+            i = bisect_left(self.positions, self.current) - 1
+            self.go_to_match(self.positions[i])
+
         self.lift()
         self.text.focus()
 
+    def go_to_match(self, offset: int) -> None:
+        index = self.index(offset)
+        self.text.mark_set("insert", index)
+        self.text.see(index)
+        self.highlight_current()
+
     def replace(self, *_):
         self.replacestring = self.replacebox.get()
-        if self.findbox.get() != self.matchstring:
+        if self.findbox.get() != self.matchstring or self.stale:
             self.get_find_input()
         if self.is_on_match():
             match = self.matches[self.current]
-            self.text.delete(f"1.0 + {match.start()}c", f"1.0 + {match.end()}c")
-            self.text.insert(f"1.0 + {self.current}c", self.replacestring)
+            start = self.index(match.start())
+            self.text.delete(start, self.index(match.end()))
+            self.text.insert(start, self.replacestring)
             self.get_find_input()
         self.lift()
         self.text.focus()
@@ -217,11 +299,25 @@ class FindReplace(Toplevel):
 
     def replace_all(self, *_):
         self.get_find_input()
-        nmatches = len(self.matches)
-        current = self.current
-        self.text.mark_set("insert", "1.0")
-        self.replace()
-        for i in range(nmatches):
-            self.next_match()
-            self.replace()
-        self.text.mark_set("insert", f"1.0 + {current}c")
+        if not self.found:
+            return
+
+        # the text from the first match to the end of the last one, replaced
+        self.replacestring = self.replacebox.get()
+        first, last = self.found[0].start(), self.found[-1].end()
+        cursor = current = self.current
+        parts = []
+        end = first
+        for match in self.found:
+            parts.append(self.snapshot[end : match.start()])
+            parts.append(self.replacestring)
+            end = match.end()
+            if end <= current:
+                cursor += len(self.replacestring) - (end - match.start())
+
+        replaced = "".join(parts)
+        if replaced != self.snapshot[first:last]:
+            self.text.replace(self.index(first), self.index(last), replaced)
+
+        self.get_find_input()
+        self.text.mark_set("insert", self.index(cursor))
@@ -0,0 +1,332 @@
+from __future__ import annotations
+
+import re
+import typing
+from bisect import bisect_left
+
+if typing.TYPE_CHECKING:
+    from .text import Text
+
+BRACKET = re.compile(r"[()\[\]{}]")
+# kind of bracket (its opening bracket), and +1 for opening, -1 for closing
+BRACKETS = {
+    "(": ("(", 1),
+    ")": ("(", -1),
+    "[": ("[", 1),
+    "]": ("[", -1),
+    "{": ("{", 1),
+    "}": ("{", -1),
+}
+# highlighting tags of tokens whose brackets don't count
+IGNORED = ("Token.Literal.String", "Token.Comment")
+
+
+class Summary(typing.NamedTuple):
+    """Brackets of a stretch of text, for each kind of bracket"""
+
+    # opening minus closing brackets
+    net: dict[str, int]
+    # lowest running count from the start, and highest from the end
+    low: dict[str, int]
+    high: dict[str, int]
+    # opening minus closing brackets of all kinds
+    depth: int
+
+
+def summarize(brackets: typing.Iterable[tuple[int, str]]) -> Summary:
+    brackets = list(brackets)
+    net = {"(": 0, "[": 0, "{": 0}
+    low = dict(net)
+    high = dict(net)
+    depth = 0
+
+    for _, char in brackets:
+        kind, step = BRACKETS[char]
+        net[kind] += step
+        depth += step
+        if net[kind] < low[kind]:
+            low[kind] = net[kind]
+
+    running = {"(": 0, "[": 0, "{": 0}
+    for _, char in reversed(brackets):
+        kind, step = BRACKETS[char]
+        running[kind] += step
+        if running[kind] > high[kind]:
+            high[kind] = running[kind]
+
+    return Summary(net, low, high, depth)
+
+
+class Chunk:
+    def __init__(self, lines: list[tuple | None]) -> None:
+        # brackets of each line as (column, char), None if the line has to be read
+        self.lines = lines
+        self.summary: Summary | None = None
+
+
+class BracketIndex:
+    """Brackets of a document, for bracket matching and pair completion
+
+    The brackets of each line are kept, leaving out the ones inside strings and
+    comments as told by the highlighter. Lines are grouped in chunks of about
+    `chunk_size` lines, and each chunk remembers how its brackets add up. Edits
+    forget the lines they touch, the way they invalidate highlighting, and the
+    highlighter reports lines whose strings and comments changed. Only those
+    lines are read again, when needed.
+
+    Looking for a matching bracket goes through the lines of the chunk it is in,
+    then skips every chunk that can't hold the match by its summary, so it costs
+    about the same anywhere in a file of any size. The same goes for the depth
+    of a position, the number of brackets open there."""
+
+    chunk_size = 256
+
+    def __init__(self, text: Text) -> None:
+        self.text = text
+        self.chunks: list[Chunk] = []
+        self.lines = 0
+
+    def reset(self) -> None:
+        """Forget every line, they are read again when needed"""
+
+        self.lines = self._line_count()
+        self.chunks = [
+            Chunk([None] * min(self.chunk_size, self.lines - start))
+            for start in range(0, self.lines, self.chunk_size)
+        ]
+
+    def invalidate(self, line: int, removed: int = 0, added: int = 0) -> None:
+        """Forget the brackets of lines touched by an edit
+
+        Lines `line` to `line + removed` are replaced by `line` to `line + added`,
+        with the same arguments as `Highlighter.invalidate`."""
+
+        if not self.chunks:
+            return
+
+        i = min(max(line, 1), self.lines) - 1
+        removed = min(removed, self.lines - 1 - i)
+        c, offset = self._locate(i)
+
+        if removed == added:
+            # the lines stay where they are, only forget them
+            count = removed + 1
+            while count and c < len(self.chunks):
+                chunk = self.chunks[c]
+                n = min(count, len(chunk.lines) - offset)
+                chunk.lines[offset : offset + n] = [None] * n
+                chunk.summary = None
+                count -= n
+                c += 1
+                offset = 0
+            return
+
+        # remove the lines replaced, from the chunk of the first one onwards
+        chunk = self.chunks[c]
+        count = removed + 1
+        n = min(count, len(chunk.lines) - offset)
+        del chunk.lines[offset : offset + n]
+        count -= n
+        while count:
+            following = self.chunks[c + 1]
+            n = min(count, len(following.lines))
+            del following.lines[:n]
+            following.summary = None
+            count -= n
+            if not following.lines:
+                del self.chunks[c + 1]
+
+        chunk.lines[offset:offset] = [None] * (added + 1)
+        chunk.summary = None
+        self.lines += added - removed
+
+        if len(chunk.lines) > 2 * self.chunk_size:
+            self.chunks[c : c + 1] = [
+                Chunk(chunk.lines[start : start + self.chunk_size])
+                for start in range(0, len(chunk.lines), self.chunk_size)
+            ]
+
+    def at(self, line: int, column: int) -> str | None:
+        """The bracket at a position (1-based line), None if there is none or it
+        is inside a string or comment"""
+
+        if not self._sync() or not 1 <= line <= self.lines:
+            return None
+
+        brackets = self._line(line - 1)
+        i = bisect_left(brackets, (column, ""))
+        if i < len(brackets) and brackets[i][0] == column:
+            return brackets[i][1]
+        return None
+
+    def match(self, line: int, column: int) -> tuple[int, int] | None:
+        """Position of the bracket matching the one at a position (1-based line)
+
+        Returns:
+            tuple[int, int] | None: line and column of the matching bracket, None if
+                there is no bracket at the position or it is not matched"""
+
+        if not (char := self.at(line, column)):
+            return None
+
+        kind, step = BRACKETS[char]
+        if step > 0:
+            return self._forward(kind, line - 1, column)
+        return self._backward(kind, line - 1, column)
+
+    def depth(self, line: int, column: int) -> int:
+        """Number of brackets open before a position (1-based line)"""
+
+        if not self._sync():
+            return 0
+
+        i = min(max(line, 1), self.lines) - 1
+        c, offset = self._locate(i)
+        depth = sum(self._summary(chunk).depth for chunk in self.chunks[:c])
+
+        chunk = self.chunks[c]
+        for n in range(offset):
+            depth += sum(BRACKETS[char][1] for _, char in self._line_in(chunk, n))
+        for col, char in self._line_in(chunk, offset):
+            if col >= column:
+                break
+            depth += BRACKETS[char][1]
+        return max(depth, 0)
+
+    def brackets(self, first: int, last: int) -> list[tuple[int, int, str]]:
+        """Brackets of lines `first` to `last` (1-based) as (line, column, char)"""
+
+        if not self._sync():
+            return []
+
+        return [
+            (line, col, char)
+            for line in range(max(first, 1), min(last, self.lines) + 1)
+            for col, char in self._line(line - 1)
+        ]
+
+    def _forward(self, kind: str, i: int, column: int) -> tuple[int, int] | None:
+        c, offset = self._locate(i)
+        depth = 0
+        first = True
+        while c < len(self.chunks):
+            chunk = self.chunks[c]
+            if not first:
+                summary = self._summary(chunk)
+                if depth + summary.low[kind] > 0:
+                    # no line of the chunk closes enough brackets
+                    depth += summary.net[kind]
+                    i += len(chunk.lines)
+                    c += 1
+                    continue
+
+            for n in range(offset, len(chunk.lines)):
+                for col, char in self._line_in(chunk, n):
+                    if first and col < column:
+                        continue
+                    k, step = BRACKETS[char]
+                    if k == kind:
+                        depth += step
+                        if depth == 0:
+                            return i + 1, col
+                first = False
+                i += 1
+            c += 1
+            offset = 0
+        return None
+
+    def _backward(self, kind: str, i: int, column: int) -> tuple[int, int] | None:
+        c, offset = self._locate(i)
+        depth = 0
+        first = True
+        while c >= 0:
+            chunk = self.chunks[c]
+            if not first:
+                offset = len(chunk.lines) - 1
+                summary = self._summary(chunk)
+                if summary.high[kind] < depth:
+                    # no line of the chunk opens enough brackets
+                    depth -= summary.net[kind]
+                    i -= len(chunk.lines)
+                    c -= 1
+                    continue
+
+            for n in range(offset, -1, -1):
+                for col, char in reversed(self._line_in(chunk, n)):
+                    if first and col > column:
+                        continue
+                    k, step = BRACKETS[char]
+                    if k == kind:
+                        depth -= step
+                        if depth == 0:
+                            return i + 1, col
+                first = False
+                i -= 1
+            c -= 1
+        return None
+
+    def _sync(self) -> bool:
+        """Start over if the document changed without telling, False if empty"""
+
+        if self.lines != self._line_count() or not self.chunks:
+            self.reset()
+        return bool(self.chunks)
+
+    def _locate(self, i: int) -> tuple[int, int]:
+        """Chunk of a line (0-based) and the line's offset in it"""
+
+        for c, chunk in enumerate(self.chunks):
+            if i < len(chunk.lines):
+                return c, i
+            i -= len(chunk.lines)
+        last = len(self.chunks) - 1
+        return last, len(self.chunks[last].lines) - 1
+
+    def _line(self, i: int) -> tuple:
+        c, offset = self._locate(i)
+        return self._line_in(self.chunks[c], offset)
+
+    def _line_in(self, chunk: Chunk, offset: int) -> tuple:
+        if (brackets := chunk.lines[offset]) is None:
+            self._read(chunk)
+            brackets = chunk.lines[offset]
+        return brackets
+
+    def _summary(self, chunk: Chunk) -> Summary:
+        if chunk.summary is None:
+            if None in chunk.lines:
+                self._read(chunk)
+            chunk.summary = summarize(
+                bracket for brackets in chunk.lines for bracket in brackets
+            )
+        return chunk.summary
+
+    def _read(self, chunk: Chunk) -> None:
+        """Read the lines of a chunk that are not known, in one go"""
+
+        start = 0
+        for other in self.chunks:
+            if other is chunk:
+                break
+            start += len(other.lines)
+
+        end = start + len(chunk.lines)
+        content = self.text.get(f"{start + 1}.0", f"{end}.end").split("\n")
+        spans = self.text.highlighter.get_spans(start, end)
+
+        for n, line in enumerate(content[: len(chunk.lines)]):
+            if chunk.lines[n] is not None:
+                continue
+            ignored = [
+                (s, e)
+                for s, e, tag in (spans[n] if spans and spans[n] else ())
+                if tag.startswith(IGNORED)
+            ]
+            chunk.lines[n] = tuple(
+                (m.start(), m.group())
+                for m in BRACKET.finditer(line)
+                if not any(s <= m.start() < e for s, e in ignored)
+            )
+
+    def _line_count(self) -> int:
+        return int(self.text.index("end-1c").split(".")[0])
@@ -1,15 +1,43 @@
+from __future__ import annotations
+
 from dataclasses import dataclass
 from typing import List
 
 
 @dataclass
 class Change:
+    """A single edit to the text content
+
+    Positions are `[line, column]` pairs. `start` and `old_end` are resolved before
+    the edit is applied, `new_end` is where the inserted text ends after it."""
+
     start: List[int]
     old_end: List[int]
     new_end: List[int]
     old_text: str
     new_text: str
 
+    @classmethod
+    def make(cls, start: str, old_end: str, old_text: str, new_text: str) -> Change:
+        """Create a change from tkinter text indices resolved before the edit
+
+        Args:
+            start (str): Index where the edit starts
+            old_end (str): Index where the replaced text ends
+            old_text (str): Text removed by the edit
+            new_text (str): Text inserted by the edit"""
+
+        start = [int(i) for i in start.split(".")]
+        old_end = [int(i) for i in old_end.split(".")]
+
+        lines = new_text.count("\n")
+        if lines:
+            new_end = [start[0] + lines, len(new_text) - new_text.rindex("\n") - 1]
+        else:
+            new_end = [start[0], start[1] + len(new_text)]
+
+        return cls(start, old_end, new_end, old_text, new_text)
+
     def update(self, start, old_end, new_end, old_text, new_text):
         self.start = start
         self.old_end = old_end
@@ -17,6 +45,18 @@ class Change:
         self.old_text = old_text
         self.new_text = new_text
 
+    @property
+    def start_index(self) -> str:
+        return f"{self.start[0]}.{self.start[1]}"
+
+    @property
+    def old_end_index(self) -> str:
+        return f"{self.old_end[0]}.{self.old_end[1]}"
+
+    @property
+    def new_end_index(self) -> str:
+        return f"{self.new_end[0]}.{self.new_end[1]}"
+
 
 # @dataclass
 # class Changes:
@@ -11,6 +11,7 @@ from ..editorbase import BaseEditor
 from .linenumbers import LineNumbers
 from .menu import RunMenu
 from .minimap import Minimap
+from .scheduler import DEBOUNCED, FRAME, IMMEDIATE, RefreshScheduler
 from .text import Text
 
 if typing.TYPE_CHECKING:
@@ -71,6 +72,7 @@ class TextEditor(BaseEditor):
             language=self.language,
         )
         self.language = self.text.language
+        self.schedule_refreshes()
 
         if self.exists:
             if load_file:
@@ -149,6 +151,7 @@ class TextEditor(BaseEditor):
         self.scrollbar.grid(row=0, column=3, sticky=tk.NS)
 
         self.text.bind("<<Change>>", self.on_change)
+        self.text.bind("<<Cursor>>", self.on_cursor)
         self.text.bind("<<Scroll>>", self.on_scroll)
 
         # self.on_change()
@@ -230,24 +233,76 @@ class TextEditor(BaseEditor):
         self.run_command_value = command
         self.run_file()
 
-    def on_change(self, *_) -> None:
-        self.linenumbers.redraw()
+    def schedule_refreshes(self) -> None:
+        """What is refreshed after edits and cursor moves, and when"""
+
+        config = self.base.settings.config
+        text = self.text
+        self.refresher = RefreshScheduler(self, config.refresh_frame_ms)
+        add = self.refresher.add
+
+        if not self.minimalist:
+            add("current_word", text.update_current_word, IMMEDIATE)
+            add("current_line", text.highlight_current_line, IMMEDIATE)
+        if not self.standalone:
+            add("statusbar", self.update_statusbar, IMMEDIATE)
+
+        add("highlight", text.highlighter.highlight, FRAME, cursor=False)
+        add("linenumbers", self.linenumbers.redraw, FRAME)
+        add("current_word_matches", text.highlight_current_word, FRAME)
+        if not self.minimalist:
+            add("brackets", text.highlight_current_brackets, FRAME)
+            add("bracket_depths", text.highlight_bracket_depths, FRAME, cursor=False)
+            add("minimap", self.minimap.redraw, FRAME)
+        add("change", lambda: self.event_generate("<<Change>>"), FRAME, cursor=False)
+
+        if not self.minimalist:
+            add(
+                "outline",
+                text.request_outline,
+                DEBOUNCED,
+                cursor=False,
+                delay=config.outline_delay_ms,
+            )
+            add(
+                "indent_guides",
+                text.update_indent_guides,
+                DEBOUNCED,
+                delay=config.indent_guides_delay_ms,
+            )
+            add(
+                "words",
+                text.update_words_list,
+                DEBOUNCED,
+                cursor=False,
+                delay=config.words_delay_ms,
+            )
+
+    def update_statusbar(self) -> None:
         try:
-            if not self.standalone:
-                self.base.update_statusbar()
+            self.base.update_statusbar()
         except ValueError:
             pass
-        self.text.refresh()
-        if not self.minimalist:
-            self.minimap.redraw_cursor()
-        self.event_generate("<<Change>>")
+
+    def on_change(self, *_) -> None:
+        self.refresher.request()
+
+    def on_cursor(self, *_) -> None:
+        self.refresher.request(content=False)
 
     def on_scroll(self, *_) -> None:
+        self.text.highlighter.highlight()
+        self.text.update_indent_guides()
+        self.text.highlight_bracket_depths()
         self.linenumbers.redraw()
         if not self.minimalist:
             self.minimap.redraw()
         self.event_generate("<<Scroll>>")
 
+    def destroy(self) -> None:
+        self.refresher.cancel()
+        super().destroy()
+
     def unsupported_file(self) -> None:
         self.unsupported = True
         self.text.show_unsupported_dialog()
@@ -266,6 +321,8 @@ class TextEditor(BaseEditor):
 
     def save(self, path=None) -> None:
         if self.editable:
+            # views waiting on a debounce are brought up to date with what is saved
+            self.refresher.flush()
             self.recalculate_content_hash()
             self.text.save_file(path)
 
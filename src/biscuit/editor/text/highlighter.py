@@ -1,12 +1,14 @@
 from __future__ import annotations
 
 import os
+import time
 import tkinter as tk
 import typing
 
-from pygments import lex
+from pygments.lexer import RegexLexer
 from pygments.lexers import get_lexer_by_name, get_lexer_for_filename
 from pygments.style import Style
+from pygments.token import Error, Token, Whitespace, _TokenType
 
 if typing.TYPE_CHECKING:
     from biscuit import App
@@ -23,8 +25,6 @@ class BiscuitStyle(Style):
         self.background_color = None
 
 
-from pygments.token import Token
-
 class Highlighter:
     """Syntax Highlighter
     
@@ -33,6 +33,12 @@ class Highlighter:
     If the file extension is not recognized, it will default to plain text.
     
     Supported languages and text formats: https://pygments.org/docs/lexers/
+
+    Highlighting is incremental: the lexer state at the start of each line is cached,
+    so after an edit only the lines from the edit up to the point where the state
+    converges again are re-lexed and retagged. Lexers that don't expose their state
+    start over from the top, but still only lex up to the visible area right away
+    and leave the rest to idle slices.
     """
 
     def __init__(self, text: Text, language: str = None, *args, **kwargs) -> None:
@@ -49,6 +55,23 @@ class Highlighter:
         self.base: App = text.base
         self.language = language
 
+        # time spent per idle slice on the lines below the viewport
+        self.slice_budget = 0.01
+
+        self._states: list[tuple | None] = []
+        self._spans: list[tuple | None] = []
+        self._stale_tags: set[str] = set()
+        self._tag_cache: dict[_TokenType, str | None] = {}
+        self._checkpoints = False
+        self._job = None
+        # lexing paused between idle slices, as the line it resumes at and the
+        # lines still to come
+        self._stream: tuple[int, typing.Iterator] | None = None
+
+        # called with the first and last lines (1-based) of every run of lines
+        # whose highlighting changed
+        self.retagged: list[typing.Callable[[int, int], typing.Any]] = []
+
         if language:
             try:
                 self.lexer = get_lexer_by_name(language)
@@ -148,6 +171,7 @@ class Highlighter:
             )
             self.text.language = self.lexer.name
             self.text.language_alias = self.lexer.aliases[0]
+            self.reset()
             self.highlight()
         except:
             self.lexer = None
@@ -173,7 +197,7 @@ class Highlighter:
 
         self.text.language = self.lexer.name
         self.text.language_alias = self.lexer.aliases[0]
-        self.tag_colors = None
+        self.reset()
         self.text.master.on_change()
         self.base.statusbar.on_open_file(self.text)
 
@@ -197,37 +221,353 @@ class Highlighter:
         for token, _ in self.tag_colors.items():
             self.text.tag_remove(str(token), "1.0", tk.END)
 
+        self._spans = []
+
+    def reset(self) -> None:
+        """Drop every cached line so that the next pass re-lexes the whole document"""
+
+        lines = self._line_count()
+        self._states = [None] * lines
+        self._states[0] = ("root",)
+        self._spans = [None] * lines
+        self._stale_tags = {str(token) for token in self.tag_colors}
+        self._tag_cache = {}
+        self._checkpoints = (
+            type(self.lexer).get_tokens_unprocessed
+            is RegexLexer.get_tokens_unprocessed
+        )
+        self._stream = None
+
+    def invalidate(self, line: int, removed: int = 0, added: int = 0) -> None:
+        """Mark lines touched by an edit for re-lexing
+
+        Called by the text widget for every insert, delete and replace.
+        Lines `line` to `line + removed` are replaced by `line` to `line + added`.
+
+        Args:
+            line (int): First line touched by the edit (1-based)
+            removed (int, optional): Number of line breaks removed. Defaults to 0.
+            added (int, optional): Number of line breaks inserted. Defaults to 0."""
+
+        # the paused lexing read the text before the edit
+        self._stream = None
+
+        if not self._spans:
+            return
+
+        i = min(max(line, 1), len(self._spans)) - 1
+        removed = min(removed, len(self._spans) - 1 - i)
+
+        for spans in self._spans[i : i + removed + 1]:
+            if spans:
+                self._stale_tags.update(tag for _, _, tag in spans)
+
+        self._spans[i : i + removed + 1] = [None] * (added + 1)
+        self._states[i + 1 : i + removed + 1] = [None] * added
+
     def highlight(self) -> None:
         """Highlight the text content
 
-        This method highlights the text content based on the lexer provided.
-
-        TODO: As of now, it highlights the entire text content.
-        It needs to be optimized to highlight only the visible area."""
+        Lines invalidated by edits are re-lexed starting from the closest line with
+        a known lexer state, and lexing stops as soon as the state converges with
+        the cached one again. Everything up to the end of the visible area is tagged
+        right away, the rest of the document is done in idle slices."""
 
         if not self.lexer or not self.tag_colors:
             return
 
-        for token, _ in self.tag_colors.items():
-            self.text.tag_remove(str(token), "1.0", tk.END)
+        if len(self._spans) != self._line_count():
+            self.reset()
 
-        text = self.text.get_all_text()
-
-        # NOTE:  Highlighting only visible area
-        # total_lines = int(self.text.index('end-1c').split('.')[0])
-        # start_line = int(self.text.yview()[0] * total_lines)
-        # first_visible_index = f"{start_line}.0"
-        # last_visible_index =f"{self.text.winfo_height()}.end"
-        # for token, _ in self.tag_colors.items():
-        #     self.text.tag_remove(str(token), first_visible_index, last_visible_index)
-        # text = self.text.get(first_visible_index, last_visible_index)
-
-        self.text.mark_set("range_start", "1.0")
-        for token, content in lex(text, self.lexer):
-            self.text.mark_set("range_end", f"range_start + {len(content)}c")
-            self.text.tag_add(str(token), "range_start", "range_end")
-            self.text.mark_set("range_start", "range_end")
-
-            # DEBUG
-            # print(f"{content} is recognized as a <{str(token)}>")
-        # print("==================================")
+        if self._first_dirty() is None:
+            return
+
+        self._run(self._visible_lines()[1])
+        self._schedule()
+
+    def _run(self, until: int, deadline: float = 0) -> None:
+        """Lex and tag invalidated lines until every line up to `until` is done
+        and `deadline` has passed (or nothing is left to do)"""
+
+        lines = len(self._spans)
+        while (dirty := self._first_dirty()) is not None:
+            if dirty > until and time.perf_counter() >= deadline:
+                return
+
+            if self._stream and self._stream[0] == dirty:
+                line, lexed = self._stream
+            else:
+                line = dirty
+                while self._states[line] is None:
+                    line -= 1
+                lexed = self._lex_lines(line, self._states[line])
+            self._stream = None
+
+            changed = []
+            paused = False
+            for spans, state in lexed:
+                if spans != self._spans[line]:
+                    changed.append((line, self._spans[line]))
+                    self._spans[line] = spans
+
+                line += 1
+                if line >= lines:
+                    break
+                if (
+                    line > dirty
+                    and state is not None
+                    and state == self._states[line]
+                    and self._spans[line] is not None
+                ):
+                    # converged, the lines that follow are still valid
+                    break
+                self._states[line] = state
+
+                if line > until and time.perf_counter() >= deadline:
+                    # pause, the next slice picks up the lexing where it stopped
+                    if self._spans[line]:
+                        self._stale_tags.update(tag for _, _, tag in self._spans[line])
+                    self._spans[line] = None
+                    self._stream = (line, lexed)
+                    paused = True
+                    break
+
+            self._retag(changed)
+            if paused:
+                return
+
+        self._stale_tags.clear()
+
+    def _lex_lines(
+        self, line: int, stack: tuple
+    ) -> typing.Iterator[tuple[tuple, tuple | None]]:
+        """Lex lines starting at `line` (0-based) with the given lexer state
+
+        Yields the spans of each line along with the lexer state at the start of the
+        following line (`None` if that line starts in the middle of a token).
+
+        The lexer is given the rest of the document, some rules match across many
+        lines (like Python docstrings) and would be lexed differently if the text
+        was cut short. Tokens are produced lazily, so only the lines consumed are
+        lexed. Lexers that don't expose their state always start from the top of
+        the document."""
+
+        text = self.text.get(f"{line + 1}.0", tk.END)
+        if self._checkpoints:
+            tokens = lex_with_checkpoints(self.lexer, text, stack)
+        else:
+            tokens = self.lexer.get_tokens_unprocessed(text)
+
+        yield from self._split_lines(text, tokens)
+
+    def _split_lines(
+        self, text: str, tokens: typing.Iterable
+    ) -> typing.Iterator[tuple[tuple, tuple | None]]:
+        """Split a token stream into lines of (start column, end column, tag) spans"""
+
+        tag_for = self._tag_for
+        closed = []
+        spans = []
+        line_start = cursor = 0
+
+        def add(pos: int, value: str, tag: str | None) -> None:
+            nonlocal spans, line_start
+
+            if "\n" in value:
+                for part in value.split("\n")[:-1]:
+                    if part and tag:
+                        spans.append((pos - line_start, pos - line_start + len(part), tag))
+                    pos += len(part) + 1
+                    closed.append(tuple(spans))
+                    spans = []
+                    line_start = pos
+                value = value[value.rindex("\n") + 1 :]
+
+            if not value or not tag:
+                return
+            start = pos - line_start
+            if spans and spans[-1][1] == start and spans[-1][2] == tag:
+                spans[-1] = (spans[-1][0], start + len(value), tag)
+            else:
+                spans.append((start, start + len(value), tag))
+
+        for pos, ttype, value in tokens:
+            if ttype is None:
+                # lexer state checkpoint at the start of the current line
+                if closed:
+                    for line_spans in closed[:-1]:
+                        yield line_spans, None
+                    yield closed[-1], value
+                    closed = []
+                continue
+
+            # line breaks not followed by a checkpoint are inside a match
+            for line_spans in closed:
+                yield line_spans, None
+            closed = []
+
+            if pos > cursor:
+                add(cursor, text[cursor:pos], None)
+            add(pos, value, tag_for(ttype))
+            cursor = pos + len(value)
+
+        if cursor < len(text):
+            add(cursor, text[cursor:], None)
+        for line_spans in closed:
+            yield line_spans, None
+
+    def _retag(self, changed: list[tuple[int, tuple | None]]) -> None:
+        """Replace the highlighting of changed lines, one contiguous run at a time"""
+
+        runs = []
+        for line, old in changed:
+            if runs and runs[-1][-1][0] == line - 1:
+                runs[-1].append((line, old))
+            else:
+                runs.append([(line, old)])
+
+        for run in runs:
+            first, last = run[0][0], run[-1][0]
+            start, end = f"{first + 1}.0", f"{last + 2}.0"
+
+            old_tags = set(self._stale_tags)
+            for _, old in run:
+                if old:
+                    old_tags.update(tag for _, _, tag in old)
+            for tag in old_tags:
+                self.text.tag_remove(tag, start, end)
+
+            ranges = {}
+            for line in range(first, last + 1):
+                for s, e, tag in self._spans[line]:
+                    ranges.setdefault(tag, []).extend(
+                        (f"{line + 1}.{s}", f"{line + 1}.{e}")
+                    )
+            for tag, indices in ranges.items():
+                self.text.tag_add(tag, *indices)
+
+            for callback in self.retagged:
+                callback(first + 1, last + 1)
+
+    def get_spans(self, start: int, end: int) -> list[tuple | None] | None:
+        """Highlighting of lines `start` to `end` (0-based, end exclusive)
+
+        Returns:
+            list[tuple | None] | None: `(start column, end column, tag)` spans of each
+                line, None for lines that are not highlighted yet. None if there is
+                no highlighting at all."""
+
+        if not self.lexer or len(self._spans) != self._line_count():
+            return None
+        return self._spans[start:end]
+
+    def _schedule(self) -> None:
+        if self._job is None and self._first_dirty() is not None:
+            self._job = self.text.after_idle(self._idle)
+
+    def _idle(self) -> None:
+        self._job = None
+        if not self.lexer:
+            return
+
+        try:
+            if len(self._spans) != self._line_count():
+                self.reset()
+            self._run(-1, time.perf_counter() + self.slice_budget)
+        except tk.TclError:
+            # editor was closed
+            return
+        self._schedule()
+
+    def _first_dirty(self) -> int | None:
+        try:
+            return self._spans.index(None)
+        except ValueError:
+            return None
+
+    def _tag_for(self, ttype: _TokenType) -> str | None:
+        """Closest configured tag for a token type, `None` if it isn't highlighted"""
+
+        try:
+            return self._tag_cache[ttype]
+        except KeyError:
+            pass
+
+        token = ttype
+        while token is not None and token not in self.tag_colors:
+            token = token.parent
+
+        tag = self._tag_cache[ttype] = str(token) if token is not None else None
+        return tag
+
+    def _line_count(self) -> int:
+        return int(self.text.index("end-1c").split(".")[0])
+
+    def _visible_lines(self) -> tuple[int, int]:
+        """First and last visible lines (0-based)"""
+
+        first = int(self.text.index("@0,0").split(".")[0])
+        last = int(self.text.index(f"@0,{self.text.winfo_height()}").split(".")[0])
+        return first - 1, last - 1
+
+
+def lex_with_checkpoints(
+    lexer: RegexLexer, text: str, stack: tuple = ("root",)
+) -> typing.Iterator[tuple[int, _TokenType | None, typing.Any]]:
+    """Tokenize text like `RegexLexer.get_tokens_unprocessed`, additionally yielding
+    `(pos, None, state)` wherever a line starts on a token boundary.
+
+    `RegexLexer` keeps its state stack private, so this mirrors its main loop to
+    expose the stack at line starts. Lexing can later resume from any of these
+    checkpoints with `stack=state`."""
+
+    pos = 0
+    tokendefs = lexer._tokens
+    statestack = list(stack)
+    statetokens = tokendefs[statestack[-1]]
+    while True:
+        for rexmatch, action, new_state in statetokens:
+            m = rexmatch(text, pos)
+            if m:
+                if action is not None:
+                    if type(action) is _TokenType:
+                        yield pos, action, m.group()
+                    else:
+                        yield from action(lexer, m)
+                pos = m.end()
+                if new_state is not None:
+                    if isinstance(new_state, tuple):
+                        for state in new_state:
+                            if state == "#pop":
+                                if len(statestack) > 1:
+                                    statestack.pop()
+                            elif state == "#push":
+                                statestack.append(statestack[-1])
+                            else:
+                                statestack.append(state)
+                    elif isinstance(new_state, int):
+                        if abs(new_state) >= len(statestack):
+                            del statestack[1:]
+                        else:
+                            del statestack[new_state:]
+                    elif new_state == "#push":
+                        statestack.append(statestack[-1])
+                    statetokens = tokendefs[statestack[-1]]
+
+                if pos and text[pos - 1] == "\n":
+                    yield pos, None, tuple(statestack)
+                break
+        else:
+            try:
+                if text[pos] == "\n":
+                    # at EOL, reset state to "root"
+                    statestack = ["root"]
+                    statetokens = tokendefs["root"]
+                    yield pos, Whitespace, "\n"
+                    pos += 1
+                    yield pos, None, ("root",)
+                    continue
+                yield pos, Error, text[pos]
+                pos += 1
+            except IndexError:
+                break
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import tkinter as tk
+import typing
+
+if typing.TYPE_CHECKING:
+    from .text import Text
+
+
+class IndentGuides:
+    """Indent guides of the lines in view
+
+    The indent level of every line tagged is remembered, and only lines in view
+    (plus a `margin` of lines above and below) whose level is not known are
+    tagged, one contiguous run of lines at a time. Edits forget the levels of the
+    lines they touch, the way they invalidate highlighting, so after typing only
+    the edited lines are tagged again. Lines out of view keep their tags until
+    they scroll into view, by then the forgotten ones are redone.
+
+    The guide of the block around the cursor is also tagged `current_indent_guide`.
+    When the cursor moves to another block, only the old and the new block are
+    re-tagged."""
+
+    margin = 50
+
+    def __init__(self, text: Text) -> None:
+        self.text = text
+
+        # indent level of each line (0-based), -1 for empty lines, which don't
+        # end a block, None if its guides have to be redone
+        self._levels: list[int | None] = []
+        self._tab_spaces = text.tab_spaces
+
+    def reset(self) -> None:
+        """Remove every guide, they are redone for the lines in view on update"""
+
+        self.text.tag_remove("indent_guide", "1.0", tk.END)
+        self.text.tag_remove("current_indent_guide", "1.0", tk.END)
+        self._levels = [None] * self._line_count()
+        self._tab_spaces = self.text.tab_spaces
+
+    def invalidate(self, line: int, removed: int = 0, added: int = 0) -> None:
+        """Forget the levels of lines touched by an edit
+
+        Lines `line` to `line + removed` are replaced by `line` to `line + added`,
+        with the same arguments as `Highlighter.invalidate`."""
+
+        if not self._levels:
+            return
+
+        i = min(max(line, 1), len(self._levels)) - 1
+        removed = min(removed, len(self._levels) - 1 - i)
+        self._levels[i : i + removed + 1] = [None] * (added + 1)
+
+    def update(self) -> None:
+        """Tag the lines in view whose guides are not known and the current block"""
+
+        if (
+            len(self._levels) != self._line_count()
+            or self._tab_spaces != self.text.tab_spaces
+        ):
+            self.reset()
+
+        first, last = self._window()
+        self._tag_lines(first, last)
+        self._tag_current(first, last)
+
+    def _tag_lines(self, first: int, last: int) -> None:
+        """Redo the guides of the lines `first` to `last` (0-based) not known"""
+
+        levels = self._levels
+        runs = []
+        for line in range(first, last + 1):
+            if levels[line] is None:
+                if runs and runs[-1][1] == line - 1:
+                    runs[-1][1] = line
+                else:
+                    runs.append([line, line])
+
+        if not runs:
+            return
+
+        text = self.text
+        tab = text.tab_spaces
+        ranges = []
+        for start, end in runs:
+            lines = text.get(f"{start + 1}.0", f"{end + 1}.end").split("\n")
+            text.tag_remove("indent_guide", f"{start + 1}.0", f"{end + 2}.0")
+            text.tag_remove("current_indent_guide", f"{start + 1}.0", f"{end + 2}.0")
+
+            for line, content in enumerate(lines, start):
+                level = text.calculate_indent_level(content) if content else -1
+                levels[line] = level
+                for column in range(0, level * tab, tab):
+                    ranges.extend(
+                        (f"{line + 1}.{column}", f"{line + 1}.{column + 1}")
+                    )
+
+        if ranges:
+            text.tag_add("indent_guide", *ranges)
+
+    def _tag_current(self, first: int, last: int) -> None:
+        """Tag the guide of the block around the cursor in lines `first` to `last`"""
+
+        text = self.text
+        levels = self._levels
+        cursor = int(text.index(tk.INSERT).split(".")[0]) - 1
+        if not first <= cursor <= last:
+            return
+
+        around = levels[max(cursor - 1, first) : min(cursor + 1, last) + 1]
+        level = text.current_indent_level = max(around) - 1
+        if level < 0:
+            self._set_current(None)
+            return
+
+        # the lines indented deeper than the current guide next to the cursor
+        # line, or the cursor line itself if it is one of them
+        seeds = [cursor] if levels[cursor] > level else []
+        if not seeds:
+            seeds = [
+                line
+                for line in (cursor - 1, cursor + 1)
+                if first <= line <= last and levels[line] > level
+            ]
+
+        block = set()
+        for seed in seeds:
+            line = seed
+            while line >= first and (levels[line] > level or levels[line] < 0):
+                if levels[line] > level:
+                    block.add(line)
+                line -= 1
+            line = seed + 1
+            while line <= last and (levels[line] > level or levels[line] < 0):
+                if levels[line] > level:
+                    block.add(line)
+                line += 1
+
+        column = level * text.tab_spaces
+        self._set_current(
+            [
+                index
+                for line in sorted(block)
+                for index in (f"{line + 1}.{column}", f"{line + 1}.{column + 1}")
+            ]
+        )
+
+    def _set_current(self, ranges: list[str] | None) -> None:
+        """Move the current guide to `ranges`, None to drop it
+
+        The current guide is laid over the plain one, so only its own tag moves."""
+
+        text = self.text
+        old = [str(index) for index in text.tag_ranges("current_indent_guide")]
+        if old == (ranges or []):
+            return
+
+        if old:
+            text.tag_remove("current_indent_guide", old[0], old[-1])
+        if ranges:
+            text.tag_add("current_indent_guide", *ranges)
+
+    def _line_count(self) -> int:
+        return int(self.text.index("end-1c").split(".")[0])
+
+    def _window(self) -> tuple[int, int]:
+        """Lines in view and the margin around them (0-based)"""
+
+        first = int(self.text.index("@0,0").split(".")[0]) - 1
+        height = self.text.winfo_height()
+        last = int(self.text.index(f"@0,{height}").split(".")[0]) - 1
+        return (
+            max(first - self.margin, 0),
+            min(last + self.margin, len(self._levels) - 1),
+        )
@@ -32,8 +32,20 @@ class LineNumbers(Canvas):
         self.font = self.base.settings.font
         self.breakpoints: set[int] = set()
 
+        # pooled canvas items per screen row: [oval, text, line, y, label, breakpoint, hidden]
+        self.rows: list[list] = []
+        # canvas item -> screen row
+        self.items: dict[int, int] = {}
+        self.state = None
+        self.hovered = None
+
+        self.bind("<Button-1>", self.on_click)
+        self.bind("<Motion>", self.on_motion)
+        self.bind("<Leave>", self.on_leave)
+
     def attach(self, text):
         self.text = text
+        self.state = None
 
     def mark_line(self, line):
         dline = self.text.dlineinfo(line)
@@ -54,7 +66,7 @@ class LineNumbers(Canvas):
             padx=0,
             relief=tk.FLAT,
         )
-        self.create_window(70, y - 2, anchor=tk.NE, window=btn)
+        self.create_window(70, y - 2, anchor=tk.NE, window=btn, tags="marker")
 
     def set_bar_width(self, width):
         self.configure(width=width)
@@ -67,94 +79,138 @@ class LineNumbers(Canvas):
         self.redraw()
         self.master.update_breakpoints(self.breakpoints)
 
-    def redraw(self, *_):
-        self.delete(tk.ALL)
+    def redraw(self, *_) -> None:
+        """Update the line numbers of the visible lines
+
+        Canvas items are kept in a pool, one oval and one text item per screen row,
+        and only the rows that changed are updated. Nothing is done when the view
+        is the same as last time (same first line and scroll offset, line count
+        and size), which is what most keystrokes and many scroll events amount to.
+        """
 
         if not self.text:
+            self.clear()
             return
 
-        current_line = int(self.text.index(tk.INSERT).split(".")[0])
+        text = self.text
+        first = text.index("@0,0")
+        first_line = int(first.split(".")[0])
+        dline = text.dlineinfo(first)
+        if dline is None:
+            self.clear()
+            return
 
-        i = self.text.index("@0,0")
-        while True:
-            dline = self.text.dlineinfo(i)
-            if dline is None:
+        last_line = int(text.index("end-1c").split(".")[0])
+        current_line = int(text.index(tk.INSERT).split(".")[0])
+        state = (
+            first_line,
+            dline[1],
+            last_line,
+            self.winfo_height(),
+            text.winfo_height(),
+            self.font.metrics("linespace"),
+            current_line if text.relative_line_numbers else None,
+            frozenset(self.breakpoints),
+        )
+        # wrapped lines can change height without changing any of the above
+        if state == self.state and text.cget("wrap") == tk.NONE:
+            return
+        self.state = state
+        self.delete("marker")
+
+        row = 0
+        line = first_line
+        while dline is not None:
+            self.draw_row(row, line, dline[1], current_line)
+            row += 1
+            line += 1
+            if line > last_line:
                 break
+            dline = text.dlineinfo(f"{line}.0")
+
+        self.hide_rows(row)
+
+    def draw_row(self, row: int, line: int, y: int, current_line: int) -> None:
+        """Show a line number on a screen row, reusing the row's canvas items"""
 
-            y = dline[1]
-            linenum = int(float(i))
-            curline = self.text.dlineinfo(tk.INSERT)
-            cur_y = curline[1] if curline else None
-
-            # TODO: optional: skipping comments
-            #             # check if line is commented
-            # if self.text.highlighter and any((tag[1].startswith("Token.Comment") for tag in self.text.dump(i, i + " lineend", tag=True))):
-            # if self.text.get(f"{i} linestart", f"{i} lineend").strip().startswith("#"):
-            #     self.create_text(40, y, anchor=tk.NE, text="|   ", tag=i)
-            #     i = self.text.index(f"{i}+1line")
-            #     continue
-
-            # Render breakpoint
-            has_breakpoint = linenum in self.breakpoints
-            breakpoint_id = self.create_oval(
+        label = line
+        if self.text.relative_line_numbers and line != current_line:
+            label = abs(line - current_line)
+        has_breakpoint = line in self.breakpoints
+
+        if row == len(self.rows):
+            oval = self.create_oval(
                 5,
                 y + 3,
                 15,
                 y + 13,
                 outline="",
+                tags=("breakpoint",) if has_breakpoint else (),
             )
+            number = self.create_text(40, y, anchor=tk.NE, text=label, font=self.font)
+            self.rows.append([oval, number, line, y, label, has_breakpoint, False])
+            self.items[oval] = self.items[number] = row
+        else:
+            oval, number, _, old_y, old_label, had_breakpoint, hidden = self.rows[row]
+            if hidden:
+                self.itemconfigure(oval, state=tk.NORMAL)
+                self.itemconfigure(number, state=tk.NORMAL)
+            if y != old_y:
+                self.coords(oval, 5, y + 3, 15, y + 13)
+                self.coords(number, 40, y)
+            if label != old_label:
+                self.itemconfigure(number, text=label)
+            if has_breakpoint != had_breakpoint:
+                self.itemconfigure(oval, tags=("breakpoint",) if has_breakpoint else ())
+            self.rows[row][2:] = (line, y, label, has_breakpoint, False)
+
+    def hide_rows(self, start: int) -> None:
+        """Hide the pooled rows from `start` on, they are reused when needed again"""
+
+        for row in self.rows[start:]:
+            if not row[6]:
+                self.itemconfigure(row[0], state=tk.HIDDEN)
+                self.itemconfigure(row[1], state=tk.HIDDEN)
+                row[6] = True
+
+    def clear(self) -> None:
+        self.hide_rows(0)
+        self.state = None
+
+    def line_at(self, event: tk.Event) -> tuple[int, int] | None:
+        """The oval and line number of the row under the pointer"""
+
+        current = self.find_withtag(tk.CURRENT)
+        if not current or current[0] not in self.items:
+            return None
+
+        row = self.rows[self.items[current[0]]]
+        if row[6]:
+            return None
+        return row[0], row[2]
+
+    def on_click(self, event: tk.Event) -> None:
+        if (hit := self.line_at(event)) and self.find_withtag(tk.CURRENT)[0] == hit[0]:
+            self.toggle_breakpoint(hit[1])
+
+    def on_motion(self, event: tk.Event) -> None:
+        hit = self.line_at(event)
+        hovered = hit[0] if hit else None
+        if hovered == self.hovered:
+            return
 
-            # Bind hover and click events for breakpoint
-            self.tag_bind(
-                breakpoint_id,
-                "<Enter>",
-                lambda _,
-                breakpoint_id=breakpoint_id,
-                flag=has_breakpoint: self.on_breakpoint_enter(breakpoint_id, flag),
-            )
-            self.tag_bind(
-                breakpoint_id,
-                "<Leave>",
-                lambda _,
-                breakpoint_id=breakpoint_id,
-                flag=has_breakpoint: self.on_breakpoint_leave(breakpoint_id, flag),
-            )
-            self.tag_bind(
-                breakpoint_id,
-                "<Button-1>",
-                lambda _, linenum=linenum: self.toggle_breakpoint(linenum),
-            )
-
-            if self.text.relative_line_numbers:
-                if linenum != current_line:
-                    linenum = abs(linenum - current_line)
-
-            self.create_text(
-                40,
-                y,
-                anchor=tk.NE,
-                text=linenum,
-                font=self.font,
-                tag=i,
-            )
-
-            self.tag_bind(
-                i,
-                "<Enter>",
-                lambda _,
-                breakpoint_id=breakpoint_id,
-                flag=has_breakpoint: self.on_breakpoint_enter(breakpoint_id, flag),
-            )
+        self.on_leave()
+        if hit:
+            self.hovered = hovered
+            self.on_breakpoint_enter(hovered, hit[1] in self.breakpoints)
 
-            self.tag_bind(
-                i,
-                "<Leave>",
-                lambda _,
-                breakpoint_id=breakpoint_id,
-                flag=has_breakpoint: self.on_breakpoint_leave(breakpoint_id, flag),
-            )
+    def on_leave(self, *_) -> None:
+        if self.hovered is None:
+            return
 
-            i = self.text.index(f"{i}+1line")
+        row = self.rows[self.items[self.hovered]]
+        self.on_breakpoint_leave(self.hovered, row[2] in self.breakpoints)
+        self.hovered = None
 
     def on_breakpoint_enter(self, id, flag):
         pass  # Let canvas use default colors
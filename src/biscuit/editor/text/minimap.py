@@ -10,16 +10,32 @@ if typing.TYPE_CHECKING:
     from .text import Text
 
 
-# TODO update minimap when scrollbar is used
-# TODO rewrite the handling with proper yview (percentage change)
 class Minimap(Frame):
+    """Minimap of the text content
+
+    Lines are drawn as a bitmap into a `PhotoImage`, one pixel per character and
+    `line_height` pixels per line, in the colors of the syntax highlighting. Only
+    the lines that fit the minimap are drawn; when the file is longer, the minimap
+    scrolls along with the text, proportionally.
+
+    Rendered lines are cached by their content and highlighting, and only the bands
+    of pixel rows that differ from what is shown are written to the image, so both
+    scrolling and editing cost in the order of the visible lines, not the file.
+    """
+
+    line_height = 2
+    padding = 5
+    tab_size = 4
+    # how much of the text color shows over the background
+    opacity = 0.6
+    cache_size = 5000
+
     def __init__(self, master: TextEditor, text: Text = None, *args, **kwargs) -> None:
         super().__init__(master, *args, **kwargs)
         self.tw = text
-        self.font = ("Arial", 1, "bold")
-        # self.config(highlightthickness=0)
+        self.width = 100
 
-        self.cw = tk.Canvas(self, width=100, highlightthickness=0)
+        self.cw = tk.Canvas(self, width=self.width, highlightthickness=0)
         self.cw.pack(fill=tk.BOTH, expand=True, side=tk.LEFT, padx=(1, 0))
 
         self.slider_image = tk.PhotoImage(
@@ -30,71 +46,244 @@ class Minimap(Frame):
         KMizIuyrgo46KMizIuyrgo46KMizIuyrgo46KMizIuyrgo46KMizIuyrgo46KMizIuyrgo46KMizIu6gNeAwIJ
         26ERewAAAABJRU5ErkJggg=="""
         )
+        # the slider is the translucent image above, tiled to the height of the view
+        self.slider = tk.PhotoImage()
+        self.image = tk.PhotoImage(width=self.width, height=1)
+
+        self.cw.create_image(0, 0, image=self.image, anchor=tk.NW, tag="bitmap")
+        self.cw.create_line(0, -10, self.width, -10, fill="#dc8c34", width=2, tag="cursor")
+        self.cw.create_image(0, 0, image=self.slider, anchor=tk.NW, tag="slider")
 
-        self.cw.create_image(0, 0, image=self.slider_image, anchor=tk.NW, tag="slider")
+        # lines shown in the minimap: first line (0-based), rendered rows
+        self.first = 0
+        self.rows: list[str] = []
+        self.cache: dict[tuple[str, tuple | None], str] = {}
+        self.colors: dict[str | None, str] = {}
+        self.background = None
+        self.blank = ""
+        self.pending = None
 
-        self.y_top_lim = 0
-        self._drag_data = {"y": 0, "item": None}
-        self.yvalue = 0
+        # scroll geometry of the last redraw, used for dragging the slider
+        self.lines = 1
+        self.visible = 1
+        self.slider_range = 0
+        self._drag_data = {"y": 0, "ratio": 0.0}
 
         self.cw.tag_bind("slider", "<ButtonPress-1>", self.drag_start)
         self.cw.tag_bind("slider", "<ButtonRelease-1>", self.drag_stop)
         self.cw.tag_bind("slider", "<B1-Motion>", self.drag)
+        self.cw.tag_bind("bitmap", "<ButtonPress-1>", self.jump)
+        self.cw.bind("<Configure>", lambda _: self.redraw())
 
     def attach(self, textw):
         self.tw = textw
+        self.reset()
+
+    def reset(self) -> None:
+        """Forget the rendered lines and colors, eg. after the theme changed"""
+
+        self.rows = []
+        self.cache.clear()
+        self.colors.clear()
+        self.background = None
 
     def redraw(self):
-        self.cw.delete("redrawn")
+        """Bring the minimap up to date with the text content and the view"""
 
         if not self.tw:
             return
 
-        self.text = self.tw.get("1.0", tk.END)
-        self.cw.create_text(
-            5,
-            0,
-            text=self.text,
-            anchor=tk.NW,
-            font=self.font,
-            fill="grey",
-            tag="redrawn",
+        try:
+            self.lines = int(self.tw.index("end-1c").split(".")[0])
+            top, bottom = self.tw.yview()
+        except tk.TclError:
+            # editor was closed
+            return
+
+        height = max(self.cw.winfo_height(), 1)
+        capacity = max(height // self.line_height, 1)
+        self.visible = max(round((bottom - top) * self.lines), 1)
+
+        # fraction scrolled, the minimap scrolls by the same fraction of its overflow
+        scrollable = 1 - (bottom - top)
+        ratio = min(top / scrollable, 1) if scrollable > 0 else 0
+        first = round(ratio * max(self.lines - capacity, 0))
+        count = min(capacity, self.lines - first)
+
+        self.render(first, count, capacity)
+
+        shown = min(self.lines, capacity)
+        self.slider_range = max(shown - self.visible, 0) * self.line_height
+        self.place_slider(ratio * self.slider_range)
+        self.redraw_cursor()
+
+    def render(self, first: int, count: int, capacity: int) -> None:
+        """Render lines `first` to `first + count` into the bitmap"""
+
+        if self.image.height() != capacity * self.line_height:
+            self.image.configure(width=self.width, height=capacity * self.line_height)
+            self.image.blank()
+            self.rows = []
+
+        if self.background is None:
+            self.background = self.hex_color(self.cw.cget("background"))
+            self.blank = " ".join(["{" + self.background + "}"] * self.line_height)
+            self.colors.clear()
+
+        lines = self.tw.get(f"{first + 1}.0", f"{first + count}.end").split("\n")
+        spans = self.tw.highlighter.get_spans(first, first + count)
+        unhighlighted = False
+
+        rows = []
+        for i, line in enumerate(lines):
+            line_spans = spans[i] if spans else None
+            if spans and line_spans is None:
+                unhighlighted = True
+
+            key = (line, line_spans)
+            row = self.cache.get(key)
+            if row is None:
+                if len(self.cache) >= self.cache_size:
+                    self.cache.clear()
+                row = self.cache[key] = self.render_line(line, line_spans)
+            rows.append(row)
+        rows += [self.blank] * (capacity - len(rows))
+
+        self.put_rows(rows)
+        self.first = first
+
+        if unhighlighted and self.pending is None:
+            # the highlighter finishes off-screen lines when idle, pick them up later
+            self.pending = self.after(200, self.refresh)
+
+    def refresh(self) -> None:
+        self.pending = None
+        self.redraw()
+
+    def put_rows(self, rows: list[str]) -> None:
+        """Write the rows that differ from the ones shown, a band at a time"""
+
+        old = self.rows + [False] * (len(rows) - len(self.rows))
+        start = None
+        for i in range(len(rows) + 1):
+            changed = i < len(rows) and rows[i] is not old[i]
+            if changed and start is None:
+                start = i
+            elif not changed and start is not None:
+                self.put_band(start, rows[start:i])
+                start = None
+
+        self.rows = rows
+
+    def put_band(self, start: int, rows: list[str]) -> None:
+        # rows are only as wide as their line, clear what was there before
+        y = start * self.line_height
+        self.image.put(
+            self.background,
+            to=(0, y, self.width, y + len(rows) * self.line_height),
         )
+        self.image.put(" ".join(rows), to=(0, y))
 
-        self.y_bottom_lim = int(self.tw.index(tk.END).split(".")[0]) * 2 + 10
-        # self.y_bottom_lim = self.tw.yview()[1] * self.cw.winfo_height()
+    def render_line(self, line: str, spans: tuple | None) -> str:
+        """Pixel rows of a line"""
 
-    def redraw_cursor(self):
-        self.cw.delete("cursor")
+        columns = self.width - self.padding
+        indent = 0
+        if line.startswith("\t"):
+            tabs = len(line) - len(line.lstrip("\t"))
+            indent = tabs * (self.tab_size - 1)
+            line = " " * (tabs * self.tab_size) + line[tabs:]
+
+        line = line[:columns]
+        if not line.strip():
+            return self.blank
+
+        background = self.background
+        default = self.color(None)
+        pixels = [background] * self.padding
+        pixels += [background if c.isspace() else default for c in line]
+
+        for start, end, tag in spans or ():
+            start += indent + self.padding
+            if start >= len(pixels):
+                break
+            color = self.color(tag)
+            for x in range(start, min(end + indent + self.padding, len(pixels))):
+                if pixels[x] is not background:
+                    pixels[x] = color
+
+        row = "{" + " ".join(pixels) + "}"
+        return " ".join([row] + ["{" + background + "}"] * (self.line_height - 1))
+
+    def color(self, tag: str | None) -> str:
+        """Minimap color of a highlight tag, the text color if None"""
+
+        try:
+            return self.colors[tag]
+        except KeyError:
+            pass
+
+        color = None
+        if tag:
+            color = self.tw.tag_cget(tag, "foreground")
+        color = color or self.tw.cget("foreground")
 
+        r, g, b = self.rgb(color)
+        br, bg, bb = self.rgb(self.background)
+        a = self.opacity
+        blended = "#%02x%02x%02x" % (
+            int(r * a + br * (1 - a)),
+            int(g * a + bg * (1 - a)),
+            int(b * a + bb * (1 - a)),
+        )
+        self.colors[tag] = blended
+        return blended
+
+    def rgb(self, color: str) -> tuple[int, int, int]:
+        return tuple(c >> 8 for c in self.cw.winfo_rgb(color))
+
+    def hex_color(self, color: str) -> str:
+        return "#%02x%02x%02x" % self.rgb(color)
+
+    def place_slider(self, y: float) -> None:
+        height = max(min(self.visible, self.lines) * self.line_height, 4)
+        if self.slider.height() != height:
+            self.slider.configure(width=self.width, height=height)
+            self.slider.blank()
+            self.slider.copy(self.slider_image, to=(0, 0, self.width, height))
+
+        self.cw.coords("slider", 0, y)
+
+    def redraw_cursor(self):
         if not self.tw:
             return
 
-        y = int(self.tw.index(tk.INSERT).split(".")[0]) * 2
-        self.cw.create_line(0, y, 100, y, fill="#dc8c34", width=2, tag="cursor")
+        line = int(self.tw.index(tk.INSERT).split(".")[0]) - 1
+        y = (line - self.first) * self.line_height + 1
+        self.cw.coords("cursor", 0, y, self.width, y)
+
+    def jump(self, event: tk.Event):
+        """Center the view on the clicked line and start dragging from there"""
+
+        line = self.first + event.y // self.line_height
+        self.tw.yview_moveto(max(line - self.visible / 2, 0) / self.lines)
+        self.drag_start(event)
 
     def drag_start(self, event: tk.Event):
-        self._drag_data["item"] = self.cw.find_closest(event.x, event.y)[0]
         self._drag_data["y"] = event.y
+        top, bottom = self.tw.yview()
+        scrollable = 1 - (bottom - top)
+        self._drag_data["ratio"] = top / scrollable if scrollable > 0 else 0
 
     def drag_stop(self, event: tk.Event):
-        self._drag_data["item"] = None
         self._drag_data["y"] = 0
 
     def drag(self, event: tk.Event):
-        item = self._drag_data["item"]
-        if item != 1:
+        if not self.slider_range:
             return
 
-        delta_y = event.y - self._drag_data["y"]
-        self.cw.move(item, 0, delta_y)
-        self._drag_data["y"] = event.y
-
-        self.yvalue = y = self.cw.coords(item)[1]
-        if y <= self.y_top_lim:
-            self.cw.move("slider", 0, -(y - self.y_top_lim))
-        elif y >= self.y_bottom_lim:
-            self.cw.move("slider", 0, -(y - self.y_bottom_lim))
+        delta = (event.y - self._drag_data["y"]) / self.slider_range
+        ratio = min(max(self._drag_data["ratio"] + delta, 0), 1)
 
-        self.tw.yview(int(y / self.cw.winfo_height() * 350))
-        self.tw.master.on_scroll()
+        top, bottom = self.tw.yview()
+        self.tw.yview_moveto(ratio * (1 - (bottom - top)))
@@ -0,0 +1,132 @@
+from __future__ import annotations
+
+import tkinter as tk
+import typing
+
+if typing.TYPE_CHECKING:
+    from .editor import TextEditor
+
+# when a task runs
+IMMEDIATE = "immediate"
+FRAME = "frame"
+DEBOUNCED = "debounced"
+
+
+class Task(typing.NamedTuple):
+    callback: typing.Callable[[], typing.Any]
+    when: str
+    # also run when only the cursor moved
+    cursor: bool = True
+    # ms of quiet before a debounced task runs
+    delay: int = 0
+
+
+class RefreshScheduler:
+    """Keeps an editor's views up to date after edits and cursor moves
+
+    Every edit and every cursor move asks for a refresh, and holding a key asks
+    for one per repeat. Instead of redoing everything each time, the work is split
+    by cost:
+
+    - immediate tasks (caret line, statusbar) run right away
+    - frame tasks run once per `frame` ms however many changes came in meanwhile
+    - debounced tasks (outline, indent guides, words) run once changes stopped
+      coming in for their delay, each new change pushes them back
+
+    Tasks can be limited to content edits, so moving the cursor around doesn't
+    trigger them. Pending tasks are dropped with `cancel`, or run at once with
+    `flush`."""
+
+    def __init__(self, editor: TextEditor, frame: int = 16) -> None:
+        self.editor = editor
+        self.frame = frame
+        self.tasks: dict[str, Task] = {}
+
+        # whether the content changed since the last frame pass
+        self.content = False
+        self.cursor = False
+        self._frame = None
+        self._jobs: dict[str, str] = {}
+
+    def add(
+        self,
+        name: str,
+        callback: typing.Callable[[], typing.Any],
+        when: str = FRAME,
+        cursor: bool = True,
+        delay: int = 0,
+    ) -> None:
+        """Register a task
+
+        Args:
+            name (str): Name of the task, replaces a task of the same name
+            callback (Callable): Called without arguments
+            when (str): IMMEDIATE, FRAME or DEBOUNCED
+            cursor (bool): Also run when only the cursor moved
+            delay (int): ms of quiet before a DEBOUNCED task runs"""
+
+        self.tasks[name] = Task(callback, when, cursor, delay)
+
+    def request(self, content: bool = True) -> None:
+        """Schedule a refresh after the content changed, or only the cursor moved"""
+
+        if content:
+            self.content = True
+        else:
+            self.cursor = True
+
+        for name, task in self.tasks.items():
+            if not (content or task.cursor):
+                continue
+            if task.when == IMMEDIATE:
+                self.run(task)
+            elif task.when == DEBOUNCED:
+                if job := self._jobs.pop(name, None):
+                    self.editor.after_cancel(job)
+                self._jobs[name] = self.editor.after(
+                    task.delay, self.run_debounced, name
+                )
+
+        if self._frame is None:
+            self._frame = self.editor.after(self.frame, self.run_frame)
+
+    def run_frame(self) -> None:
+        self._frame = None
+        content, self.content, self.cursor = self.content, False, False
+
+        for task in self.tasks.values():
+            if task.when == FRAME and (content or task.cursor):
+                self.run(task)
+
+    def run_debounced(self, name: str) -> None:
+        self._jobs.pop(name, None)
+        if task := self.tasks.get(name):
+            self.run(task)
+
+    def run(self, task: Task) -> None:
+        try:
+            task.callback()
+        except tk.TclError:
+            # editor was closed meanwhile
+            pass
+
+    def flush(self) -> None:
+        """Run the pending frame and debounced tasks now"""
+
+        pending = list(self._jobs)
+        self.cancel()
+        self.run_frame()
+        for name in pending:
+            self.run_debounced(name)
+
+    def cancel(self) -> None:
+        """Drop the pending frame and debounced tasks"""
+
+        for job in [self._frame, *self._jobs.values()]:
+            if job:
+                try:
+                    self.editor.after_cancel(job)
+                except tk.TclError:
+                    pass
+        self._frame = None
+        self._jobs.clear()
@@ -1,7 +1,6 @@
 from __future__ import annotations
 
 import os
-import queue
 import time
 import re
 import threading
@@ -31,15 +30,27 @@ if typing.TYPE_CHECKING:
     from . import TextEditor
 
 from biscuit.common import textutils
+from biscuit.common.helpers import is_dark
 from biscuit.common.ui import Text as BaseText
 
 from ..comment_prefix import get_comment_prefix
+from .brackets import BRACKETS, BracketIndex
+from .changes import Change
 from .highlighter import Highlighter
+from .indentguides import IndentGuides
+from .undo import UndoHistory
+from .wordindex import WordIndex
 
 BRACKET_MAP = {"(": ")", "{": "}", "[": "]"}
 BRACKET_MAP_REV = {v: k for k, v in BRACKET_MAP.items()}
 OPENING_BRACKETS = ("(", "{", "[")
 CLOSING_BRACKETS = (")", "}", "]")
+# colors of brackets by depth, when rainbow brackets are enabled, (light, dark)
+RAINBOW_BRACKETS = (
+    ("#0431fa", "#ffd700"),
+    ("#319331", "#da70d6"),
+    ("#7b3814", "#179fff"),
+)
 
 
 class Text(BaseText):
@@ -61,7 +72,7 @@ class Text(BaseText):
         self.path = path
         self.filename = os.path.basename(path) if path else None
         self.encoding = "utf-8"
-        self.eol = "CRLF"
+        self.eol = textutils.get_default_newline()
         self.exists = exists
         self.minimalist = minimalist
         self.standalone = standalone
@@ -74,9 +85,12 @@ class Text(BaseText):
 
         self.ctrl_down = False
         self.buffer_size = 4096
+        self.loading = False
+        # chars read per chunk and inserted per tick while bulk loading a file
+        self.load_chunk_size = 1 << 18
+        self.load_batch_size = 1 << 22
         self.bom = True
         self.current_word = None
-        self.words: list[str] = []
         self.lsp: bool = False
         self.current_indent_level = 0
         self.insert_final_newline = False
@@ -92,14 +106,20 @@ class Text(BaseText):
             self.insert_final_newline = self.editorconfig.get(
                 "insert_final_newline", False
             )
-            self.eol = self.editorconfig.get("end_of_line", "CRLF")
+            self.eol = self.editorconfig.get("end_of_line", self.eol)
             self.encoding = self.editorconfig.get("charset", "utf-8")
             self.tab_spaces = int(self.editorconfig.get("indent_size", 4))
         except EditorConfigError:
             self.editorconfig = {}
 
-        # self.last_change = Change(None, None, None, None, None)
         self.highlighter = Highlighter(self, language)
+        self.indentguides = IndentGuides(self)
+        self.wordindex = WordIndex(self)
+        self.brackets = BracketIndex(self)
+        # strings and comments may have changed, and the brackets inside them
+        self.highlighter.retagged.append(
+            lambda first, last: self.brackets.invalidate(first, last - first, last - first)
+        )
         if not self.standalone and not self.minimalist:
             self.base.statusbar.on_open_file(self)
             self.autocomplete = self.base.autocomplete
@@ -128,9 +148,7 @@ class Text(BaseText):
 
         # modified event
         # self.clear_modified_flag()
-        self._user_edit = True
-        self._edit_stack = []
-        self._edit_stack_index = -1
+        self.history = UndoHistory(self)
 
     def config_tags(self):
         self.indentguide_stipple = self.base.resources.indent_guide
@@ -153,6 +171,7 @@ class Text(BaseText):
         self.tag_configure(
             "current_indent_guide", bgstipple=f"@{self.indentguide_stipple}"
         )
+        self.tag_raise("current_indent_guide", "indent_guide")
 
         self.tag_raise(tk.SEL, "hover")
         self.tag_raise(tk.SEL, "currentline")
@@ -161,6 +180,9 @@ class Text(BaseText):
 
         self.tag_config("activebracket")
         self.tag_config("red")
+        dark = is_dark(self)
+        for depth, colors in enumerate(RAINBOW_BRACKETS):
+            self.tag_config(f"bracket_depth_{depth}", foreground=colors[dark])
 
     def config_bindings(self):
         self.bind("<KeyRelease>", self.key_release_events)
@@ -184,7 +206,7 @@ class Text(BaseText):
         self.bind("<Shift-Tab>", self.dedent_selection)
 
         # undo-redo
-        self.bind_all("<<Modified>>", self._been_modified)
+        self.bind("<<Modified>>", self._been_modified)
 
         # pair completion
         self.bind("<parenleft>", self.open_bracket)
@@ -239,8 +261,6 @@ class Text(BaseText):
         self.tag_bind("hint", "<Leave>", self.base.diagnostic.hide)
 
     def key_release_events(self, event: tk.Event):
-        self._user_edit = True
-        
         # Context Engine Hook
         if self.base.context_engine:
             self.base.context_engine.report_user_action("type")
@@ -287,8 +307,6 @@ class Text(BaseText):
                 else:
                     self.show_autocomplete(event)
 
-        self.update_words_list()
-
     def diagnostic_hover(self, severity: int) -> str:
         if pos := self.get_mouse_pos():
             message, start = self.diagnostics[pos]
@@ -298,35 +316,12 @@ class Text(BaseText):
         if self.minimalist:
             return
 
-        self.tag_remove("indent_guide", "1.0", "end")
-        self.tag_remove("current_indent_guide", "1.0", "end")
-        lines = self.get("1.0", "end-1c").split("\n")
-
-        self.current_indent_level = self.get_current_indent_level() - 1
-
-        for line_number, line in enumerate(lines, start=1):
-            indent_level = self.calculate_indent_level(line)
-            if indent_level > 0:
-                self.add_indent_guide(line_number, indent_level)
+        self.indentguides.update()
 
     def calculate_indent_level(self, line: str) -> int:
         indent = len(line) - len(line.lstrip())
         return indent // self.tab_spaces
 
-    def add_indent_guide(self, line_number: int, indent_level: int) -> None:
-        for level in range(indent_level):
-            start_index = f"{line_number}.{level * self.tab_spaces}"
-            end_index = f"{line_number}.{level * self.tab_spaces + 1}"
-            self.tag_add(
-                (
-                    "current_indent_guide"
-                    if level == self.current_indent_level
-                    else "indent_guide"
-                ),
-                start_index,
-                end_index,
-            )
-
     def get_current_indent_level(self) -> int:
         prev = self.get("insert-1l linestart", "insert-1l lineend")
         line = self.get("insert linestart", "insert lineend")
@@ -338,68 +333,69 @@ class Text(BaseText):
             self.calculate_indent_level(next_line),
         )
 
-    # TODO this wont work properly
-    # write a custom ast, parser for bracket matching
     def highlight_current_brackets(self):
+        """Highlight the bracket next to the cursor and the one matching it"""
+
         self.tag_remove("activebracket", "1.0", tk.END)
-        i = self.index(tk.INSERT)
-        start, end = None, None
+        line, column = (int(i) for i in self.index(tk.INSERT).split("."))
+
+        # the bracket before the cursor takes precedence, like when it was just typed
+        for col in (column - 1, column):
+            if col >= 0 and (match := self.brackets.match(line, col)):
+                self.tag_add(
+                    "activebracket",
+                    f"{line}.{col}",
+                    f"{line}.{col + 1}",
+                    f"{match[0]}.{match[1]}",
+                    f"{match[0]}.{match[1] + 1}",
+                )
+                return
 
-        try:
-            if start := self.search(
-                r"[\{\[\(\)\]\}]", i, i + " linestart", backwards=True, regexp=True
-            ):
-                if counter := BRACKET_MAP.get(self.get(start, start + "+1c")):
-                    end = self.search(counter, i, stopindex=i + " lineend")
-        except tk.TclError:
-            pass
+    def highlight_bracket_depths(self):
+        """Color the brackets in view by depth, if rainbow brackets are enabled"""
 
-        if not end:
+        if self.minimalist or not self.base.settings.config.rainbow_brackets:
             return
 
-        self.tag_add("activebracket", start, start + "+1c")
-        self.tag_add("activebracket", end, end + "+1c")
+        first = int(self.index("@0,0").split(".")[0])
+        last = int(self.index(f"@0,{self.winfo_height()}").split(".")[0])
+        tags = [f"bracket_depth_{depth}" for depth in range(len(RAINBOW_BRACKETS))]
+        for tag in tags:
+            self.tag_remove(tag, f"{first}.0", f"{last + 1}.0")
+
+        depth = self.brackets.depth(first, 0)
+        ranges = {}
+        for line, col, char in self.brackets.brackets(first, last):
+            step = BRACKETS[char][1]
+            if step < 0:
+                depth = max(depth - 1, 0)
+            ranges.setdefault(tags[depth % len(tags)], []).extend(
+                (f"{line}.{col}", f"{line}.{col + 1}")
+            )
+            if step > 0:
+                depth += 1
+
+        for tag, indices in ranges.items():
+            self.tag_add(tag, *indices)
+            self.tag_raise(tag)
 
     def refresh_wrap(self):
         return
         self.config(wrap=tk.WORD if self.base.wrap_words else tk.NONE)
 
     def open_bracket(self, e: tk.Event):
-        text = self.get("1.0", "insert")
-        i = 0
-        for ch in text:
-            if ch in OPENING_BRACKETS:
-                i += 1
-            elif ch in CLOSING_BRACKETS:
-                if i > 0:
-                    i -= 1
-        # Use simple bracket completion without color tagging
         self.complete_pair(e, None)
-
         return "break"
 
     def close_bracket(self, e: tk.Event):
-        text = self.get("1.0", "insert")
-        i = -1
-        stack = []
-        for ch in text:
-            if ch in OPENING_BRACKETS:
-                i += 1
-                stack.append(BRACKET_MAP[ch])
-            elif ch in CLOSING_BRACKETS:
-                if i > -1:
-                    i -= 1
-                    if stack[-1] == ch:
-                        stack.pop()
-        if stack and stack[-1] == e.char:
-            # skip if next character is what we are closing
-            if c := self.get("insert", "insert+1c"):
-                if c == e.char:
-                    self.mark_set(tk.INSERT, "insert+1c")
-                    return "break"
+        # type over the closing bracket after the cursor if it closes an open one
+        if self.get("insert", "insert+1c") == e.char:
+            line, column = (int(i) for i in self.index(tk.INSERT).split("."))
+            if self.brackets.match(line, column):
+                self.mark_set(tk.INSERT, "insert+1c")
+                return "break"
 
         self.insert(tk.INSERT, e.char)
-
         return "break"
 
     def complete_pair(self, e: tk.Event, tag=None):
@@ -457,15 +453,7 @@ class Text(BaseText):
         if self.minimalist or self.lsp:
             return
 
-        try:
-            content = (
-                self.get(1.0, "insert-1c wordstart-1c")
-                + " "
-                + self.get("insert+1c", tk.END)
-            )
-            self.words = list(set(re.findall(r"\w+", content)))
-        except:
-            pass
+        self.wordindex.update()
 
     def update_completions(self):
         """Helper function for `AutoComplete` popup.
@@ -648,14 +636,16 @@ class Text(BaseText):
         return "break"
 
     def refresh(self):
+        """Refresh everything at once, edits go through the editor's refresh scheduler"""
+
         self.highlighter.highlight()
         self.highlight_current_word()
 
         if self.minimalist or self.standalone:
             return
 
-        self.current_word = self.get("insert-1c wordstart", "insert")
-        self.base.language_server_manager.request_outline(self)
+        self.update_current_word()
+        self.request_outline()
         self.highlight_current_line()
         self.highlight_current_brackets()
         self.update_indent_guides()
@@ -727,6 +717,12 @@ class Text(BaseText):
     def clear_goto_marks(self):
         self.tag_remove("hyperlink", 1.0, tk.END)
 
+    def request_outline(self):
+        if self.minimalist or self.standalone:
+            return
+
+        self.base.language_server_manager.request_outline(self)
+
     def request_definition(self, from_menu=False, *_):
         if not from_menu and (not self.lsp or not self.last_hovered):
             return
@@ -871,6 +867,9 @@ class Text(BaseText):
 
         return self.current_word.strip()
 
+    def update_current_word(self):
+        self.current_word = self.get("insert-1c wordstart", "insert")
+
     def get_current_fullword(self) -> str | None:
         """Returns current word uncut and fully"""
 
@@ -964,23 +963,7 @@ class Text(BaseText):
             return "utf-8"
 
     def change_eol(self, eol: str):
-        if not self.exists:
-            text = self.get_all_text()
-            if not text.strip():
-                self.eol = eol
-                self.base.statusbar.on_open_file(self)
-                return
-        self.encoding = self.encoding or self.detect_encoding(self.path)
-        if self.path and self.exists:
-            self.clear()
-            file = open(
-                self.path, "r", encoding=self.encoding, buffering=self.buffer_size
-            )
-            self.queue = queue.Queue()
-            threading.Thread(target=self.read_file, args=(file,), daemon=True).start()
-            self.process_queue(eol=eol)
-        else:
-            self.load_text(text, eol=eol)
+        # the buffer always uses "\n", line endings are converted when saving
         self.eol = eol
         self.base.statusbar.on_open_file(self)
 
@@ -999,12 +982,9 @@ class Text(BaseText):
                 "r",
                 buffering=self.buffer_size,
                 encoding=self.encoding,
-                newline=self.eol,
             )
 
-            self.queue = queue.Queue()
-            threading.Thread(target=self.read_file, args=(file,), daemon=True).start()
-            self.process_queue()
+            self.stream_file(file)
         except Exception as e:
             print(e)
             if self.exists:
@@ -1037,9 +1017,7 @@ class Text(BaseText):
             )
             self.eol = textutils.get_default_newline()
 
-            self.queue = queue.Queue()
-            threading.Thread(target=self.read_file, args=(file,), daemon=True).start()
-            self.process_queue()
+            self.stream_file(file)
         except Exception as e:
             print(e)
             if self.exists:
@@ -1061,8 +1039,6 @@ class Text(BaseText):
                 buffer.append(char)
                 if len(buffer) >= self.buffer_size:
                     chunk = "".join(buffer)
-                    if eol:
-                        chunk.replace(self.eol or textutils.get_default_newline(), eol)
                     self.write(chunk)
                     self.update()
                     buffer.clear()
@@ -1078,49 +1054,94 @@ class Text(BaseText):
 
         threading.Thread(target=write_with_buffer, daemon=True).start()
 
+    def stream_file(self, file: typing.TextIO) -> None:
+        """Load file content in bulk-load mode
+
+        The file is read in a background thread and inserted in large batches.
+        While loading, edits don't go through the change pipeline (highlighting,
+        outline, undo history, language server notifications), it runs once the
+        whole file is in."""
+
+        self.loading = True
+        self.load_channel = self.base.dispatcher.channel(
+            "file load",
+            self.load_chunks,
+            batch_size=self.load_batch_size // self.load_chunk_size,
+        )
+        threading.Thread(target=self.read_file, args=(file,), daemon=True).start()
+
     def read_file(self, file: typing.TextIO):
         while True:
             try:
-                chunk = file.read(self.buffer_size)
+                chunk = file.read(self.load_chunk_size)
             except UnicodeDecodeError as e:
-                print(e)
-                self.master.unsupported_file()
+                file.close()
+                # handled on the UI thread, after the chunks read before it
+                self.load_channel.post(e)
                 return
             if not chunk:
                 file.close()
-                self.queue.put(None)  # Signal the end of reading
+                self.load_channel.post(None)  # Signal the end of reading
                 break
-            self.queue.put(chunk)
+            self.load_channel.post(chunk)
 
-    def process_queue(self, eol: str = None):
-        try:
-            while True:
-                chunk = self.queue.get_nowait()
-                if chunk is None:
-                    # Finished loading file -- reached EOF 🚧
-                    try:
-                        self.master.on_change()
-                        self.master.on_scroll()
-                        self.update_idletasks()
-                        self.master.file_loaded()
-                        self.highlighter.detect_language()
-                        self.highlighter.highlight()
-                    except Exception:
-                        pass
-                    break
-                if eol:
-                    chunk.replace(self.eol or textutils.get_default_newline(), eol)
+    def load_chunks(self, chunks: list[str | UnicodeDecodeError | None]):
+        """Insert a batch of what was read with a single insert"""
 
-                try:
-                    self.write(chunk)
-                    self.update()
-                    self.master.on_scroll()
-                except Exception:
-                    # editor was closed during file load
-                    return
-        except queue.Empty:
-            # If the queue is empty, schedule the next check after a short delay
-            self.master.after(100, self.process_queue)
+        if not self.master.editable:
+            # file turned out to be unsupported while reading
+            self.loading = False
+            self.load_channel.close()
+            return
+
+        if error := next(
+            (chunk for chunk in chunks if isinstance(chunk, UnicodeDecodeError)), None
+        ):
+            self.loading = False
+            self.load_channel.close()
+            self.base.logger.error(f"Reading {self.path} failed: {error}")
+            self.master.unsupported_file()
+            return
+
+        eof = None in chunks
+        if eof:
+            chunks = chunks[: chunks.index(None)]
+        if chunks:
+            try:
+                self.write("".join(chunks))
+                self.master.linenumbers.redraw()
+            except Exception:
+                # editor was closed during file load
+                self.load_channel.close()
+                return
+
+        if eof:
+            # Finished loading file -- reached EOF 🚧
+            self.load_channel.close()
+            self.finish_loading()
+
+    def finish_loading(self) -> None:
+        """Leave bulk-load mode and run the change pipeline once for the whole file"""
+
+        self.loading = False
+        self.history.clear()
+        self.indentguides.reset()
+        self.wordindex.reset()
+        self.brackets.reset()
+
+        try:
+            self.master.on_change()
+            self.master.on_scroll()
+            self.update_idletasks()
+            self.master.file_loaded()
+            self.highlighter.detect_language()
+            self.highlighter.highlight()
+
+            # language server gets the whole file in a single didOpen
+            if not (self.minimalist or self.standalone) and self.winfo_ismapped():
+                self.event_mapped(None)
+        except Exception:
+            pass
 
     def custom_get(self, start: str, end: str) -> str:
         """Ignore the text that is tagged with 'ignore_tag' and return the rest of the text."""
@@ -1141,9 +1162,15 @@ class Text(BaseText):
         if self.base.context_engine:
             self.base.context_engine.report_user_action("save")
 
+        # the buffer uses "\n", it is written with the chosen line endings
+        newline = (
+            self.eol
+            if self.eol in textutils.eol_map_rev
+            else textutils.get_eol(self.eol.upper())
+        )
         if path:
             try:
-                with open(path, "w") as fp:
+                with open(path, "w", newline=newline) as fp:
                     fp.write(self.get_all_text())
             except Exception:
                 return
@@ -1152,7 +1179,7 @@ class Text(BaseText):
             # TODO update tab name
 
         try:
-            with open(self.path, "w") as fp:
+            with open(self.path, "w", newline=newline) as fp:
                 fp.write(self.get_all_text())
         except Exception:
             return
@@ -1169,6 +1196,9 @@ class Text(BaseText):
         self.hover.hide()
 
     def event_mapped(self, _):
+        if self.loading:
+            return
+
         try:
             self.lsp = self.base.language_server_manager.tab_opened(self)
         except Exception as e:
@@ -1284,6 +1314,14 @@ class Text(BaseText):
         except Exception:
             return ""
 
+    @property
+    def selection_length(self) -> int:
+        """Characters selected, read from the text instead of the X selection"""
+
+        if ranges := self.tag_ranges(tk.SEL):
+            return len(self.get(ranges[0], ranges[-1]))
+        return 0
+
     @property
     def line(self):
         try:
@@ -1411,59 +1449,31 @@ class Text(BaseText):
             self.tag_add(tag, "matchStart", "matchEnd")
 
     def edit_undo(self):
-        if self._edit_stack_index > 0:
-            self._edit_stack_index = self._edit_stack_index - 1
-            self._user_edit = False
-            self.clear()
-            self.write(self._edit_stack[self._edit_stack_index][0][:-1])
-            self.mark_set("insert", self._edit_stack[self._edit_stack_index][1])
-
+        if self.history.undo():
             if self.base.context_engine:
                 self.base.context_engine.report_user_action("undo")
 
     def edit_redo(self):
-        if self._edit_stack_index + 1 < len(self._edit_stack):
-            self._edit_stack_index = self._edit_stack_index + 1
-            self._user_edit = False
-            self.clear()
-            self.write(self._edit_stack[self._edit_stack_index][0][:-1])
-            self.mark_set("insert", self._edit_stack[self._edit_stack_index][1])
-
+        if self.history.redo():
             if self.base.config.clippy_enabled and self.base.context_engine:
                 self.base.context_engine.report_user_action("redo")
 
     def _been_modified(self, event=None):
         try:
-            if self._user_edit:
-                text = self.get_all_text()
-                if (not self._edit_stack) or (
-                    text != self._edit_stack[self._edit_stack_index][0]
-                ):
-                    # real modified
-                    cursor_index = self.index(tk.INSERT)
-                    
-                    if self.base.config.clippy_enabled and self.base.context_engine:
-                        line = self.get("insert linestart", "insert lineend")
-                        indent = len(line) - len(line.lstrip())
-                        indent_level = indent // self.tab_spaces if self.tab_spaces > 0 else indent
-                        self.base.context_engine.report_ast_change(self.path, text, indent_level)
-
-                    if (self._edit_stack_index + 1) != len(self._edit_stack):
-                        self._edit_stack = self._edit_stack[
-                            : self._edit_stack_index + 1
-                        ]
-                    self._edit_stack.append([text, cursor_index])
-                    self._edit_stack_index = self._edit_stack_index + 1
-                    if self._edit_stack_index > 200:
-                        self._edit_stack = self._edit_stack[
-                            self._edit_stack_index - 50 : self._edit_stack_index + 1
-                        ]
-                        self._edit_stack_index = len(self._edit_stack) - 1
             if self._resetting_modified_flag:
                 return
+
+            if not self.loading:
+                if self.base.config.clippy_enabled and self.base.context_engine:
+                    line = self.get("insert linestart", "insert lineend")
+                    indent = len(line) - len(line.lstrip())
+                    indent_level = indent // self.tab_spaces if self.tab_spaces > 0 else indent
+                    self.base.context_engine.report_ast_change(
+                        self.path, self.get_all_text(), indent_level
+                    )
             self.clear_modified_flag()
-        except:
-            self.base.notifications.error("Edit stack error: please restart biscuit")
+        except Exception as e:
+            self.base.logger.error(f"Handling modification of {self.path} failed: {e}")
 
     def clear_modified_flag(self):
         self._resetting_modified_flag = True
@@ -1477,6 +1487,33 @@ class Text(BaseText):
         self.tk.call("rename", self._w, self._orig)
         self.tk.createcommand(self._w, self._proxy)
 
+    def _capture_change(self, args: tuple) -> Change | None:
+        """Capture an insert, delete or replace as a `Change`, resolved before it is applied"""
+
+        try:
+            start = self.index(args[1])
+            if args[0] == "insert":
+                if self.compare(start, "==", tk.END):
+                    start = self.index(f"{tk.END}-1c")
+                return Change.make(start, start, "", "".join(args[2::2]))
+
+            if args[0] == "delete" and len(args) > 3:
+                # multiple ranges in a single delete are not captured
+                return
+
+            end = self.index(args[2] if len(args) > 2 else f"{args[1]}+1c")
+            if self.compare(end, "==", tk.END):
+                end = self.index(f"{tk.END}-1c")
+            if self.compare(end, "<", start):
+                end = start
+            new_text = "".join(args[3::2]) if args[0] == "replace" else ""
+            return Change.make(start, end, self._orig_get(start, end), new_text)
+        except (tk.TclError, IndexError):
+            return
+
+    def _orig_get(self, start: str, end: str) -> str:
+        return self.tk.call(self._orig, "get", start, end)
+
     def _proxy(self, *args):
         if (
             args[0] == "get"
@@ -1491,6 +1528,11 @@ class Text(BaseText):
         ):
             return
 
+        change = None
+        if args[0] in ("insert", "replace", "delete") and not self.loading:
+            change = self._capture_change(args)
+            cursor = self.index(tk.INSERT)
+
         cmd = (self._orig,) + args
         try:
             result = self.tk.call(cmd)
@@ -1498,6 +1540,28 @@ class Text(BaseText):
             return
 
         if args[0] in ("insert", "replace", "delete"):
+            if self.loading:
+                # bulk load, the change pipeline runs once the whole file is in
+                return result
+
+            if change:
+                self.history.record(change, cursor)
+                lines = (
+                    change.start[0],
+                    change.old_end[0] - change.start[0],
+                    change.new_end[0] - change.start[0],
+                )
+                self.highlighter.invalidate(*lines)
+                self.indentguides.invalidate(*lines)
+                self.wordindex.invalidate(*lines)
+                self.brackets.invalidate(*lines)
+            else:
+                # edit could not be captured, history can no longer be replayed
+                self.history.clear()
+                self.highlighter.reset()
+                self.indentguides.reset()
+                self.wordindex.reset()
+                self.brackets.reset()
             self.event_generate("<<Change>>", when="tail")
 
             if args[0] == "insert" and len(args) >= 3 and len(args[2]) > 200:
@@ -1506,7 +1570,7 @@ class Text(BaseText):
 
             if self.lsp:
                 try:
-                    self.base.language_server_manager.content_changed(self)
+                    self.base.language_server_manager.content_changed(self, change)
                 except Exception:
                     pass
 
@@ -1514,7 +1578,7 @@ class Text(BaseText):
         #     print(temp)
 
         elif args[0:3] == ("mark", "set", "insert"):
-            self.event_generate("<<Change>>", when="tail")
+            self.event_generate("<<Cursor>>", when="tail")
         elif (
             args[0:2] == ("xview", "moveto")
             or args[0:2] == ("yview", "moveto")
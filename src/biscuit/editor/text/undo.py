@@ -0,0 +1,159 @@
+from __future__ import annotations
+
+import time
+import tkinter as tk
+import typing
+
+if typing.TYPE_CHECKING:
+    from .changes import Change
+    from .text import Text
+
+
+class EditGroup:
+    """Changes undone and redone together, along with the cursor position before them"""
+
+    __slots__ = ("changes", "cursor", "typing", "time")
+
+    def __init__(self, change: Change, cursor: str) -> None:
+        self.changes: list[Change] = [change]
+        self.cursor = cursor
+        self.typing = _typing_kind(change)
+        self.time = time.monotonic()
+
+
+class UndoHistory:
+    """Operation log based undo/redo history
+
+    Each edit is recorded as a `Change` delta captured by the text widget before it
+    is applied. Edits made while handling the same event (eg. auto indentation,
+    pair completion) form one group, and consecutive typing or deleting of single
+    characters is merged into a transaction until a word boundary, a cursor jump or
+    a pause. Undo and redo apply the inverse edits in place, so both memory and time
+    are proportional to the size of the edits rather than the document."""
+
+    def __init__(self, text: Text, limit: int = 1000, merge_timeout: float = 1) -> None:
+        """Undo history of a text widget
+
+        Args:
+            text (Text): The text widget
+            limit (int, optional): Number of groups kept. Defaults to 1000.
+            merge_timeout (float, optional): Seconds after which typing is no longer
+                merged into the previous group. Defaults to 1."""
+
+        self.text = text
+        self.limit = limit
+        self.merge_timeout = merge_timeout
+
+        self.undo_stack: list[EditGroup] = []
+        self.redo_stack: list[EditGroup] = []
+        self.applying = False
+        self._open = False
+
+    def record(self, change: Change, cursor: str) -> None:
+        """Record an applied change
+
+        Args:
+            change (Change): The change
+            cursor (str): Position of the insert cursor before the change"""
+
+        if self.applying:
+            return
+
+        self.redo_stack.clear()
+        if self._open or self._continues_typing(change):
+            group = self.undo_stack[-1]
+            group.changes.append(change)
+            group.time = time.monotonic()
+            if group.typing != _typing_kind(change):
+                group.typing = None
+            return
+
+        self.undo_stack.append(EditGroup(change, cursor))
+        if len(self.undo_stack) > self.limit:
+            del self.undo_stack[0]
+
+        # everything else done while handling this event belongs to the same group
+        self._open = True
+        self.text.after_idle(self._seal)
+
+    def clear(self) -> None:
+        self.undo_stack.clear()
+        self.redo_stack.clear()
+        self._open = False
+
+    def undo(self) -> bool:
+        """Revert the last group of changes, returns whether anything was undone"""
+
+        if not self.undo_stack:
+            return False
+
+        group = self.undo_stack.pop()
+        self._apply(
+            [(c.start_index, c.new_end_index, c.old_text) for c in reversed(group.changes)]
+        )
+        self.text.mark_set(tk.INSERT, group.cursor)
+        self.redo_stack.append(group)
+        return True
+
+    def redo(self) -> bool:
+        """Reapply the last undone group of changes, returns whether anything was redone"""
+
+        if not self.redo_stack:
+            return False
+
+        group = self.redo_stack.pop()
+        self._apply(
+            [(c.start_index, c.old_end_index, c.new_text) for c in group.changes]
+        )
+        self.text.mark_set(tk.INSERT, group.changes[-1].new_end_index)
+        self.undo_stack.append(group)
+        return True
+
+    def _apply(self, edits: list[tuple[str, str, str]]) -> None:
+        self._seal()
+        self.applying = True
+        try:
+            for start, end, text in edits:
+                if start == end:
+                    self.text.insert(start, text)
+                elif text:
+                    self.text.replace(start, end, text)
+                else:
+                    self.text.delete(start, end)
+        finally:
+            self.applying = False
+
+    def _seal(self) -> None:
+        self._open = False
+
+    def _continues_typing(self, change: Change) -> bool:
+        """Whether a single character edit continues the typing in the last group"""
+
+        if not self.undo_stack:
+            return False
+
+        group = self.undo_stack[-1]
+        kind = _typing_kind(change)
+        if not kind or kind != group.typing:
+            return False
+        if time.monotonic() - group.time > self.merge_timeout:
+            return False
+
+        last = group.changes[-1]
+        if kind == "insert":
+            # break after a word when whitespace is typed
+            return change.start == last.new_end and not (
+                change.new_text.isspace() and not last.new_text.isspace()
+            )
+
+        # backspace moves backwards, delete key stays in place
+        return change.old_end == last.start or change.start == last.start
+
+
+def _typing_kind(change: Change) -> str | None:
+    """`insert`/`delete` for edits of a single character on one line, `None` otherwise"""
+
+    if not change.old_text and len(change.new_text) == 1 and change.new_text != "\n":
+        return "insert"
+    if not change.new_text and len(change.old_text) == 1 and change.old_text != "\n":
+        return "delete"
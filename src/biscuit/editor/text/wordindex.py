@@ -0,0 +1,204 @@
+from __future__ import annotations
+
+import heapq
+import re
+import sys
+import typing
+from bisect import bisect_left, insort
+
+if typing.TYPE_CHECKING:
+    from .text import Text
+
+WORD = re.compile(r"\w+")
+
+
+class WordIndex:
+    """Words of a document, for autocomplete without a language server
+
+    The words of each line are kept, along with how often each word occurs in
+    the document and a sorted array of the distinct words. Edits forget the
+    words of the lines they touch, the way they invalidate highlighting, and
+    only those lines are read again on `update`. Completions are looked up by
+    prefix with a binary search, so they cost the same however large the file.
+
+    Completions are ranked by how close to the cursor a word occurs, then by
+    how often it occurs. Indexes of other documents can be passed to `complete`
+    to also offer their words."""
+
+    # lines above and below the cursor looked at for nearby words
+    window = 100
+    # distinct words after which the sorted array is rebuilt rather than updated
+    rebuild_size = 64
+
+    def __init__(self, text: Text) -> None:
+        self.text = text
+
+        # words of each line (0-based), None if the line has to be read again
+        self._lines: list[tuple[str, ...] | None] = []
+        self.counts: dict[str, int] = {}
+        self.sorted: list[str] = []
+
+    def reset(self) -> None:
+        """Forget every word, the whole document is read again on update"""
+
+        self._lines = [None] * self._line_count()
+        self.counts.clear()
+        self.sorted.clear()
+
+    def invalidate(self, line: int, removed: int = 0, added: int = 0) -> None:
+        """Forget the words of lines touched by an edit
+
+        Lines `line` to `line + removed` are replaced by `line` to `line + added`,
+        with the same arguments as `Highlighter.invalidate`."""
+
+        if not self._lines:
+            return
+
+        i = min(max(line, 1), len(self._lines)) - 1
+        removed = min(removed, len(self._lines) - 1 - i)
+
+        gone = []
+        counts = self.counts
+        for words in self._lines[i : i + removed + 1]:
+            for word in words or ():
+                if counts[word] == 1:
+                    del counts[word]
+                    gone.append(word)
+                else:
+                    counts[word] -= 1
+
+        self._lines[i : i + removed + 1] = [None] * (added + 1)
+        if gone:
+            self._sync(gone, removed=True)
+
+    def update(self) -> None:
+        """Read the lines whose words are not known"""
+
+        if len(self._lines) != self._line_count():
+            self.reset()
+
+        lines = self._lines
+        runs = []
+        line = -1
+        while (line := self._next_unknown(line + 1)) is not None:
+            if runs and runs[-1][1] == line - 1:
+                runs[-1][1] = line
+            else:
+                runs.append([line, line])
+
+        new = []
+        counts = self.counts
+        for start, end in runs:
+            content = self.text.get(f"{start + 1}.0", f"{end + 1}.end").split("\n")
+            for line, text in enumerate(content, start):
+                words = lines[line] = tuple(map(sys.intern, WORD.findall(text)))
+                for word in words:
+                    if word in counts:
+                        counts[word] += 1
+                    else:
+                        counts[word] = 1
+                        new.append(word)
+
+        if new:
+            self._sync(new)
+
+    def complete(
+        self,
+        term: str,
+        line: int,
+        exclude: str = "",
+        limit: int = 10,
+        others: list[WordIndex] | None = None,
+    ) -> list[str]:
+        """Words to complete `term` with, best first
+
+        Words starting with `term` come first, ranked by their distance to the
+        cursor, then by how often they occur. Words that only contain `term` are
+        only offered from the lines around the cursor.
+
+        Args:
+            term (str): Start of the word typed
+            line (int): Line of the cursor (1-based)
+            exclude (str): The word being typed, not offered unless it also
+                occurs elsewhere
+            limit (int): Most words returned
+            others (list[WordIndex]): Indexes of other documents whose words are
+                offered after the ones of this document"""
+
+        self.update()
+        nearby = self._nearby(term, line - 1)
+
+        def key(word: str) -> tuple:
+            count = self.counts.get(word, 0) - (word == exclude)
+            return (word != term, nearby.get(word, self.window + 1), -count, word)
+
+        words = [word for word in self.prefixed(term) if self._occurs(word, exclude)]
+        found = heapq.nsmallest(limit, words, key)
+
+        if len(found) < limit:
+            # words containing the term, from the lines around the cursor
+            contained = sorted(
+                (word for word in nearby if not word.startswith(term)), key=key
+            )
+            found.extend(contained[: limit - len(found)])
+
+        seen = set(found)
+        for index in others or ():
+            if len(found) >= limit:
+                break
+            index.update()
+            shared = [word for word in index.prefixed(term) if word not in seen]
+            shared = heapq.nsmallest(
+                limit - len(found), shared, lambda word: -index.counts[word]
+            )
+            found.extend(shared)
+            seen.update(shared)
+
+        return found
+
+    def prefixed(self, term: str) -> list[str]:
+        """Distinct words starting with `term`"""
+
+        start = bisect_left(self.sorted, term)
+        end = bisect_left(self.sorted, term + "\U0010ffff", start)
+        return self.sorted[start:end]
+
+    def _occurs(self, word: str, exclude: str) -> bool:
+        return word != exclude or self.counts[word] > 1
+
+    def _nearby(self, term: str, cursor: int) -> dict[str, int]:
+        """Distance in lines to the cursor of the words around it matching `term`"""
+
+        first = max(cursor - self.window, 0)
+        last = min(cursor + self.window, len(self._lines) - 1)
+
+        distances = {}
+        for line in range(first, last + 1):
+            distance = abs(line - cursor)
+            for word in self._lines[line] or ():
+                if term in word and distance < distances.get(word, self.window + 1):
+                    distances[word] = distance
+        return distances
+
+    def _sync(self, words: list[str], removed: bool = False) -> None:
+        """Bring the sorted array up to date with words added or removed"""
+
+        if len(words) > self.rebuild_size:
+            self.sorted = sorted(self.counts)
+        elif removed:
+            for word in words:
+                i = bisect_left(self.sorted, word)
+                if i < len(self.sorted) and self.sorted[i] == word:
+                    del self.sorted[i]
+        else:
+            for word in words:
+                insort(self.sorted, word)
+
+    def _next_unknown(self, start: int) -> int | None:
+        try:
+            return self._lines.index(None, start)
+        except ValueError:
+            return None
+
+    def _line_count(self) -> int:
+        return int(self.text.index("end-1c").split(".")[0])
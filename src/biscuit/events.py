@@ -278,7 +278,7 @@ class EventManager(GUIManager, ConfigManager):
                 active_text = editor.content.text
                 self.statusbar.set_encoding(active_text.encoding)
                 return self.statusbar.set_line_col_info(
-                    active_text.line, active_text.column, len(active_text.selection)
+                    active_text.line, active_text.column, active_text.selection_length
                 )
 
         self.statusbar.toggle_editmode(False)
@@ -55,7 +55,8 @@ class ExtensionManager:
         # currently loaded extensions
         self.loaded_extensions = {}
         
-        self.fetch_queue = Queue()
+        # extensions to list in the view, handed to it by the UI dispatcher
+        self.fetch_queue = self.base.dispatcher.channel("extensions", batch_size=10)
         self.fetching = threading.Event()
         self.extensions_lock = threading.Lock()
 
@@ -312,18 +313,18 @@ class ExtensionManager:
 
         if not search_string:
             for name, data in self.available_extensions.items():
-                self.fetch_queue.put((name, data))
+                self.fetch_queue.post((name, data))
         else:
             for name, data in self.available_extensions.items():
                 if search_string.lower() in name:
-                    self.fetch_queue.put((name, data))
+                    self.fetch_queue.post((name, data))
 
     def display_all_extensions(self) -> None:
         if self.available_extensions:
             self.base.extensions_view.results.show_content()
 
         for name, data in self.available_extensions.items():
-            self.fetch_queue.put((name, data))
+            self.fetch_queue.post((name, data))
 
     # CLI commands ----------------
 
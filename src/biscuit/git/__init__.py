@@ -3,3 +3,4 @@ from .issue import IssueViewer
 from .pr import PRViewer
 from .releases import Releases
 from .repo import GitRepo
+from .status import GitStatus, GitStatusProvider
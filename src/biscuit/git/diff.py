@@ -1,11 +1,10 @@
-import difflib
 import os
-import re
 import threading
 import tkinter as tk
 
 from ..editor.editorbase import BaseEditor
 from ..editor.text import TextEditor
+from .diffengine import DiffLayout, Hunk
 
 
 class DiffPane(TextEditor):
@@ -22,8 +21,11 @@ class DiffEditor(BaseEditor):
     """Diff Editor
 
     This class is used to show the diff of a file. It uses the `DiffPane` class to show the diff.
-    Standard difflib is used to get the diff of the file. The diff is shown in two panes,
-    LHS shows last commit and RHS shows the current state of the file."""
+    The diff is shown in two panes, LHS shows last commit and RHS shows the current state of the file.
+
+    The diff is worked out in a background thread (see `diffengine`), along with the
+    text and tag ranges of both panes. The panes are then filled on the UI thread with
+    a single insert each, bypassing the change pipeline until they're complete."""
 
     def __init__(
         self,
@@ -46,11 +48,7 @@ class DiffEditor(BaseEditor):
         self.editable = True
         self.standalone = standalone
 
-        self.lhs_data = []
-        self.rhs_data = []
-
-        self.lhs_last_line = 0
-        self.rhs_last_line = 0
+        self.hunks: list[Hunk] = []
 
         self.lhs = DiffPane(self, path, exists=False)
         self.lhs.grid(row=0, column=0, sticky=tk.NSEW, padx=(0, 1))
@@ -58,7 +56,7 @@ class DiffEditor(BaseEditor):
         self.rhs = DiffPane(self, path, exists=False)
         self.rhs.grid(row=0, column=1, sticky=tk.NSEW)
 
-        self.differ = difflib.Differ()
+        self.channel = self.base.dispatcher.channel("diff", self.show_layout)
         self.debugger = self.rhs.debugger
 
         self.left = self.lhs.text
@@ -107,7 +105,7 @@ class DiffEditor(BaseEditor):
     def run_show_diff(self) -> None:
         """Run the show_diff function in a separate thread"""
 
-        threading.Thread(target=self.show_diff).start()
+        threading.Thread(target=self.show_diff, daemon=True).start()
 
     def show_diff(self) -> None:
         """Show the diff of the file"""
@@ -129,42 +127,12 @@ class DiffEditor(BaseEditor):
             "r") as f:
             rhs_data = f.read()
 
-        lhs_lines = [line + "\n" for line in lhs_data.split("\n")]
-        rhs_lines = [line + "\n" for line in rhs_data.split("\n")]
-
-        self.diff = list(self.differ.compare(lhs_lines, rhs_lines))
-        for i, line in enumerate(self.diff):
-            marker = line[0]
-            content = line[2:]
-
-            match marker:
-                case " ":
-                    # line is same in both
-                    self.left.write(content)
-                    self.right.write(content)
-
-                case "-":
-                    # line is only on the left
-                    self.lhs_last_line = int(float(self.left.index(tk.INSERT)))
-                    self.left.write(content, "removal")
-
-                    # TODO this check is done to make sure if this is a line with modifications
-                    # and not a newly added line, but this is not done right.
-                    self.right.insert_newline("removal")
-
-                case "+":
-                    # line is only on the right
-                    self.rhs_last_line = int(float(self.right.index(tk.INSERT)))
-                    self.right.write(content, "addition")
-
-                    # TODO this check is done to make sure if this is a line with modifications
-                    # and not a newly added line, but this is not done right.
-                    self.left.insert_newline("addition")
+        self.channel.post(DiffLayout.compare(lhs_data.split("\n"), rhs_data.split("\n")))
 
     def run_show_git_diff(self) -> None:
         """Run the show_diff_git function in a separate thread"""
 
-        threading.Thread(target=self.show_git_diff).start()
+        threading.Thread(target=self.show_git_diff, daemon=True).start()
 
     def show_git_diff(self) -> None:
         """Show the diff of the file"""
@@ -172,11 +140,8 @@ class DiffEditor(BaseEditor):
         try:
             # case: deleted file
             if not self.kind:
-                self.left.write(
-                    self.base.git.repo.get_commit_filedata(self.path), "removal"
-                )
-                self.left.update()
-                self.left.highlighter.highlight()
+                lhs_data = self.base.git.repo.get_commit_filedata(self.path)
+                self.channel.post(DiffLayout.removed(lhs_data.split("\n")))
                 return
 
             # case: new/untracked file
@@ -184,9 +149,7 @@ class DiffEditor(BaseEditor):
                 with open(
                     os.path.join(self.base.active_directory, self.path), "r"
                 ) as f:
-                    self.right.write(f.read(), "addition")
-                    self.right.update()
-                    self.right.highlighter.highlight()
+                    self.channel.post(DiffLayout.added(f.read().split("\n")))
                 return
 
             # case: modified file
@@ -199,74 +162,26 @@ class DiffEditor(BaseEditor):
             self.base.logger.error(f"Failed to load diff: {self.path}\n{e}")
             return
 
-        lhs_lines = [line + "\n" for line in lhs_data.split("\n")]
-        rhs_lines = [line + "\n" for line in rhs_data.split("\n")]
-
-        self.diff = list(self.differ.compare(lhs_lines, rhs_lines))
-        for i, line in enumerate(self.diff):
-            marker = line[0]
-            content = line[2:]
-
-            match marker:
-                case " ":
-                    # line is same in both
-                    self.left.write(content)
-                    self.right.write(content)
-
-                case "-":
-                    # line is only on the left
-                    self.lhs_last_line = int(float(self.left.index(tk.INSERT)))
-                    self.left.write(content, "removal")
-
-                    # TODO this check is done to make sure if this is a line with modifications
-                    # and not a newly added line, but this is not done right.
-                    self.right.insert_newline("removal")
-
-                case "+":
-                    # line is only on the right
-                    self.rhs_last_line = int(float(self.right.index(tk.INSERT)))
-                    self.right.write(content, "addition")
-
-                    # TODO this check is done to make sure if this is a line with modifications
-                    # and not a newly added line, but this is not done right.
-                    self.left.insert_newline("addition")
-
-                case "?":
-                    # highlight the word changes in the line above
-                    if matches := re.finditer(r"\++", content):
-                        self.left.delete(
-                            str(float(self.rhs_last_line + 1)),
-                            str(float(int(float(self.left.index(tk.INSERT))))))
-                        for match in matches:
-                            start = f"{self.rhs_last_line}.{match.start()}"
-                            end = f"{self.rhs_last_line}.{match.end()}"
-                            self.right.tag_add("addedword", start, end)
-
-                    if matches := re.finditer(r"-+", content):
-                        self.right.delete(
-                            str(float(self.lhs_last_line + 1)),
-                            str(float(int(float(self.right.index(tk.INSERT))))))
-                        for match in matches:
-                            start = f"{self.lhs_last_line}.{match.start()}"
-                            end = f"{self.lhs_last_line}.{match.end()}"
-                            self.left.tag_add("removedword", start, end)
-
-            self.left.update()
-            self.right.update()
-
-        self.left.highlighter.highlight()
-        self.right.highlighter.highlight()
-
-        # Add extra empty lines at the bottom if one side has fewer lines
-        lhs_line_count = int(float(self.left.index(tk.END))) - 1
-        rhs_line_count = int(float(self.right.index(tk.END))) - 1
-        if lhs_line_count > rhs_line_count:
-            extra_newlines = lhs_line_count - rhs_line_count
-            for _ in range(extra_newlines):
-                self.right.insert_newline()
-        elif rhs_line_count > lhs_line_count:
-            extra_newlines = rhs_line_count - lhs_line_count
-            for _ in range(extra_newlines):
-                self.left.insert_newline()
+        self.channel.post(DiffLayout.compare(lhs_data.split("\n"), rhs_data.split("\n")))
+
+    def show_layout(self, layouts: list[DiffLayout]) -> None:
+        """Fill both panes with the computed diff"""
+
+        for layout in layouts:
+            self.hunks = layout.hunks
+            self.fill(self.left, layout.lhs_text, layout.lhs_tags)
+            self.fill(self.right, layout.rhs_text, layout.rhs_tags)
 
         self.left.set_active(False)
+
+    def fill(self, text, content: str, tags: dict[str, list[str]]) -> None:
+        text.loading = True
+        text.delete("1.0", tk.END)
+        text.insert(tk.END, content)
+        for tag, indices in tags.items():
+            text.tag_add(tag, *indices)
+        text.finish_loading()
+
+    def destroy(self) -> None:
+        self.channel.close()
+        super().destroy()
@@ -0,0 +1,393 @@
+from __future__ import annotations
+
+import re
+import typing
+from bisect import bisect_left
+
+# opcodes, as in difflib
+EQUAL, REPLACE, DELETE, INSERT = "equal", "replace", "delete", "insert"
+
+# words, runs of whitespace and single punctuation characters
+TOKEN = re.compile(r"\w+|\s+|[^\w\s]")
+
+
+class Hunk(typing.NamedTuple):
+    """Lines `a[i1:i2]` turned into `b[j1:j2]`"""
+
+    tag: str
+    i1: int
+    i2: int
+    j1: int
+    j2: int
+
+
+def intern(a: list[str], b: list[str]) -> tuple[list[int], list[int]]:
+    """Number the distinct lines of both sides, so they compare as integers"""
+
+    ids: dict[str, int] = {}
+    return (
+        [ids.setdefault(line, len(ids)) for line in a],
+        [ids.setdefault(line, len(ids)) for line in b],
+    )
+
+
+def matching_blocks(
+    a: typing.Sequence, b: typing.Sequence, max_cost: int = 4000
+) -> list[tuple[int, int, int]]:
+    """Runs of equal items of `a` and `b`, as `(i, j, n)` triples in order
+
+    Lines that are unique on both sides are used as anchors first (patience
+    diff), the gaps between them are compared with Myers' algorithm in linear
+    space. Gaps that need more than `max_cost` edits are taken as replaced
+    entirely rather than searched for the shortest edit script, which keeps
+    completely rewritten regions from taking quadratic time."""
+
+    blocks = []
+    for alo, ahi, blo, bhi in patience_gaps(a, b, blocks):
+        if not set(a[alo:ahi]).intersection(b[blo:bhi]):
+            # nothing in common, a replacement
+            continue
+        myers(a, alo, ahi, b, blo, bhi, blocks, max_cost)
+
+    blocks.sort()
+    merged: list[tuple[int, int, int]] = []
+    for i, j, n in blocks:
+        if merged and merged[-1][0] + merged[-1][2] == i and merged[-1][1] + merged[-1][2] == j:
+            pi, pj, pn = merged[-1]
+            merged[-1] = (pi, pj, pn + n)
+        elif n:
+            merged.append((i, j, n))
+    return merged
+
+
+def patience_gaps(
+    a: typing.Sequence, b: typing.Sequence, blocks: list
+) -> list[tuple[int, int, int, int]]:
+    """Add the unique common items to `blocks`, return the ranges between them"""
+
+    alo, blo = 0, 0
+    ahi, bhi = len(a), len(b)
+
+    # common prefix and suffix
+    while alo < ahi and blo < bhi and a[alo] == b[blo]:
+        alo += 1
+        blo += 1
+    while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+        ahi -= 1
+        bhi -= 1
+    if alo:
+        blocks.append((0, 0, alo))
+    if ahi < len(a):
+        blocks.append((ahi, bhi, len(a) - ahi))
+
+    # items occurring exactly once on each side
+    counts: dict[typing.Any, list[int]] = {}
+    for i in range(alo, ahi):
+        entry = counts.setdefault(a[i], [0, 0, i, 0])
+        entry[0] += 1
+    for j in range(blo, bhi):
+        entry = counts.get(b[j])
+        if entry is not None:
+            entry[1] += 1
+            entry[3] = j
+    unique = sorted(
+        (i, j) for count_a, count_b, i, j in counts.values() if count_a == 1 and count_b == 1
+    )
+
+    # longest increasing subsequence of their positions in b, with patience sorting
+    tops: list[int] = []
+    links: list[int] = []
+    piles: list[int] = []
+    for n, (_, j) in enumerate(unique):
+        pile = bisect_left(tops, j)
+        if pile == len(tops):
+            tops.append(j)
+            piles.append(n)
+        else:
+            tops[pile] = j
+            piles[pile] = n
+        links.append(piles[pile - 1] if pile else -1)
+
+    anchors = []
+    n = piles[-1] if piles else -1
+    while n != -1:
+        anchors.append(unique[n])
+        n = links[n]
+    anchors.reverse()
+
+    gaps = []
+    for i, j in anchors:
+        gaps.append((alo, i, blo, j))
+        blocks.append((i, j, 1))
+        alo, blo = i + 1, j + 1
+    gaps.append((alo, ahi, blo, bhi))
+    return gaps
+
+
+def myers(
+    a: typing.Sequence,
+    alo: int,
+    ahi: int,
+    b: typing.Sequence,
+    blo: int,
+    bhi: int,
+    blocks: list,
+    max_cost: int = 4000,
+) -> None:
+    """Add the matches of a shortest edit script of the ranges to `blocks`
+
+    Divide and conquer on the middle snake, in O((N+M)D) time and linear space."""
+
+    stack = [(alo, ahi, blo, bhi)]
+    while stack:
+        alo, ahi, blo, bhi = stack.pop()
+
+        start = alo
+        while alo < ahi and blo < bhi and a[alo] == b[blo]:
+            alo += 1
+            blo += 1
+        if alo > start:
+            blocks.append((start, blo - (alo - start), alo - start))
+        end = ahi
+        while alo < ahi and blo < bhi and a[ahi - 1] == b[bhi - 1]:
+            ahi -= 1
+            bhi -= 1
+        if ahi < end:
+            blocks.append((ahi, bhi, end - ahi))
+        if alo == ahi or blo == bhi:
+            continue
+
+        snake = middle_snake(a, alo, ahi, b, blo, bhi, max_cost)
+        if snake is None:
+            # too different, left as a replacement
+            continue
+
+        x, y, u, v = snake
+        if u > x:
+            blocks.append((alo + x, blo + y, u - x))
+        stack.append((alo + u, ahi, blo + v, bhi))
+        stack.append((alo, alo + x, blo, blo + y))
+
+
+def middle_snake(
+    a: typing.Sequence,
+    alo: int,
+    ahi: int,
+    b: typing.Sequence,
+    blo: int,
+    bhi: int,
+    max_cost: int,
+) -> tuple[int, int, int, int] | None:
+    """Middle snake of the edit graph of the ranges, relative to their start
+
+    None if the shortest edit script is longer than `max_cost`."""
+
+    n = ahi - alo
+    m = bhi - blo
+    delta = n - m
+    odd = delta & 1
+    limit = (n + m + 1) // 2
+    if limit > max_cost // 2 + 1:
+        limit = max_cost // 2 + 1
+
+    # furthest x on each diagonal k, forward from the start and backward from the
+    # end (in reversed coordinates, where diagonal k is `delta - k` going forward).
+    # Negative diagonals are stored from the end of the lists.
+    size = 2 * limit + 4
+    forward = [0] * size
+    backward = [0] * size
+
+    for d in range(limit + 1):
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and forward[k - 1] < forward[k + 1]):
+                x = forward[k + 1]
+            else:
+                x = forward[k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[alo + x] == b[blo + y]:
+                x += 1
+                y += 1
+            forward[k] = x
+            c = delta - k
+            if odd and -d < c < d and x + backward[c] >= n:
+                return x0, y0, x, y
+
+        for k in range(-d, d + 1, 2):
+            if k == -d or (k != d and backward[k - 1] < backward[k + 1]):
+                x = backward[k + 1]
+            else:
+                x = backward[k - 1] + 1
+            y = x - k
+            x0, y0 = x, y
+            while x < n and y < m and a[ahi - 1 - x] == b[bhi - 1 - y]:
+                x += 1
+                y += 1
+            backward[k] = x
+            c = delta - k
+            if not odd and -d <= c <= d and x + forward[c] >= n:
+                return n - x, m - y, n - x0, m - y0
+
+    return None
+
+
+def opcodes(blocks: list[tuple[int, int, int]], n: int, m: int) -> list[Hunk]:
+    """Hunks covering both sides, from the matching blocks of `a[:n]` and `b[:m]`"""
+
+    hunks = []
+    i = j = 0
+    for ai, bj, size in blocks + [(n, m, 0)]:
+        if i < ai and j < bj:
+            hunks.append(Hunk(REPLACE, i, ai, j, bj))
+        elif i < ai:
+            hunks.append(Hunk(DELETE, i, ai, j, bj))
+        elif j < bj:
+            hunks.append(Hunk(INSERT, i, ai, j, bj))
+        if size:
+            hunks.append(Hunk(EQUAL, ai, ai + size, bj, bj + size))
+        i, j = ai + size, bj + size
+    return hunks
+
+
+def diff_lines(a: list[str], b: list[str], max_cost: int = 4000) -> list[Hunk]:
+    """Line diff of `a` and `b`, as hunks covering both sides in order"""
+
+    ia, ib = intern(a, b)
+    return opcodes(matching_blocks(ia, ib, max_cost), len(a), len(b))
+
+
+def diff_words(
+    a: str, b: str
+) -> tuple[list[tuple[int, int]], list[tuple[int, int]]]:
+    """Changed character ranges of a pair of lines, `(removed, added)`
+
+    Lines are compared word by word, adjacent changes are merged."""
+
+    ta = TOKEN.findall(a)
+    tb = TOKEN.findall(b)
+    offsets_a = offsets(ta)
+    offsets_b = offsets(tb)
+
+    removed: list[tuple[int, int]] = []
+    added: list[tuple[int, int]] = []
+    for hunk in diff_lines(ta, tb, max_cost=200):
+        if hunk.tag == EQUAL:
+            continue
+        if hunk.i2 > hunk.i1:
+            span(removed, offsets_a[hunk.i1], offsets_a[hunk.i2])
+        if hunk.j2 > hunk.j1:
+            span(added, offsets_b[hunk.j1], offsets_b[hunk.j2])
+    return removed, added
+
+
+def offsets(tokens: list[str]) -> list[int]:
+    """Start of each token, followed by the total length"""
+
+    result = [0]
+    for token in tokens:
+        result.append(result[-1] + len(token))
+    return result
+
+
+def span(ranges: list[tuple[int, int]], start: int, end: int) -> None:
+    if ranges and ranges[-1][1] == start:
+        ranges[-1] = (ranges[-1][0], end)
+    else:
+        ranges.append((start, end))
+
+
+class DiffLayout:
+    """Contents of the two panes of a side by side diff
+
+    Both sides get the same number of lines: changed lines are paired up and the
+    shorter side of a change is padded with filler lines. Tags are collected as
+    ranges, `{tag: [start, end, start, end, ...]}` in text indices, so that each
+    pane can be filled with a single insert and one `tag add` per tag."""
+
+    def __init__(self) -> None:
+        self.lhs: list[str] = []
+        self.rhs: list[str] = []
+        self.lhs_tags: dict[str, list[str]] = {}
+        self.rhs_tags: dict[str, list[str]] = {}
+        self.hunks: list[Hunk] = []
+
+    @property
+    def lhs_text(self) -> str:
+        return "\n".join(self.lhs)
+
+    @property
+    def rhs_text(self) -> str:
+        return "\n".join(self.rhs)
+
+    @classmethod
+    def removed(cls, lines: list[str]) -> DiffLayout:
+        """Layout of a deleted file"""
+
+        layout = cls()
+        layout.lhs = lines
+        layout.tag_lines(layout.lhs_tags, "removal", 1, len(lines) + 1)
+        return layout
+
+    @classmethod
+    def added(cls, lines: list[str]) -> DiffLayout:
+        """Layout of a new file"""
+
+        layout = cls()
+        layout.rhs = lines
+        layout.tag_lines(layout.rhs_tags, "addition", 1, len(lines) + 1)
+        return layout
+
+    @classmethod
+    def compare(cls, a: list[str], b: list[str], words: bool = True) -> DiffLayout:
+        """Layout of the changes from `a` to `b`
+
+        Args:
+            words (bool): Tag the changed words of paired lines too"""
+
+        layout = cls()
+        layout.hunks = diff_lines(a, b)
+        for hunk in layout.hunks:
+            if hunk.tag == EQUAL:
+                layout.lhs.extend(a[hunk.i1 : hunk.i2])
+                layout.rhs.extend(b[hunk.j1 : hunk.j2])
+                continue
+
+            old = a[hunk.i1 : hunk.i2]
+            new = b[hunk.j1 : hunk.j2]
+            line = len(layout.lhs) + 1
+            if words:
+                for n, (removed, added) in enumerate(zip(old, new)):
+                    removed, added = diff_words(removed, added)
+                    layout.tag_chars(layout.lhs_tags, "removedword", line + n, removed)
+                    layout.tag_chars(layout.rhs_tags, "addedword", line + n, added)
+
+            # changed lines, then filler lines on the shorter side
+            layout.tag_lines(layout.lhs_tags, "removal", line, line + len(old))
+            layout.tag_lines(layout.rhs_tags, "addition", line, line + len(new))
+            if len(old) > len(new):
+                layout.tag_lines(layout.rhs_tags, "removal", line + len(new), line + len(old))
+            elif len(new) > len(old):
+                layout.tag_lines(layout.lhs_tags, "addition", line + len(old), line + len(new))
+
+            lines = max(len(old), len(new))
+            layout.lhs.extend(old + [""] * (lines - len(old)))
+            layout.rhs.extend(new + [""] * (lines - len(new)))
+
+        return layout
+
+    @staticmethod
+    def tag_lines(tags: dict[str, list[str]], tag: str, first: int, last: int) -> None:
+        """Tag the lines `first` up to `last` (exclusive), newlines included"""
+
+        if first < last:
+            tags.setdefault(tag, []).extend((f"{first}.0", f"{last}.0"))
+
+    @staticmethod
+    def tag_chars(
+        tags: dict[str, list[str]], tag: str, line: int, ranges: list[tuple[int, int]]
+    ) -> None:
+        if not ranges:
+            return
+        indices = tags.setdefault(tag, [])
+        for start, end in ranges:
+            indices.extend((f"{line}.{start}", f"{line}.{end}"))
@@ -18,6 +18,7 @@ try:
 
     from .ignore import GitIgnore
     from .repo import GitRepo
+    from .status import GitStatusProvider
 except ImportError:
     messagebox.showerror(
         "Git not found",
@@ -38,7 +39,10 @@ class Git(git.Git):
         super().__init__(*args, **kwargs)
         self.base = master
         self.repo: GitRepo = None
+        self.repos: dict[str, GitRepo] = {}
         self.ignore = GitIgnore(self)
+        # status of the open repository, read once and shared by all the views
+        self.status = GitStatusProvider(self)
         self.branches = {}
 
         self.actionset = ActionSet(
@@ -78,7 +82,11 @@ class Git(git.Git):
             return False, None
 
         try:
-            repo = GitRepo(self, dir)
+            # repositories are opened once
+            dir = os.path.abspath(dir)
+            repo = self.repos.get(dir)
+            if repo is None or not os.path.isdir(repo.git_dir):
+                repo = self.repos[dir] = GitRepo(self, dir)
             self.ignore.load()
 
         except Exception as e:  # git.exc.InvalidGitRepositoryError
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import os
+import re
+import threading
 import typing
 
 if typing.TYPE_CHECKING:
@@ -9,27 +11,322 @@ if typing.TYPE_CHECKING:
     from .git import Git
 
 
+class IgnoreRule(typing.NamedTuple):
+    pattern: re.Pattern
+    negated: bool
+    dir_only: bool
+    # matched against the path relative to the directory of the ignore file if
+    # anchored, else against the name alone
+    anchored: bool
+
+
+def compile_pattern(line: str) -> IgnoreRule | None:
+    """Compile a line of a gitignore file, None for blank lines and comments"""
+
+    if not line or line.startswith("#"):
+        return None
+
+    # trailing spaces are dropped unless escaped
+    stripped = line.rstrip(" ")
+    if stripped.endswith("\\") and len(stripped) < len(line):
+        stripped += " "
+    line = stripped
+    if not line:
+        return None
+
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith("\\!") or line.startswith("\\#"):
+        line = line[1:]
+
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+
+    anchored = "/" in line
+    line = line.lstrip("/")
+
+    return IgnoreRule(re.compile(translate(line), re.S), negated, dir_only, anchored)
+
+
+def translate(glob: str) -> str:
+    """Regex for a gitignore glob, `*` and `?` don't match `/`, `**` matches across them"""
+
+    parts = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if glob.startswith("**", i):
+            before = i == 0 or glob[i - 1] == "/"
+            after = i + 2 == n or glob[i + 2] == "/"
+            if before and after:
+                if i + 2 == n:
+                    # trailing `/**`, everything inside
+                    parts.append(".*")
+                    i += 2
+                else:
+                    # leading `**/` or `/**/`, zero or more directories
+                    parts.append("(?:.*/)?")
+                    i += 3
+                continue
+            parts.append("[^/]*")
+            i += 2
+        elif c == "*":
+            parts.append("[^/]*")
+            i += 1
+        elif c == "?":
+            parts.append("[^/]")
+            i += 1
+        elif c == "[":
+            j = i + 1
+            if j < n and glob[j] in "!^":
+                j += 1
+            if j < n and glob[j] == "]":
+                j += 1
+            while j < n and glob[j] != "]":
+                j += 1
+            if j >= n:
+                parts.append("\\[")
+                i += 1
+                continue
+            chars = glob[i + 1 : j]
+            if chars[0] in "!^":
+                chars = "^" + chars[1:]
+            parts.append("[" + chars.replace("\\", "\\\\") + "]")
+            i = j + 1
+        elif c == "\\" and i + 1 < n:
+            parts.append(re.escape(glob[i + 1]))
+            i += 2
+        else:
+            parts.append(re.escape(c))
+            i += 1
+
+    return "".join(parts) + r"\Z"
+
+
+def match_rules(
+    rules: list[IgnoreRule], target: str, name: str, isdir: bool, slash: bool = False
+) -> bool | None:
+    """Whether the last rule matching a path ignores it, None if no rule matches
+
+    Args:
+        target (str): Path relative to the directory of the rules
+        name (str): Last component of the path
+        isdir (bool): Whether the path is a directory
+        slash (bool): Also match the directory with a trailing `/`, the way
+            `git check-ignore dir/` does, so that `dir/**` covers `dir/` too"""
+
+    for rule in reversed(rules):
+        if rule.dir_only and not isdir:
+            continue
+        if rule.anchored:
+            matched = rule.pattern.match(target) or (
+                slash and rule.pattern.match(target + "/")
+            )
+        else:
+            matched = rule.pattern.match(name)
+        if matched:
+            return not rule.negated
+
+    return None
+
+
+def parse_rules(path: str) -> list[IgnoreRule]:
+    """Rules of an ignore file, empty if it doesn't exist"""
+
+    try:
+        with open(path, encoding="utf-8", errors="replace") as f:
+            lines = f.read().splitlines()
+    except OSError:
+        return []
+
+    return [rule for line in lines if (rule := compile_pattern(line))]
+
+
 class GitIgnore:
+    """Gitignore rules of the open repository
+
+    Ignored paths are worked out in-process, without launching git. The rules of
+    `.git/info/exclude`, the global excludes file and the `.gitignore` of each
+    directory are read once, when first needed, and whether a directory is
+    ignored is remembered, so everything inside it is settled by a lookup.
+    Like `git check-ignore`, tracked files and directories containing tracked
+    files are never reported as ignored.
+
+    `invalidate` drops the rules read, for when a .gitignore changed. The repository
+    and the exclude file are checked for changes on every call. The tracked files
+    are only looked up for paths the rules ignore, and the index is read again
+    only when its modification time or size changed since."""
+
     def __init__(self, git):
         self.git: Git = git
         self.base: App = git.base
         self.path = ""
         self.repo = self.git.repo
 
+        self.root = ""
+        # rules by directory (relative to the root, "" for the root)
+        self.rules: dict[str, list[IgnoreRule]] = {}
+        # the global excludes file then info/exclude, later rules take precedence
+        self.excludes: list[IgnoreRule] = []
+        # ignored verdicts of the directories checked so far
+        self.dirs: dict[str, bool] = {}
+        # tracked files and the directories containing them are never reported
+        self.tracked: set[str] = set()
+        self.tracked_dirs: set[str] = set()
+        # the root and the modification time of the exclude file when read
+        self.stamps: tuple = ()
+        # path, and modification time and size of the index when it was read
+        self.index = ""
+        self.index_stamp: tuple = ()
+        self._lock = threading.RLock()
+
     def load(self) -> None:
         if not self.base.git_found:
             return
 
         self.repo = self.git.repo
         self.path = os.path.join(self.base.active_directory, ".gitignore")
+        self.invalidate()
+
+    def invalidate(self, *_) -> None:
+        """Forget the .gitignore rules and verdicts, they're read again when needed"""
+
+        with self._lock:
+            self.rules.clear()
+            self.dirs.clear()
 
     def check(self, path: list[str]) -> list:
-        """returns list of ignored files"""
+        """returns list of ignored files
 
-        if not self.base.git_found:
+        Paths are relative to the root of the repository or absolute, directories
+        are marked with a trailing `/`."""
+
+        if not self.base.git_found or not self.git.repo:
             return []
 
-        return self.git.repo.ignored(path)
+        with self._lock:
+            self.prepare()
+            if not self.root:
+                return []
+
+            ignored = []
+            for p in path:
+                rel = p.replace("\\", "/")
+                isdir = rel.endswith("/")
+                if os.path.isabs(rel):
+                    try:
+                        rel = os.path.relpath(rel, self.root).replace("\\", "/")
+                    except ValueError:
+                        # on another drive
+                        continue
+                rel = rel.strip("/")
+                if not rel or rel.startswith("../") or rel == "..":
+                    continue
+                if self.is_ignored(rel, isdir, slash=isdir) and not self.is_tracked(
+                    rel, isdir
+                ):
+                    ignored.append(p)
+
+            return ignored
+
+    def prepare(self) -> None:
+        """Read the repository wide rules if they changed"""
+
+        repo = self.git.repo
+        root = (repo.working_tree_dir or "") if repo else ""
+        git_dir = repo.git_dir if repo else ""
+
+        exclude = os.path.join(git_dir, "info", "exclude")
+        stamps = (root, stat(exclude)[0])
+        if stamps == self.stamps:
+            return
+
+        self.rules.clear()
+        self.excludes = parse_rules(self.global_excludes()) + parse_rules(exclude)
+        self.root = root
+        self.dirs.clear()
+        self.stamps = stamps
+        self.index = os.path.join(git_dir, "index")
+        self.index_stamp = ()
+
+    def is_tracked(self, rel: str, isdir: bool) -> bool:
+        """Whether a file is tracked, or a directory contains tracked files
+
+        The index is read again if its modification time or size changed."""
+
+        stamp = stat(self.index)
+        if stamp != self.index_stamp:
+            self.index_stamp = stamp
+            try:
+                self.tracked = {path for path, _ in self.git.repo.index.entries}
+            except Exception:
+                self.tracked = set()
+
+            self.tracked_dirs = set()
+            for path in self.tracked:
+                while (path := path.rpartition("/")[0]) and path not in self.tracked_dirs:
+                    self.tracked_dirs.add(path)
+
+        return rel in (self.tracked_dirs if isdir else self.tracked)
+
+    def global_excludes(self) -> str:
+        path = ""
+        try:
+            path = self.git.repo.config_reader().get_value("core", "excludesfile", "")
+        except Exception:
+            pass
+        if not path:
+            config = os.environ.get("XDG_CONFIG_HOME") or os.path.join("~", ".config")
+            path = os.path.join(config, "git", "ignore")
+        return os.path.expanduser(str(path))
+
+    def is_ignored(self, rel: str, isdir: bool, slash: bool = False) -> bool:
+        """Whether the rules ignore a path relative to the root, tracked or not"""
+
+        cached = isdir and not slash
+        if cached and (verdict := self.dirs.get(rel)) is not None:
+            return verdict
+
+        # nothing inside an ignored directory can be included again
+        parent = rel.rpartition("/")[0]
+        if parent and self.is_ignored(parent, True):
+            verdict = True
+        else:
+            verdict = self.match(rel, isdir, slash)
+
+        if cached:
+            self.dirs[rel] = verdict
+        return verdict
+
+    def match(self, rel: str, isdir: bool, slash: bool = False) -> bool:
+        """Result of the rules for a path whose parent directory is not ignored"""
+
+        name = rel.rpartition("/")[2]
+        directory = rel.rpartition("/")[0]
+
+        # the closest .gitignore decides, then the ones above it, then the excludes
+        while True:
+            target = rel[len(directory) + 1 :] if directory else rel
+            verdict = match_rules(self.dir_rules(directory), target, name, isdir, slash)
+            if verdict is not None:
+                return verdict
+            if not directory:
+                break
+            directory = directory.rpartition("/")[0]
+
+        return bool(match_rules(self.excludes, rel, name, isdir, slash))
+
+    def dir_rules(self, directory: str) -> list[IgnoreRule]:
+        try:
+            return self.rules[directory]
+        except KeyError:
+            rules = self.rules[directory] = parse_rules(
+                os.path.join(self.root, directory, ".gitignore")
+            )
+            return rules
 
     def add(self, path: str) -> None:
         """Add the given path to the .gitignore file."""
@@ -38,7 +335,8 @@ class GitIgnore:
             return
 
         with open(self.path, "a") as f:
-            f.write("\n" + path.replace("\\" "/"))
+            f.write("\n" + path.replace("\\", "/"))
+        self.invalidate()
 
     def exclude(self, path: str) -> None:
         """Exclude the given path from the .gitignore file."""
@@ -48,3 +346,14 @@ class GitIgnore:
 
         with open(self.path, "a") as f:
             f.write("\n!" + path.replace("\\", "/"))
+        self.invalidate()
+
+
+def stat(path: str) -> tuple[int, int]:
+    """Modification time and size of a file, zeros if it doesn't exist"""
+
+    try:
+        st = os.stat(path)
+    except OSError:
+        return 0, 0
+    return st.st_mtime_ns, st.st_size
@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+import os
+import subprocess
+import threading
+import time
+import typing
+from dataclasses import dataclass, field
+
+if typing.TYPE_CHECKING:
+    from .git import Git
+
+# change kinds, as used by the source control view
+DELETED, ADDED, MODIFIED, UNTRACKED = range(4)
+
+STAGED_KINDS = {"M": MODIFIED, "T": MODIFIED, "A": ADDED, "D": DELETED, "R": ADDED, "C": ADDED}
+UNSTAGED_KINDS = {"M": MODIFIED, "T": MODIFIED, "A": ADDED, "D": DELETED}
+
+
+@dataclass
+class GitStatus:
+    """Snapshot of the status of a repository
+
+    Paths are relative to the root of the repository, with `/` separators.
+    `staged` and `unstaged` map the changed paths to their change kind."""
+
+    root: str = ""
+    branch: str = ""
+    commit: str = ""
+    upstream: str = ""
+    ahead: int = 0
+    behind: int = 0
+    staged: dict[str, int] = field(default_factory=dict)
+    unstaged: dict[str, int] = field(default_factory=dict)
+    conflicted: set[str] = field(default_factory=set)
+    # directories containing changes, with a trailing `/`
+    changed_dirs: set[str] = field(default_factory=set)
+
+    def relative(self, path: str) -> str:
+        """Path relative to the repository, `path` can be absolute"""
+
+        if os.path.isabs(path):
+            try:
+                path = os.path.relpath(path, self.root)
+            except ValueError:
+                # on another drive
+                pass
+        return path.replace("\\", "/")
+
+    def kind(self, path: str) -> int | None:
+        """Change kind of a file, unstaged changes first, None if it's unchanged"""
+
+        path = self.relative(path)
+        kind = self.unstaged.get(path)
+        return self.staged.get(path) if kind is None else kind
+
+    def decoration(self, path: str, isdir: bool = False) -> str:
+        """Explorer tag for a file or directory, empty if it's unchanged"""
+
+        path = self.relative(path)
+        if isdir:
+            return "modified" if path.rstrip("/") + "/" in self.changed_dirs else ""
+        if path in self.conflicted:
+            return "conflicted"
+
+        kind = self.kind(path)
+        if kind is None:
+            return ""
+        return ("deleted", "added", "modified", "untracked")[kind]
+
+
+def parse_status(data: bytes, root: str = "") -> GitStatus:
+    """Parse the output of `git status --porcelain=v2 --branch -z`"""
+
+    status = GitStatus(root=root)
+    entries = data.decode("utf-8", errors="replace").split("\0")
+
+    i = 0
+    while i < len(entries):
+        entry = entries[i]
+        i += 1
+        if not entry:
+            continue
+
+        match entry[0]:
+            case "#":
+                _, key, *value = entry.split(" ", 2)
+                value = value[0] if value else ""
+                if key == "branch.oid":
+                    status.commit = value
+                elif key == "branch.head":
+                    status.branch = value
+                elif key == "branch.upstream":
+                    status.upstream = value
+                elif key == "branch.ab":
+                    ahead, behind = value.split(" ")
+                    status.ahead, status.behind = int(ahead), -int(behind)
+            case "1":
+                # 1 XY sub mH mI mW hH hI path
+                fields = entry.split(" ", 8)
+                add_change(status, fields[1], fields[8])
+            case "2":
+                # 2 XY sub mH mI mW hH hI Xscore path, original path in the next entry
+                fields = entry.split(" ", 9)
+                add_change(status, fields[1], fields[9])
+                if i < len(entries):
+                    status.staged.setdefault(entries[i], DELETED)
+                    i += 1
+            case "u":
+                # u XY sub m1 m2 m3 mW h1 h2 h3 path
+                path = entry.split(" ", 10)[10]
+                status.conflicted.add(path)
+                status.unstaged[path] = MODIFIED
+            case "?":
+                status.unstaged[entry[2:]] = UNTRACKED
+
+    for path in list(status.staged) + list(status.unstaged):
+        parts = path.split("/")[:-1]
+        for n in range(1, len(parts) + 1):
+            status.changed_dirs.add("/".join(parts[:n]) + "/")
+
+    return status
+
+
+def add_change(status: GitStatus, xy: str, path: str) -> None:
+    if (kind := STAGED_KINDS.get(xy[0])) is not None:
+        status.staged[path] = kind
+    if (kind := UNSTAGED_KINDS.get(xy[1])) is not None:
+        status.unstaged[path] = kind
+
+
+class GitStatusProvider:
+    """Status of the open repository, shared by everything that shows it
+
+    The status is read with a single `git status --porcelain=v2` in a background
+    thread and kept as a `GitStatus` snapshot. `refresh` can be called as often as
+    needed from any thread: requests made within `delay` seconds of each other are
+    served by one run. Callbacks registered with `subscribe` get each new snapshot
+    on the UI thread."""
+
+    # seconds to wait for more requests before reading the status
+    delay = 0.3
+
+    def __init__(self, git: Git) -> None:
+        self.git = git
+        self.base = git.base
+        self.snapshot = GitStatus()
+        self.callbacks: list[typing.Callable[[GitStatus], typing.Any]] = []
+
+        self.channel = self.base.dispatcher.channel("git status", self.on_status)
+        self._requested = threading.Event()
+        self._worker: threading.Thread | None = None
+
+    def subscribe(self, callback: typing.Callable[[GitStatus], typing.Any]) -> None:
+        self.callbacks.append(callback)
+
+    @property
+    def root(self) -> str:
+        repo = self.git.repo
+        return (repo.working_tree_dir or "") if repo else ""
+
+    def refresh(self, *_) -> None:
+        """Request the status to be read again. Safe to call from any thread."""
+
+        self._requested.set()
+        if self._worker is None:
+            self._worker = threading.Thread(target=self.run, daemon=True)
+            self._worker.start()
+
+    def run(self) -> None:
+        while True:
+            self._requested.wait()
+            # let a burst of requests (eg. from the file watcher) settle
+            time.sleep(self.delay)
+            self._requested.clear()
+
+            root = self.root
+            try:
+                status = self.read(root) if root else GitStatus()
+            except (OSError, subprocess.CalledProcessError) as e:
+                self.base.logger.error(f"Reading git status failed: {e}")
+                continue
+
+            self.channel.post(status)
+
+    def read(self, root: str) -> GitStatus:
+        out = subprocess.run(
+            [
+                "git",
+                "status",
+                "--porcelain=v2",
+                "--branch",
+                "--untracked-files=all",
+                "-z",
+            ],
+            cwd=root,
+            capture_output=True,
+            check=True,
+            **(
+                {"creationflags": subprocess.CREATE_NO_WINDOW}
+                if os.name == "nt"
+                else {}
+            ),
+        ).stdout
+        return parse_status(out, root)
+
+    def on_status(self, snapshots: list[GitStatus]) -> None:
+        status = snapshots[-1] if snapshots else None
+        if status is None or status.root != self.root:
+            # repository changed while reading
+            return
+
+        self.snapshot = status
+        for callback in self.callbacks:
+            try:
+                callback(status)
+            except Exception as e:
+                self.base.logger.error(f"Git status update failed: {e}")
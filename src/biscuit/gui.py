@@ -260,6 +260,7 @@ class GUIManager(Tk, ConfigManager):
         self.history.dump()
 
         self.editorsmanager.delete_all_editors()
+        self.dispatcher.destroy()
         self.destroy()
 
     def resize(self, mode: str) -> None:
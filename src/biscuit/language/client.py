@@ -7,6 +7,7 @@ from __future__ import annotations
 
 import itertools
 import typing
+from dataclasses import replace
 from pathlib import Path
 
 import tarts as lsp
@@ -19,6 +20,7 @@ from .utils import *
 
 if typing.TYPE_CHECKING:
     from biscuit.editor import Text
+    from biscuit.editor.text.changes import Change
 
     from . import LanguageServerManager
 
@@ -69,8 +71,19 @@ class LangServerClient:
         self.tabs_opened: set[Text] = set()
         self._count = 0
 
+        # how the server wants documents synced, updated once it is initialized
+        self.sync_kind = lsp.TextDocumentSyncKind.FULL
+        # changes waiting to be sent per tab, None when the whole text has to be sent
+        self.pending_changes: dict[Text, list[Change] | None] = {}
+        # changes made within this many milliseconds are sent together
+        self.sync_delay = 50
+        self._sync_job = None
+        # tabs whose text may have characters above U+FFFF, their columns don't match
+        # LSP positions so they are always synced as a whole
+        self.wide_tabs: set[Text] = set()
+
         self.root_uri = Path(self.root_dir).as_uri()
-        self.io = IO(self, self.command, self.root_dir)
+        self.io = IO(self, self.command, self.root_dir, callback=self.run)
         self.io.start()
         self.client = lsp.Client(
             process_id=self.io.p.pid,
@@ -80,18 +93,22 @@ class LangServerClient:
         self.handler = EventHandler(self)
 
     def run_loop(self) -> None:
-        """Run the language server client loop"""
+        """Start the language server client
 
-        if self.run():
-            self.base.after(50, self.run_loop)
+        There is no polling, outgoing messages are sent as soon as they are made and
+        the IO wakes the client up with `run` when messages are received."""
 
-    def run(self):
-        """Run the language server client"""
+        self.send()
+
+    def run(self) -> bool:
+        """Process the messages received from the language server
+
+        Returns:
+            bool: False once the language server has exited"""
 
-        self.io.write(self.client.send())
         r = self.io.read()
 
-        if not r:
+        if r is None:
             return True
         elif r == b"":
             return False
@@ -102,8 +119,16 @@ class LangServerClient:
         except Exception as e:
             print(e)
 
+        # replies made while handling the events
+        self.send()
         return True
 
+    def send(self) -> None:
+        """Send the queued changes and all pending messages to the language server"""
+
+        self.flush_changes()
+        self.io.write(self.client.send())
+
     def open_tab(self, tab: Text) -> None:
         """Send the did_open message to the language server client
 
@@ -113,13 +138,17 @@ class LangServerClient:
         self.tabs_opened.add(tab)
 
         if self.client.state == lsp.ClientState.NORMAL:
+            self.pending_changes.pop(tab, None)
+            text = tab.get_all_text()
+            self._track_wide_chars(tab, text)
             self.client.did_open(
                 lsp.TextDocumentItem(
                     uri=Path(tab.path).as_uri(),
                     languageId=self.language,
-                    text=tab.get_all_text(),
+                    text=text,
                     version=next(self._counter))
             )
+            self.send()
 
     def close_tab(self, tab: Text) -> None:
         """Send the did_close message to the language server client
@@ -131,10 +160,13 @@ class LangServerClient:
             return
 
         self.tabs_opened.remove(tab)
+        self.pending_changes.pop(tab, None)
+        self.wide_tabs.discard(tab)
         if self.client.state == lsp.ClientState.NORMAL:
             self.client.did_close(
                 lsp.TextDocumentIdentifier(uri=Path(tab.path).as_uri())
             )
+            self.send()
 
         if not self.tabs_opened:
 
@@ -156,6 +188,8 @@ class LangServerClient:
         if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
             return
 
+        self.flush_changes()
+
         request = CompletionRequest(next(self._counter), tab.get_cursor_pos())
         req_id = self.client.completion(
             text_document_position=lsp.TextDocumentPosition(
@@ -166,6 +200,7 @@ class LangServerClient:
             ))
 
         self.completion_requests[req_id] = (tab, request)
+        self.send()
 
     def request_hover(self, tab: Text) -> None:
         """Request hover information from the language server
@@ -176,12 +211,15 @@ class LangServerClient:
         if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
             return
 
+        self.flush_changes()
+
         request_id = self.client.hover(
             lsp.TextDocumentPosition(
                 textDocument=lsp.TextDocumentIdentifier(uri=Path(tab.path).as_uri()),
                 position=encode_position(tab.get_mouse_pos()))
         )
         self.hover_requests[request_id] = (tab, tab.get_mouse_pos())
+        self.send()
 
     def request_go_to_definition(self, tab: Text) -> None:
         """Request go to definition from the language server
@@ -192,6 +230,8 @@ class LangServerClient:
         if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
             return
 
+        self.flush_changes()
+
         # very bad hack to ignore mouse and use cursor position
         tab.focus_set()
         pos = tab.get_mouse_pos()
@@ -204,6 +244,7 @@ class LangServerClient:
                 position=encode_position(pos))
         )
         self.gotodef_requests[request_id] = (tab, pos)
+        self.send()
 
     def request_references(self, tab: Text) -> None:
         """Request references from the language server
@@ -214,6 +255,8 @@ class LangServerClient:
         if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
             return
 
+        self.flush_changes()
+
         tab.focus_set()
         pos = tab.get_mouse_pos()
         if pos == "1.0":
@@ -225,6 +268,7 @@ class LangServerClient:
                 position=encode_position(pos))
         )
         self.ref_requests.append((tab, pos))
+        self.send()
 
     def request_rename(self, tab: Text, new_name: str) -> None:
         """Request rename from the language server
@@ -236,6 +280,8 @@ class LangServerClient:
         if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
             return
 
+        self.flush_changes()
+
         tab.focus_set()
         pos = tab.get_cursor_pos()
 
@@ -245,6 +291,7 @@ class LangServerClient:
                 position=encode_position(pos)),
             new_name=new_name)
         self.rename_requests[request_id] = tab
+        self.send()
 
     def request_outline(self, tab: Text) -> None:
         """Request outline from the language server
@@ -255,28 +302,163 @@ class LangServerClient:
         if tab.path is None or self.client.state != lsp.ClientState.NORMAL:
             return
 
+        self.flush_changes()
+
         request_id = self.client.documentSymbol(
             lsp.TextDocumentIdentifier(uri=Path(tab.path).as_uri()))
         self.outline_requests[request_id] = tab
+        self.send()
 
-    def send_change_events(self, tab: Text) -> None:
-        """Send the did_change message to the language server client
+    def update_capabilities(self, capabilities: dict) -> None:
+        """Read the capabilities the language server advertised on initialization
 
         Args:
-            tab (Text): The tab that has changed"""
+            capabilities (dict): The server capabilities"""
+
+        sync = capabilities.get("textDocumentSync", lsp.TextDocumentSyncKind.FULL)
+        if isinstance(sync, dict):
+            sync = sync.get("change", lsp.TextDocumentSyncKind.FULL)
+
+        try:
+            self.sync_kind = lsp.TextDocumentSyncKind(sync)
+        except ValueError:
+            self.sync_kind = lsp.TextDocumentSyncKind.FULL
+
+    def queue_change(self, tab: Text, change: Change | None = None) -> None:
+        """Queue a change to be sent with the next did_change message
+
+        Changes made within `sync_delay` milliseconds are sent together, consecutive
+        typing and deleting is merged into a single range change.
+
+        Args:
+            tab (Text): The tab that has changed
+            change (Change, optional): The change, the whole text is sent if None"""
 
         if self.client.state != lsp.ClientState.NORMAL:
+            # the text is sent as a whole with did_open once initialized
+            return
+
+        if change is not None and has_wide_chars(change.new_text):
+            self.wide_tabs.add(tab)
+
+        if (
+            change is None
+            or self.sync_kind != lsp.TextDocumentSyncKind.INCREMENTAL
+            or tab in self.wide_tabs
+            or (tab in self.pending_changes and self.pending_changes[tab] is None)
+        ):
+            self.pending_changes[tab] = None
+            self._schedule_sync()
             return
 
+        changes = self.pending_changes.setdefault(tab, [])
+        if not (changes and coalesce(changes[-1], change)):
+            # changes are shared with the undo history, never modify them in place
+            changes.append(replace(change))
+        self._schedule_sync()
+
+    def _schedule_sync(self) -> None:
+        if self._sync_job is None:
+            self._sync_job = self.base.after(self.sync_delay, self._sync)
+
+    def _sync(self) -> None:
+        self._sync_job = None
+        self.send()
+
+    def flush_changes(self) -> None:
+        """Send all queued changes to the language server"""
+
+        if not self.pending_changes:
+            return
+
+        pending, self.pending_changes = self.pending_changes, {}
+        for tab, changes in pending.items():
+            try:
+                self.send_change_events(tab, changes)
+            except Exception as e:
+                self.base.logger.error(f"Failed to sync {tab.path}: {e}")
+
+    def send_change_events(self, tab: Text, changes: list[Change] | None = None) -> None:
+        """Send the did_change message to the language server client
+
+        Args:
+            tab (Text): The tab that has changed
+            changes (list[Change], optional): Changes in the order they were made,
+                the whole text is sent if None"""
+
+        if (
+            self.client.state != lsp.ClientState.NORMAL
+            or self.sync_kind == lsp.TextDocumentSyncKind.NONE
+        ):
+            return
+
+        if changes is None:
+            text = tab.get_all_text()
+            self._track_wide_chars(tab, text)
+            content_changes = [
+                lsp.TextDocumentContentChangeEvent.whole_document_change(text)
+            ]
+        else:
+            content_changes = [
+                lsp.TextDocumentContentChangeEvent(
+                    range=lsp.Range(
+                        start=encode_position(change.start),
+                        end=encode_position(change.old_end),
+                    ),
+                    rangeLength=None,
+                    text=change.new_text,
+                )
+                for change in changes
+            ]
+
         self.client.did_change(
             text_document=lsp.VersionedTextDocumentIdentifier(
                 uri=Path(tab.path).as_uri(), version=next(self._counter)
             ),
-            content_changes=[
-                lsp.TextDocumentContentChangeEvent(
-                    # range=lsp.Range(
-                    #     start=encode_position(tab.get_begin()),
-                    #     end=encode_position(tab.get_end()),
-                    # ),
-                    text=tab.get_all_text())
-            ])
+            content_changes=content_changes,
+        )
+
+    def _track_wide_chars(self, tab: Text, text: str) -> None:
+        if has_wide_chars(text):
+            self.wide_tabs.add(tab)
+        else:
+            self.wide_tabs.discard(tab)
+
+
+def coalesce(last: Change, change: Change) -> bool:
+    """Merge a change into the one queued right before it, if they are contiguous
+
+    Args:
+        last (Change): The queued change, modified in place
+        change (Change): The change made after it
+
+    Returns:
+        bool: Whether the change was merged"""
+
+    if not change.old_text and change.start == last.new_end:
+        # typing
+        last.new_text += change.new_text
+        last.new_end = change.new_end
+        return True
+
+    if change.new_text:
+        return False
+
+    if (
+        change.old_end == last.new_end
+        and change.start >= last.start
+        and last.new_text.endswith(change.old_text)
+    ):
+        # deleting what was just typed
+        last.new_text = last.new_text[: len(last.new_text) - len(change.old_text)]
+        last.new_end = change.start
+        return True
+
+    if not last.new_text and change.old_end == last.start:
+        # backspacing
+        last.start = change.start
+        last.new_end = change.start
+        last.old_text = change.old_text + last.old_text
+        return True
+
+    return False
@@ -1,11 +1,12 @@
 from __future__ import annotations
 
-import pprint
 import re
 import typing
 
 import tarts as lsp
 
+from biscuit.common.logbuffer import Pretty
+
 from .data import *
 from .utils import *
 
@@ -52,7 +53,8 @@ class EventHandler:
             return
 
         if isinstance(e, lsp.Initialized):
-            self.base.logger.info("Capabilities " + pprint.pformat(e.capabilities))
+            self.base.logger.info("Capabilities %s", Pretty(e.capabilities))
+            self.master.update_capabilities(e.capabilities)
             for tab in self.master.tabs_opened:
                 self.master.open_tab(tab)
                 # self.master.request_outline(tab)
@@ -12,6 +12,7 @@ from .utils import decode_position
 if typing.TYPE_CHECKING:
     from biscuit import App
     from biscuit.editor.text import Text
+    from biscuit.editor.text.changes import Change
 
 
 class LanguageServerManager:
@@ -126,12 +127,16 @@ class LanguageServerManager:
             if tab in instance.tabs_opened:
                 instance.request_outline(tab)
 
-    def content_changed(self, tab: Text) -> None:
-        """Content of a tab has changed, notify the language server about it"""
+    def content_changed(self, tab: Text, change: Change | None = None) -> None:
+        """Content of a tab has changed, notify the language server about it
+
+        Args:
+            tab (Text): The tab that has changed
+            change (Change, optional): The edit made, the whole text is synced if None"""
 
         for instance in list(self.existing.values()):
             if tab in instance.tabs_opened:
-                instance.send_change_events(tab)
+                instance.queue_change(tab, change)
 
     def request_client_instance(self, tab: Text) -> LangServerClient | None:
         """Request a language server client instance for a specific language and workspace root directory.
@@ -186,6 +191,7 @@ class LanguageServerManager:
         self.existing.pop((instance.root_dir, instance.language))
         if instance.client.state == lsp.ClientState.NORMAL:
             instance.client.shutdown()
+            instance.send()
         else:
             instance.io.p.kill()
 
@@ -24,6 +24,7 @@ OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
 SOFTWARE.
 """
 
+import re
 import sys
 from pathlib import Path
 from typing import Iterator, Optional
@@ -124,6 +125,18 @@ def encode_position(pos: str | list[int]) -> lsp.Position:
     return lsp.Position(line=line - 1, character=column)
 
 
+_outside_bmp = re.compile("[\U00010000-\U0010FFFF]")
+
+
+def has_wide_chars(text: str) -> bool:
+    """Whether the text has characters that take two UTF-16 code units
+
+    LSP positions count UTF-16 code units while text widget columns count code
+    points, the two only agree on text without such characters."""
+
+    return _outside_bmp.search(text) is not None
+
+
 def decode_position(pos: lsp.Position) -> str:
     return f"{pos.line + 1}.{pos.character}"
 
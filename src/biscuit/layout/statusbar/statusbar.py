@@ -15,6 +15,7 @@ from .button import SButton
 
 if typing.TYPE_CHECKING:
     from biscuit.editor import Text
+    from biscuit.git import GitStatus
 
 
 class Statusbar(Frame):
@@ -34,6 +35,7 @@ class Statusbar(Frame):
             side=tk.LEFT,
             padx=(2, 0),
         )
+        self.base.git.status.subscribe(self.on_git_status)
 
         self.process_indicator = self.add_button(
             text="setting up environment",
@@ -187,6 +189,19 @@ class Statusbar(Frame):
         else:
             self.branch.hide()
 
+    def on_git_status(self, status: GitStatus) -> None:
+        """Show the branch of the latest git status, it may have been switched outside"""
+
+        if not (self.base.git_found and status.branch):
+            return
+
+        branch = status.branch
+        if branch == "(detached)":
+            branch = status.commit[:7]
+        if status.ahead or status.behind:
+            branch += f" {status.behind}↓ {status.ahead}↑"
+        self.branch.change_text(branch)
+
     def on_open_file(self, text: Text) -> None:
         self.file_type.change_text(text.language)
 
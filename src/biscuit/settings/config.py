@@ -18,6 +18,29 @@ class Config:
         self.clippy_enabled = False
         self.clippy_listeners = ["ast", "terminal", "git", "user_behavior"]
 
+        # lines kept in the terminal, 0 to keep everything
+        self.terminal_scrollback = 10000
+
+        # log records kept, the least severe level logged (trace, info, warning,
+        # error) and a file the logs are also written to, none if empty
+        self.log_capacity = 10000
+        self.log_level = "info"
+        self.log_file = ""
+
+        # ms between editor refreshes while typing, and ms of quiet before the
+        # outline, indent guides and words of the editor are updated
+        self.refresh_frame_ms = 16
+        self.outline_delay_ms = 400
+        self.indent_guides_delay_ms = 80
+        self.words_delay_ms = 300
+
+        # offer words from the other open editors of the same language too, when
+        # completing without a language server
+        self.autocomplete_shared_words = False
+
+        # color brackets by depth in the editor
+        self.rainbow_brackets = False
+
         self.load_data()
 
     def get_config_path(self, relative_path: str) -> str:
@@ -51,5 +74,15 @@ class Config:
         config = self.load_config()
         self.clippy_enabled = config.get("clippy_enabled", False)
         self.clippy_listeners = config.get("clippy_listeners", ["ast", "terminal", "git", "user_behavior"])
+        self.terminal_scrollback = config.get("terminal_scrollback", 10000)
+        self.log_capacity = config.get("log_capacity", 10000)
+        self.log_level = config.get("log_level", "info")
+        self.log_file = config.get("log_file", "")
+        self.refresh_frame_ms = config.get("refresh_frame_ms", 16)
+        self.outline_delay_ms = config.get("outline_delay_ms", 400)
+        self.indent_guides_delay_ms = config.get("indent_guides_delay_ms", 80)
+        self.words_delay_ms = config.get("words_delay_ms", 300)
+        self.autocomplete_shared_words = config.get("autocomplete_shared_words", False)
+        self.rainbow_brackets = config.get("rainbow_brackets", False)
         
         # self.font = (config.get("font", "Fira Code"), config.get("font_size", 12))
@@ -439,6 +439,14 @@ class StreamingMessage(Frame):
         if hasattr(self, "typing_animation_id"):
             self.after_cancel(self.typing_animation_id)
         self.indicator_frame.pack_forget()
+        self.finish_markdown()
+
+    def finish_markdown(self):
+        """End the active markdown part, rendering it as a whole."""
+        # user messages have no markdown parts
+        if getattr(self, "current_markdown_renderer", None):
+            self.current_markdown_renderer.finish()
+            self.current_markdown_renderer = None
 
     def show_actions(self):
         """Show the actions bar (like, dislike, copy, etc.)."""
@@ -464,17 +472,13 @@ class StreamingMessage(Frame):
             if not self.current_markdown_renderer:
                 self.current_markdown_renderer = Renderer(self.parts_container)
                 self.current_markdown_renderer.pack(fill=tk.X, pady=2)
-                self.current_markdown_renderer._buffer = ""
 
-            self.current_markdown_renderer._buffer += text
-            self.current_markdown_renderer.write(
-                self.current_markdown_renderer._buffer, clear=True
-            )
+            self.current_markdown_renderer.feed(text)
             self.content += text
 
     def add_thought(self, title: str = "Thought"):
         """Add a new collapsible thought block."""
-        self.current_markdown_renderer = None
+        self.finish_markdown()
 
         # If no parts have been added to this message yet, treat the first thought
         # as non-collapsible markdown (similar to how we handle the final result)
@@ -512,7 +516,7 @@ class StreamingMessage(Frame):
         self, icon: str, action: str, target: str, extra: str = "", lang_icon: str = ""
     ):
         """Add a native tool action widget."""
-        self.current_markdown_renderer = None
+        self.finish_markdown()
         self.current_thought_widget = None
         widget = ToolActionWidget(
             self.parts_container, icon, action, target, extra, lang_icon
@@ -541,6 +545,7 @@ class StreamingMessage(Frame):
             self.current_thought_widget = None
 
             self.append_content(text)
+            self.finish_markdown()
             self.show_actions()
 
 
@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import re
 import tkinter as tk
 import typing
 
@@ -21,6 +22,56 @@ from tkinterweb import HtmlFrame
 from biscuit.common.ui import Frame, Scrollbar
 
 
+FENCE = re.compile(r" {0,3}(`{3,}|~{3,})")
+LIST_ITEM = re.compile(r" {0,3}([-*+]|\d{1,9}[.)])( |$)")
+# definition of a link reference or a footnote
+REFERENCE = re.compile(r"^ {0,3}\[\^?[^\]\n]+\]:", re.M)
+
+
+def complete_blocks(text: str, start: int = 0) -> int:
+    """End of the markdown blocks of `text` that are complete, from `start`
+
+    A block is complete once a blank line and the first line of another block
+    follow it. Blank lines inside fenced code, before indented lines and between
+    items of the same list don't end a block, so neither code nor loose lists are
+    cut up. `start` has to be the end of a block, like a previous result.
+
+    Returns:
+        int: Offset where the incomplete trailing block starts, `start` if there's
+            no complete block after it yet."""
+
+    cut = start
+    fence = None
+    blank = False
+    first = None
+    pos = start
+    while (end := text.find("\n", pos)) != -1:
+        line = text[pos:end]
+        offset, pos = pos, end + 1
+
+        if fence:
+            if line.strip().startswith(fence) and not line.strip().strip(fence[0]):
+                fence = None
+            continue
+        if not line.strip():
+            blank = True
+            continue
+
+        if first is None:
+            first = line
+        elif blank and not line[0].isspace() and not (
+            LIST_ITEM.match(line) and LIST_ITEM.match(first)
+        ):
+            cut = offset
+            first = line
+        blank = False
+
+        if match := FENCE.match(line):
+            fence = match.group(1)
+
+    return cut
+
+
 class HighlightRenderer(mistune.HTMLRenderer):
     def __init__(self, *args, **kwargs) -> None:
         super().__init__(*args, **kwargs)
@@ -37,8 +88,37 @@ class HighlightRenderer(mistune.HTMLRenderer):
         return "<pre><code>" + mistune.escape(code) + "</code></pre>"
 
 
+def create_markdown(renderer: HighlightRenderer) -> mistune.Markdown:
+    return mistune.Markdown(
+        renderer=renderer,
+        inline=InlineParser(),
+        plugins=[
+            abbr,
+            def_list,
+            footnotes,
+            strikethrough,
+            speedup,
+            table,
+            task_lists,
+            url,
+        ],
+    )
+
+
 class Renderer(Frame):
-    """Renderer for the AI assistant chat view."""
+    """Renderer for the AI assistant chat view.
+
+    Markdown is rendered as it streams in: blocks that are complete are converted
+    once and appended to the document as new nodes, only the trailing block that is
+    still being written is converted again, and the document is updated at most once
+    per `frame` milliseconds however fast text comes in.
+
+    Blocks converted on their own can't see link references and footnotes defined
+    further down, so `finish` converts the whole document again once the stream is
+    complete, if it has any."""
+
+    # milliseconds between updates while streaming
+    frame = 30
 
     def __init__(self, master, *args, **kwargs) -> None:
         super().__init__(master, *args, **kwargs)
@@ -46,20 +126,7 @@ class Renderer(Frame):
 
         self.renderer = HighlightRenderer(escape=False)
         self.formatter = self.renderer.formatter
-        self.markdown = mistune.Markdown(
-            renderer=self.renderer,
-            inline=InlineParser(),
-            plugins=[
-                abbr,
-                def_list,
-                footnotes,
-                strikethrough,
-                speedup,
-                table,
-                task_lists,
-                url,
-            ],
-        )
+        self.markdown = create_markdown(self.renderer)
         self.htmlframe = HtmlFrame(
             self, messages_enabled=False, vertical_scrollbar=False, shrink=True
         )
@@ -68,7 +135,12 @@ class Renderer(Frame):
 
         self.header = "<html><head></head><body>"
         self.footer = "</body></html>"
-        self.content = ""
+
+        # markdown so far and how much of it is rendered for good
+        self.text = ""
+        self.done = 0
+        self.tail = ""
+        self._scheduled = None
 
         # Minimal CSS - no colors, just fonts and layout
         pygments_css = self.formatter.get_style_defs(".highlight")
@@ -106,12 +178,72 @@ class Renderer(Frame):
             }}
             """
 
-    def write(self, content: str, clear=False) -> None:
-        if clear:
-            self.content = self.markdown(content)
-        else:
-            self.content += self.markdown(content)
+        self.reset()
+
+    def reset(self) -> None:
+        """Clear the document, completed blocks go in `blocks`, the open one in `live`"""
+
+        self.text = ""
+        self.done = 0
+        self.tail = ""
 
-        full_html = f"{self.header}{self.content}{self.footer}"
-        self.htmlframe.load_html(full_html)
+        self.htmlframe.load_html(
+            f'{self.header}<div id="blocks"></div><div id="live"></div>{self.footer}'
+        )
         self.htmlframe.add_css(self.css)
+        document = self.htmlframe.document
+        self.blocks = document.getElementById("blocks")
+        self.live = document.getElementById("live")
+
+    def feed(self, content: str) -> None:
+        """Append streamed markdown, the document is updated on the next frame"""
+
+        self.text += content
+        if self._scheduled is None:
+            self._scheduled = self.after(self.frame, self.render)
+
+    def write(self, content: str, clear=False) -> None:
+        """Append markdown and update the document right away"""
+
+        if clear:
+            self.cancel()
+            self.reset()
+        self.text += content
+        self.render()
+
+    def render(self) -> None:
+        self._scheduled = None
+
+        cut = complete_blocks(self.text, self.done)
+        if cut > self.done:
+            element = self.htmlframe.document.createElement("div")
+            element.innerHTML = self.markdown(self.text[self.done : cut])
+            self.blocks.appendChild(element)
+            self.done = cut
+
+        tail = self.text[self.done :]
+        if tail != self.tail:
+            self.live.innerHTML = self.markdown(tail) if tail.strip() else ""
+            self.tail = tail
+
+    def finish(self) -> None:
+        """Render the rest of the markdown now that the stream is complete"""
+
+        self.cancel()
+        if not REFERENCE.search(self.text):
+            self.render()
+            return
+
+        self.blocks.innerHTML = self.markdown(self.text)
+        self.live.innerHTML = ""
+        self.done = len(self.text)
+        self.tail = ""
+
+    def cancel(self) -> None:
+        if self._scheduled is not None:
+            self.after_cancel(self._scheduled)
+            self._scheduled = None
+
+    def destroy(self) -> None:
+        self.cancel()
+        super().destroy()
@@ -0,0 +1,616 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import threading
+import typing
+from collections import Counter, deque
+
+from biscuit.common.files import list_files, walk_files
+
+if typing.TYPE_CHECKING:
+    from biscuit import App
+
+    from .explorer import Explorer
+
+IDENTIFIER = re.compile(r"[A-Za-z_][A-Za-z0-9_]*")
+# words of an identifier, as in `HTTPServer`, `camelCase` and `snake_case`
+SUBWORD = re.compile(r"[A-Z]+(?=[A-Z][a-z])|[A-Z]?[a-z]+|[A-Z]+|[0-9]+")
+
+
+class Entry(typing.NamedTuple):
+    """What the index knows about a file
+
+    `mask` is a bloom filter of the lowercase trigrams of the file, `bits` long,
+    None for files too large to filter, which are always searched. `terms` are
+    the distinct words of the file, their counts are kept in the shared postings
+    of the index for ranking."""
+
+    mtime: int
+    size: int
+    binary: bool
+    bits: int
+    mask: int | None
+    terms: tuple[str, ...]
+    length: int
+
+
+def trigram_bit(trigram: bytes, bits: int) -> int:
+    """Position of a trigram in a bloom filter, the same in every process"""
+
+    return (int.from_bytes(trigram, "little") * 2654435761 >> 8) & (bits - 1)
+
+
+def bloom(trigrams: typing.Iterable[bytes], bits: int) -> int:
+    mask = bytearray(bits // 8)
+    for trigram in trigrams:
+        bit = trigram_bit(trigram, bits)
+        mask[bit >> 3] |= 1 << (bit & 7)
+    return int.from_bytes(mask, "little")
+
+
+def trigrams(data: bytes) -> set[bytes]:
+    return {data[i : i + 3] for i in range(len(data) - 2)}
+
+
+def tokenize(text: str) -> Counter:
+    """Words of a text for ranking: lowercase identifiers and their subwords
+
+    Words shorter than 3 characters are left out."""
+
+    terms = Counter()
+    for identifier, count in Counter(IDENTIFIER.findall(text)).items():
+        word = identifier.strip("_").lower()
+        if len(word) > 2:
+            terms[sys.intern(word)] += count
+        words = SUBWORD.findall(identifier)
+        if len(words) > 1:
+            for word in words:
+                if len(word) > 2:
+                    terms[sys.intern(word.lower())] += count
+    return terms
+
+
+def required_literals(regex: re.Pattern) -> list[str]:
+    """ASCII strings every match of a pattern contains
+
+    The pattern is read conservatively: groups, classes, escapes and optional
+    characters end a literal run, and patterns with alternatives at the top
+    level have no required literals."""
+
+    pattern = regex.pattern
+    if isinstance(pattern, bytes) or regex.flags & re.VERBOSE:
+        return []
+
+    runs = []
+    run = ""
+    i, n = 0, len(pattern)
+    depth = 0
+    # alternatives outside groups make every literal optional
+    j = 0
+    while j < n:
+        c = pattern[j]
+        if c == "\\":
+            j += 1
+        elif c == "[":
+            j = skip_class(pattern, j) - 1
+        elif c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+        elif c == "|" and depth == 0:
+            return []
+        j += 1
+
+    while i < n:
+        c = pattern[i]
+        char = None
+        if c == "\\":
+            escaped = pattern[i + 1 : i + 2]
+            i += 2
+            if escaped in ("n", "t"):
+                char = "\n" if escaped == "n" else "\t"
+            elif escaped.isdigit() or escaped in ("x", "u", "U", "N"):
+                # codes and references can't be read as a single character
+                return runs + ([run] if len(run) > 2 else [])
+            elif escaped and not escaped.isalnum():
+                char = escaped
+        elif c == "[":
+            i = skip_class(pattern, i)
+        elif c == "(":
+            i = skip_group(pattern, i)
+        elif c in ".^$|)*+?":
+            i += 1
+        elif c == "{" and (quantifier := re.match(r"\{\d*,?\d*\}", pattern[i:])):
+            i += quantifier.end()
+        else:
+            char = c
+            i += 1
+
+        # a quantifier makes the atom optional or repeated
+        optional = False
+        repeated = False
+        if i < n and pattern[i] in "*?":
+            optional = True
+            i += 1
+        elif i < n and pattern[i] == "+":
+            repeated = True
+            i += 1
+        elif i < n and pattern[i] == "{" and (quantifier := re.match(r"\{(\d*),?\d*\}", pattern[i:])):
+            optional = not quantifier.group(1) or int(quantifier.group(1)) == 0
+            repeated = not optional
+            i += quantifier.end()
+        if (optional or repeated) and i < n and pattern[i] in "?+":
+            # lazy or possessive
+            i += 1
+
+        if char is not None and not optional and char.isascii():
+            run += char
+            if not repeated:
+                continue
+        if len(run) > 2:
+            runs.append(run)
+        run = ""
+
+    if len(run) > 2:
+        runs.append(run)
+    return runs
+
+
+def skip_class(pattern: str, i: int) -> int:
+    """Position after the character class starting at `i`"""
+
+    i += 1
+    if pattern[i : i + 1] == "^":
+        i += 1
+    if pattern[i : i + 1] == "]":
+        i += 1
+    while i < len(pattern) and pattern[i] != "]":
+        i += 2 if pattern[i] == "\\" else 1
+    return i + 1
+
+
+def skip_group(pattern: str, i: int) -> int:
+    """Position after the group starting at `i`"""
+
+    depth = 0
+    while i < len(pattern):
+        c = pattern[i]
+        if c == "\\":
+            i += 2
+            continue
+        if c == "[":
+            i = skip_class(pattern, i)
+            continue
+        if c == "(":
+            depth += 1
+        elif c == ")":
+            depth -= 1
+            if not depth:
+                return i + 1
+        i += 1
+    return i
+
+
+class ContentIndex:
+    """Index of the contents of the files in the active directory, used by the AI tools.
+
+    For every file it keeps a bloom filter of its lowercase trigrams, so that a regex
+    search only has to read the files that contain the literal parts of the pattern.
+    The words of all files go in one inverted index, from each word to the files it
+    occurs in and how often, to rank files for a query with BM25.
+
+    Files are listed like the `FileIndex` does, binary files are left out. The index
+    is only built once a tool asks for it, in a background thread; until it is ready
+    the tools walk the directory instead. It is persisted under the data directory,
+    so when a folder is indexed again only the files whose size or modification time
+    changed are read. Changes reported by the directory watcher are queued and
+    applied on the next query.
+
+    Folders with more than `max_files` files are not indexed, and bloom filters are
+    at most `max_bits` long, larger files are always searched."""
+
+    sniff_size = 8192
+    max_file_size = 4 << 20
+    max_files = 20000
+    max_bits = 1 << 15
+
+    # BM25 parameters
+    k1 = 1.2
+    b = 0.75
+
+    tokenize = staticmethod(tokenize)
+
+    def __init__(self, master: Explorer) -> None:
+        self.master = master
+        self.base: App = master.base
+
+        self.root = None
+        self.files: dict[str, Entry] = {}
+        # word -> file -> count
+        self.postings: dict[str, dict[str, int]] = {}
+        self._generation = 0
+        self._started = False
+        self._ready = threading.Event()
+        self._pending = deque()
+        self._lock = threading.RLock()
+
+        self.cachedir = self.base.datadir / "contentindex"
+
+    @property
+    def ignore_dirs(self) -> set[str]:
+        return set(self.master.directory.search_ignore_dirs)
+
+    @property
+    def ignore_exts(self) -> tuple[str]:
+        return tuple(self.master.directory.ignore_exts)
+
+    def load(self, *_) -> None:
+        """Forget the index of the previous directory, the active one is indexed on
+        first use"""
+
+        root = self.base.active_directory
+        if root:
+            root = os.path.abspath(root)
+        if root == self.root:
+            return
+
+        with self._lock:
+            self._generation += 1
+            self.root = root
+            self.files = {}
+            self.postings = {}
+            self._started = False
+            self._ready.clear()
+            self._pending.clear()
+
+    def start(self) -> None:
+        """Start indexing the active directory in the background, if not started yet"""
+
+        with self._lock:
+            if self._started or not self.root:
+                return
+            self._started = True
+            args = (self.root, self._generation)
+
+        threading.Thread(target=self.build, args=args, daemon=True).start()
+
+    def build(self, root: str, generation: int) -> None:
+        """Build the index, run in a background thread"""
+
+        try:
+            paths = list_files(root, self.ignore_dirs, self.ignore_exts)
+        except Exception as e:
+            self.base.logger.error(f"Indexing contents of {root} failed: {e}")
+            return
+
+        if len(paths) > self.max_files:
+            self.base.logger.info(
+                f"Not indexing contents of {root}: {len(paths)} files, "
+                f"more than {self.max_files}"
+            )
+            return
+
+        cached = self.read_cache(root)
+        files, postings = {}, {}
+        for rel in paths:
+            if generation != self._generation:
+                return
+            previous = cached.get(rel)
+            if indexed := self.index_file(root, rel, previous and previous[0]):
+                entry, terms = indexed
+                if terms is None:
+                    terms = previous[1]
+                files[rel] = entry
+                add_postings(postings, rel, terms)
+
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.files = files
+            self.postings = postings
+            self._ready.set()
+
+        self.write_cache(root, files, postings)
+
+    def index_file(
+        self, root: str, rel: str, previous: Entry = None
+    ) -> tuple[Entry, dict[str, int] | None] | None:
+        """Index a file
+
+        Returns:
+            tuple[Entry, dict | None] | None: The entry of the file and the counts of
+                its words, `previous` and None if the file didn't change, None if the
+                file can't be read"""
+
+        path = os.path.join(root, rel)
+        try:
+            stat = os.stat(path)
+            if previous and previous.mtime == stat.st_mtime_ns and previous.size == stat.st_size:
+                return previous, None
+            if stat.st_size > self.max_file_size:
+                return Entry(stat.st_mtime_ns, stat.st_size, False, 0, None, (), 0), {}
+            with open(path, "rb") as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if b"\0" in data[: self.sniff_size]:
+            return Entry(stat.st_mtime_ns, stat.st_size, True, 0, 0, (), 0), {}
+
+        grams = trigrams(data.lower())
+        # about 8 bits per trigram, so that a few trigrams rule out most files
+        bits = 1024
+        while bits < len(grams) * 8 and bits < self.max_bits:
+            bits <<= 1
+        # a filter with more than half its bits set rules out little
+        mask = bloom(grams, bits) if len(grams) * 2 <= bits else None
+
+        terms = tokenize(data.decode("utf-8", errors="ignore"))
+        entry = Entry(
+            stat.st_mtime_ns,
+            stat.st_size,
+            False,
+            bits if mask is not None else 0,
+            mask,
+            tuple(terms),
+            sum(terms.values()),
+        )
+        return entry, dict(terms)
+
+    def cache_path(self, root: str):
+        return self.cachedir / (hashlib.sha1(root.encode()).hexdigest() + ".json.gz")
+
+    def read_cache(self, root: str) -> dict[str, tuple[Entry, dict[str, int]]]:
+        try:
+            with gzip.open(self.cache_path(root), "rt", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("root") != root:
+                return {}
+            return {
+                rel: (
+                    Entry(
+                        mtime,
+                        size,
+                        binary,
+                        bits,
+                        None if mask is None else int(mask, 16),
+                        tuple(map(sys.intern, terms)),
+                        length,
+                    ),
+                    terms,
+                )
+                for rel, (mtime, size, binary, bits, mask, terms, length) in data["files"].items()
+            }
+        except (OSError, EOFError, ValueError, KeyError, TypeError):
+            return {}
+
+    def write_cache(
+        self, root: str, files: dict[str, Entry], postings: dict[str, dict[str, int]]
+    ) -> None:
+        counts = {rel: {} for rel in files}
+        for term, posting in postings.items():
+            for rel, count in posting.items():
+                counts[rel][term] = count
+
+        data = {
+            "root": root,
+            "files": {
+                rel: [
+                    entry.mtime,
+                    entry.size,
+                    entry.binary,
+                    entry.bits,
+                    None if entry.mask is None else format(entry.mask, "x"),
+                    counts[rel],
+                    entry.length,
+                ]
+                for rel, entry in files.items()
+            },
+        }
+        try:
+            self.cachedir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path(root).with_suffix(".tmp")
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=1) as f:
+                json.dump(data, f, separators=(",", ":"))
+            os.replace(tmp, self.cache_path(root))
+        except OSError as e:
+            self.base.logger.error(f"Saving content index failed: {e}")
+
+    def on_created(self, path: str, is_directory: bool = False) -> None:
+        """Queue a created file or directory, safe to call from any thread"""
+
+        if self._started:
+            self._pending.append((True, path, is_directory))
+
+    def on_modified(self, path: str, is_directory: bool = False) -> None:
+        """Queue a modified file, safe to call from any thread"""
+
+        if self._started and not is_directory:
+            self._pending.append((True, path, False))
+
+    def on_deleted(self, path: str, is_directory: bool = False) -> None:
+        """Queue a deleted file or directory, safe to call from any thread"""
+
+        if self._started:
+            self._pending.append((False, path, is_directory))
+
+    def on_moved(self, src: str, dest: str, is_directory: bool = False) -> None:
+        """Queue a moved file or directory, safe to call from any thread"""
+
+        self.on_deleted(src, is_directory)
+        self.on_created(dest, is_directory)
+
+    def apply_pending(self) -> None:
+        """Apply the queued changes reported by the directory watcher"""
+
+        if not self._pending or not self.root:
+            return
+
+        root = self.root
+        ignore_dirs, ignore_exts = self.ignore_dirs, self.ignore_exts
+        changed, removed = set(), []
+        while self._pending:
+            created, path, is_directory = self._pending.popleft()
+            rel = os.path.relpath(path, root).replace("\\", "/")
+            if rel.startswith("../") or ignore_dirs.intersection(rel.split("/")):
+                continue
+
+            if not created:
+                removed.append(rel + "/" if is_directory else rel)
+            elif is_directory:
+                changed.update(f"{rel}/{p}" for p in walk_files(path, ignore_dirs, ignore_exts))
+            elif not rel.endswith(ignore_exts):
+                changed.add(rel)
+
+        if changed and self.base.git_found:
+            try:
+                ignored = self.base.git.ignore.check(
+                    [os.path.join(root, rel) for rel in changed]
+                )
+                changed.difference_update(
+                    os.path.relpath(path, root).replace("\\", "/") for path in ignored
+                )
+            except Exception:
+                pass
+
+        files, postings = self.files, self.postings
+        if removed:
+            dirs = tuple(p for p in removed if p.endswith("/"))
+            removed = set(removed)
+            for rel in [rel for rel in files if rel in removed or (dirs and rel.startswith(dirs))]:
+                remove_postings(postings, rel, files.pop(rel).terms)
+        for rel in changed:
+            previous = files.get(rel)
+            indexed = self.index_file(root, rel, previous)
+            if indexed and indexed[1] is None:
+                continue
+            if previous:
+                remove_postings(postings, rel, files.pop(rel).terms)
+            if indexed:
+                files[rel] = indexed[0]
+                add_postings(postings, rel, indexed[1])
+
+    def available(self, path: str) -> str | None:
+        """Whether the index covers a path, with the pending changes applied
+
+        The index is started if it wasn't, without waiting for it.
+
+        Args:
+            path (str): Absolute path of the file or directory to search
+
+        Returns:
+            str | None: Path relative to the indexed directory, `""` for all of it.
+                None if the path isn't indexed or the index isn't ready yet."""
+
+        root = self.root
+        if not root:
+            return None
+
+        self.start()
+        try:
+            rel = os.path.relpath(os.path.abspath(path), root).replace("\\", "/")
+        except ValueError:
+            # on another drive
+            return None
+        if rel == ".." or rel.startswith("../") or not self._ready.is_set():
+            return None
+
+        with self._lock:
+            if root != self.root:
+                return None
+            self.apply_pending()
+        return "" if rel == "." else rel
+
+    def paths(self, prefix: str = "") -> list[str]:
+        """Indexed files in a directory relative to the root, `""` for all of them"""
+
+        with self._lock:
+            if not prefix:
+                return sorted(self.files)
+            if prefix in self.files:
+                return [prefix]
+            prefix = prefix.rstrip("/") + "/"
+            return sorted(rel for rel in self.files if rel.startswith(prefix))
+
+    def grep_candidates(self, regex: re.Pattern, paths: list[str]) -> list[str]:
+        """Files out of `paths` that may contain a match of the pattern
+
+        Files are ruled out when their trigrams lack those of the literal parts
+        of the pattern; binary files are left out."""
+
+        grams = set()
+        for literal in required_literals(regex):
+            grams.update(trigrams(literal.encode("ascii").lower()))
+
+        masks = {}
+        candidates = []
+        with self._lock:
+            for rel in paths:
+                entry = self.files.get(rel)
+                if entry is None or entry.binary:
+                    continue
+                if entry.mask is None or not grams:
+                    candidates.append(rel)
+                    continue
+                if (query := masks.get(entry.bits)) is None:
+                    query = masks[entry.bits] = bloom(grams, entry.bits)
+                if entry.mask & query == query:
+                    candidates.append(rel)
+        return candidates
+
+    def rank(self, terms: list[str], paths: list[str], limit: int = 10) -> list[tuple[str, float]]:
+        """Best matches for the terms out of `paths` with BM25, best first"""
+
+        terms = list(dict.fromkeys(terms))
+        with self._lock:
+            lengths = {
+                rel: entry.length
+                for rel in paths
+                if (entry := self.files.get(rel)) is not None and entry.length
+            }
+            postings = {
+                term: {rel: tf for rel, tf in self.postings.get(term, {}).items() if rel in lengths}
+                for term in terms
+            }
+
+        if not lengths or not terms:
+            return []
+
+        average = sum(lengths.values()) / len(lengths)
+        idf = {
+            term: math.log(1 + (len(lengths) - len(posting) + 0.5) / (len(posting) + 0.5))
+            for term, posting in postings.items()
+            if posting
+        }
+        if not idf:
+            return []
+
+        k1, b = self.k1, self.b
+        scores = {}
+        for term, weight in idf.items():
+            for rel, tf in postings[term].items():
+                norm = k1 * (1 - b + b * lengths[rel] / average)
+                scores[rel] = scores.get(rel, 0.0) + weight * tf * (k1 + 1) / (tf + norm)
+
+        return sorted(scores.items(), key=lambda x: (-x[1], x[0]))[:limit]
+
+
+def add_postings(postings: dict[str, dict[str, int]], rel: str, terms: dict[str, int]) -> None:
+    for term, count in terms.items():
+        if (posting := postings.get(term)) is None:
+            posting = postings[sys.intern(term)] = {}
+        posting[rel] = count
+
+
+def remove_postings(postings: dict[str, dict[str, int]], rel: str, terms: typing.Iterable[str]) -> None:
+    for term in terms:
+        if posting := postings.get(term):
+            posting.pop(rel, None)
+            if not posting:
+                del postings[term]
@@ -1,3 +1,5 @@
+from __future__ import annotations
+
 import os
 import pathlib
 import platform
@@ -5,11 +7,13 @@ import shutil
 import subprocess
 import threading
 import tkinter as tk
+import typing
 from tkinter.messagebox import askyesno
 from typing import Iterator
 
 import pyperclip
 
+from biscuit.common.helpers import is_dark
 from biscuit.common.icons import Icons
 from biscuit.common.ui import Tree
 
@@ -18,6 +22,18 @@ from .menu import DirectoryContextMenu
 from .placeholder import DirectoryTreePlaceholder
 from .watcher import DirectoryTreeWatcher
 
+if typing.TYPE_CHECKING:
+    from biscuit.git import GitStatus
+
+# colors of the git decorations, (light, dark)
+DECORATIONS = {
+    "modified": ("#895503", "#e2c08d"),
+    "added": ("#587c0c", "#81b88b"),
+    "untracked": ("#007100", "#73c991"),
+    "deleted": ("#ad0707", "#c74e39"),
+    "conflicted": ("#ad0707", "#e4676b"),
+}
+
 
 class DirectoryTree(SideBarViewItem):
     """A view that displays the directory tree.
@@ -94,6 +110,11 @@ class DirectoryTree(SideBarViewItem):
         self.tree.bind("<Button-3>", self.right_click)
 
         self.tree.tree.tag_configure("ignored")
+        # git decorations, served from the shared git status
+        dark = is_dark(self.tree.tree)
+        for tag, colors in DECORATIONS.items():
+            self.tree.tree.tag_configure(tag, foreground=colors[dark])
+        self.git.status.subscribe(self.decorate)
 
         if startpath:
             self.change_path(startpath)
@@ -186,6 +207,23 @@ class DirectoryTree(SideBarViewItem):
 
             yield data
 
+    def decorate(self, status: GitStatus) -> None:
+        """Update the git decorations of the loaded nodes"""
+
+        for path, node in list(self.nodes.items()):
+            if not node:
+                continue
+            try:
+                tags = self.tree.item(node, "tags")
+                isdir = self.tree.item_type(node) == "directory"
+            except tk.TclError:
+                continue
+
+            tags = [tag for tag in tags if tag == "ignored"]
+            if decoration := status.decoration(path, isdir) if status.root else "":
+                tags.append(decoration)
+            self.tree.item(node, tags=tags)
+
     def update_path(self, path: str) -> None:
         """Updates the treeview with the contents of the given directory."""
 
@@ -217,6 +255,18 @@ class DirectoryTree(SideBarViewItem):
         ignored = []
         if paths := [i[3] for i in entries]:
             ignored = self.git.ignore.check(paths)
+        status = self.git.status.snapshot
+
+        def tags(path: str, unixlike: str, isdir: bool) -> tuple[str, ...]:
+            decoration = status.decoration(path, isdir) if status.root else ""
+            return tuple(
+                tag
+                for tag in (
+                    "ignored" if ignored and (unixlike in ignored) else "",
+                    decoration,
+                )
+                if tag
+            )
 
         for name, path, isdir, unixlike in entries:
             if isdir:
@@ -231,7 +281,7 @@ class DirectoryTree(SideBarViewItem):
                         values=[path, "directory"],
                         # image="foldericon",
                         open=False,
-                        tags="ignored" if ignored and (unixlike in ignored) else "")
+                        tags=tags(path, unixlike, True))
                     self.nodes[os.path.abspath(path)] = node
                     self.tree.insert(node, "end", text="loading...", tags="ignored")
                 except:
@@ -252,7 +302,7 @@ class DirectoryTree(SideBarViewItem):
                         text=f"  {name}",
                         values=[path, "file"],
                         # image="document",
-                        tags="ignored" if ignored and (unixlike in ignored) else "")
+                        tags=tags(path, unixlike, False))
                     self.nodes[os.path.abspath(path)] = node
                 except:
                     self.refresh_root()
@@ -6,6 +6,8 @@ from biscuit.common.icons import Icons
 
 from ..sidebar_view import SideBarView
 from .directorytree import DirectoryTree
+from .contentindex import ContentIndex
+from .fileindex import FileIndex
 from .menu import ExplorerMenu
 
 
@@ -33,6 +35,10 @@ class Explorer(SideBarView):
         self.add_item(self.directory)
 
         self.filesearch_actionset = ActionSet("Search files", "file:", [])
+        self.fileindex = FileIndex(self)
+        self.base.bind("<<DirectoryChanged>>", self.fileindex.load, add=True)
+        self.contentindex = ContentIndex(self)
+        self.base.bind("<<DirectoryChanged>>", self.contentindex.load, add=True)
 
         self.newfile_actionset = ActionSet(
             "Add new file to directory",
@@ -75,18 +81,14 @@ class Explorer(SideBarView):
         if not self.base.active_directory:
             return []
 
-        pys = []
-        for r, d, f in os.walk(self.base.active_directory):
-            if any(i in r for i in self.directory.search_ignore_dirs):
-                d[:] = []
-                continue
-            for file in f:
-                if t in file:
-                    pys.append(
-                        (
-                            file,
-                            lambda _, path=os.path.join(r, file): self.base.open_editor(
-                                path
-                            ))
-                    )
-        return pys
+        root = self.fileindex.root
+        results = []
+        for path in self.fileindex.search(t):
+            directory, _, name = path.rpartition("/")
+            results.append(
+                (
+                    name,
+                    lambda _, path=os.path.join(root, path): self.base.open_editor(path),
+                    directory)
+            )
+        return results
@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import gzip
+import hashlib
+import heapq
+import os
+import re
+import threading
+import typing
+from collections import deque
+
+from biscuit.common.files import list_files, walk_files
+from biscuit.common.fuzzy import fuzzy_match
+
+if typing.TYPE_CHECKING:
+    from biscuit import App
+
+    from .explorer import Explorer
+
+
+class FileIndex:
+    """Index of the files in the active directory, used by the palette file search.
+
+    The index is built in a background thread, from `git ls-files` when the directory
+    is a git repository (so gitignored files are left out) and by walking the directory
+    otherwise. Directories in `search_ignore_dirs` are skipped either way. It is kept in
+    memory as a single string of newline separated relative paths, which is searched
+    with regular expressions, and persisted under the data directory so that reopening
+    a folder has results right away while the index is rebuilt.
+
+    Changes reported by the directory watcher are queued and applied on the next search.
+    """
+
+    def __init__(self, master: Explorer) -> None:
+        self.master = master
+        self.base: App = master.base
+
+        self.max_candidates = 20000
+        self.limit = 50
+
+        self.root = None
+        self.paths = ""
+        self.ready = False
+        self._generation = 0
+        self._pending = deque()
+        self._lock = threading.Lock()
+        self._lower = (None, "")
+        self._narrowed = (None, "", "", "")
+
+        self.cachedir = self.base.datadir / "fileindex"
+
+    @property
+    def ignore_dirs(self) -> set[str]:
+        return set(self.master.directory.search_ignore_dirs)
+
+    @property
+    def ignore_exts(self) -> tuple[str]:
+        return tuple(self.master.directory.ignore_exts)
+
+    def load(self, *_) -> None:
+        """Load the index of the active directory and rebuild it in the background"""
+
+        root = self.base.active_directory
+        if root:
+            root = os.path.abspath(root)
+        if root == self.root:
+            return
+
+        self._generation += 1
+        self.root = root
+        self.paths = ""
+        self.ready = False
+        self._pending.clear()
+
+        if not root:
+            return
+
+        threading.Thread(
+            target=self.build, args=(root, self._generation), daemon=True
+        ).start()
+
+    def refresh(self, *_) -> None:
+        """Rebuild the index of the active directory"""
+
+        self.root = None
+        self.load()
+
+    def build(self, root: str, generation: int) -> None:
+        """Build the index, run in a background thread
+
+        Args:
+            root (str): Directory to index
+            generation (int): Builds of directories that are not active anymore are
+                dropped
+        """
+
+        cached = self.read_cache(root)
+        if cached is not None and generation == self._generation and not self.ready:
+            self.paths = cached
+
+        try:
+            paths = list_files(root, self.ignore_dirs, self.ignore_exts)
+        except Exception as e:
+            self.base.logger.error(f"Indexing {root} failed: {e}")
+            return
+
+        paths = "".join(f"{path}\n" for path in paths)
+        with self._lock:
+            if generation != self._generation:
+                return
+            self.paths = paths
+            self.ready = True
+
+        self.write_cache(root, paths)
+
+    def cache_path(self, root: str):
+        return self.cachedir / (hashlib.sha1(root.encode()).hexdigest() + ".gz")
+
+    def read_cache(self, root: str) -> str | None:
+        try:
+            with gzip.open(self.cache_path(root), "rt", encoding="utf-8") as f:
+                if f.readline().rstrip("\n") != root:
+                    return None
+                return f.read()
+        except (OSError, EOFError, UnicodeDecodeError):
+            return None
+
+    def write_cache(self, root: str, paths: str) -> None:
+        try:
+            self.cachedir.mkdir(parents=True, exist_ok=True)
+            tmp = self.cache_path(root).with_suffix(".tmp")
+            with gzip.open(tmp, "wt", encoding="utf-8", compresslevel=1) as f:
+                f.write(root + "\n")
+                f.write(paths)
+            os.replace(tmp, self.cache_path(root))
+        except OSError as e:
+            self.base.logger.error(f"Saving file index failed: {e}")
+
+    def on_created(self, path: str, is_directory: bool = False) -> None:
+        """Queue a created file or directory, safe to call from any thread"""
+
+        self._pending.append((True, path, is_directory))
+
+    def on_deleted(self, path: str, is_directory: bool = False) -> None:
+        """Queue a deleted file or directory, safe to call from any thread"""
+
+        self._pending.append((False, path, is_directory))
+
+    def on_moved(self, src: str, dest: str, is_directory: bool = False) -> None:
+        """Queue a moved file or directory, safe to call from any thread"""
+
+        self.on_deleted(src, is_directory)
+        self.on_created(dest, is_directory)
+
+    def apply_pending(self) -> None:
+        """Apply the queued changes reported by the directory watcher"""
+
+        if not self._pending or not self.root:
+            return
+
+        ignore_dirs, ignore_exts = self.ignore_dirs, self.ignore_exts
+        added, removed = [], []
+        while self._pending:
+            created, path, is_directory = self._pending.popleft()
+            rel = os.path.relpath(path, self.root).replace("\\", "/")
+            if rel.startswith("../") or ignore_dirs.intersection(rel.split("/")):
+                continue
+
+            if not created:
+                removed.append(rel + "/" if is_directory else rel)
+            elif is_directory:
+                added.extend(
+                    f"{rel}/{p}" for p in walk_files(path, ignore_dirs, ignore_exts)
+                )
+            elif not rel.endswith(ignore_exts) and os.path.isfile(path):
+                added.append(rel)
+
+        if added and self.base.git_found:
+            try:
+                # the gitignore check takes paths relative to the repository root,
+                # which may be above the active directory, or absolute ones
+                ignored = set(
+                    self.base.git.ignore.check(
+                        [os.path.join(self.root, p) for p in added]
+                    )
+                )
+                added = [p for p in added if os.path.join(self.root, p) not in ignored]
+            except Exception:
+                pass
+
+        with self._lock:
+            paths = self.paths.split("\n")[:-1]
+            if removed:
+                files = {p for p in removed if not p.endswith("/")}
+                dirs = tuple(p for p in removed if p.endswith("/"))
+                paths = [
+                    p
+                    for p in paths
+                    if p not in files and not (dirs and p.startswith(dirs))
+                ]
+            if added:
+                paths.extend(set(added).difference(paths))
+            self.paths = "".join(f"{path}\n" for path in paths)
+
+    def search(self, term: str, limit: int = None) -> list[str]:
+        """Fuzzy search the index
+
+        Paths containing the characters of the term in order are matched and ranked
+        with the palette's fuzzy matcher, matches in the file name first. Paths
+        containing the term as is are looked up first, so that they are ranked even
+        when there are more than `max_candidates` matches. As long as the term is
+        extended while typing, only the matches of the previous term are searched
+        again.
+
+        Args:
+            term (str): The search term
+            limit (int, optional): Maximum number of results. Defaults to `limit`.
+
+        Returns:
+            list[str]: Relative paths of the best matches, best first"""
+
+        self.apply_pending()
+        limit = limit or self.limit
+
+        term = "".join(term.lower().split())
+        if not term:
+            return [path for path in self.paths.split("\n", limit)[:limit] if path]
+
+        paths, lower = self._source(term)
+
+        best = []
+        matched = set()
+
+        def rank(start: int, end: int) -> None:
+            score = self._score(paths[start:end], lower[start:end], term)
+            matched.add(start)
+            if len(best) < limit:
+                heapq.heappush(best, (score, paths[start:end]))
+            elif score > best[0][0]:
+                heapq.heapreplace(best, (score, paths[start:end]))
+
+        pos = lower.find(term)
+        while pos != -1 and len(matched) < self.max_candidates:
+            start = lower.rfind("\n", 0, pos) + 1
+            end = lower.find("\n", pos)
+            rank(start, end)
+            pos = lower.find(term, end)
+
+        # each character matches its first occurrence, so there is no backtracking
+        regex = re.compile(
+            re.escape(term[0])
+            + "".join(f"[^\\n{re.escape(c)}]*{re.escape(c)}" for c in term[1:])
+            + "[^\\n]*"
+        )
+        complete = True
+        for match in regex.finditer(lower):
+            start = lower.rfind("\n", 0, match.start()) + 1
+            if start not in matched:
+                if len(matched) >= self.max_candidates:
+                    complete = False
+                    break
+                rank(start, match.end())
+
+        if complete:
+            # remember every match, typing on narrows them down
+            spans = sorted(matched)
+            self._narrowed = (
+                self.paths,
+                term,
+                "".join(paths[i : lower.find("\n", i) + 1] for i in spans),
+                "".join(lower[i : lower.find("\n", i) + 1] for i in spans),
+            )
+
+        best.sort(key=lambda x: x[1])
+        best.sort(key=lambda x: x[0], reverse=True)
+        return [path for _, path in best]
+
+    def _source(self, term: str) -> tuple[str, str]:
+        """Paths to search for the term and their lowercase form"""
+
+        index, previous, paths, lower = self._narrowed
+        if index is self.paths and term.startswith(previous):
+            return paths, lower
+
+        paths = self.paths
+        if self._lower[0] is not paths:
+            lower = paths.lower()
+            # positions have to line up with the original paths
+            self._lower = (paths, lower if len(lower) == len(paths) else paths)
+        return paths, self._lower[1]
+
+    def _score(self, path: str, lower: str, term: str) -> tuple[bool, float]:
+        """Score a path, higher is better
+
+        The palette shows the file name, so matches in it rank above the ones that
+        need the directories."""
+
+        start = lower.rfind("/") + 1
+        if match := fuzzy_match(term, path[start:], lower[start:]):
+            return True, match[0]
+        return False, fuzzy_match(term, path, lower)[0]
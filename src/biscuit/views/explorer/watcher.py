@@ -26,6 +26,9 @@ class DirectoryTreeWatcher(PatternMatchingEventHandler):
 
         super().__init__(ignore_patterns=self.master.changes_ignore_dir_patterns)
 
+        # events come in on the observer thread, the tree is updated on the UI thread
+        self.channel = self.base.dispatcher.channel("directory watcher", self.apply)
+
         self.observer = Observer()
         self.observer.start()
 
@@ -37,36 +40,69 @@ class DirectoryTreeWatcher(PatternMatchingEventHandler):
     def stop_watch(self) -> None:
         self.observer.stop()
 
+    def ignored(self, path: str) -> bool:
+        return any(i in path for i in self.master.search_ignore_dirs)
+
     def on_created(self, event) -> None:
-        for i in self.master.search_ignore_dirs:
-            if i in event.src_path:
-                return
+        if self.ignored(event.src_path):
+            return
 
-        self.master.update_path(os.path.dirname(event.src_path))
-        self.base.source_control.reload_tree()
+        self.base.explorer.fileindex.on_created(event.src_path, event.is_directory)
+        self.base.explorer.contentindex.on_created(event.src_path, event.is_directory)
+        self.check_ignore_file(event.src_path)
+        self.channel.post((os.path.dirname(event.src_path),))
 
     def on_deleted(self, event) -> None:
-        for i in self.master.search_ignore_dirs:
-            if i in event.src_path:
-                return
+        if self.ignored(event.src_path):
+            return
 
-        self.master.update_path(os.path.dirname(event.src_path))
-        self.base.source_control.reload_tree()
+        self.base.explorer.fileindex.on_deleted(event.src_path, event.is_directory)
+        self.base.explorer.contentindex.on_deleted(event.src_path, event.is_directory)
+        self.check_ignore_file(event.src_path)
+        self.channel.post((os.path.dirname(event.src_path),))
 
     def on_modified(self, event) -> None:
-        # self.master.update_path(os.path.dirname(event.src_path))
-        # self.base.source_control.reload_tree()
-        # print('modified', event.src_path)
-        ...
+        # a directory is reported modified along with the files created or
+        # deleted in it, those are handled on their own
+        if event.is_directory or self.ignored(event.src_path):
+            return
+
+        self.base.explorer.contentindex.on_modified(event.src_path)
+        if self.check_ignore_file(event.src_path):
+            self.channel.post((os.path.dirname(event.src_path),))
+        else:
+            self.channel.post(())
 
     def on_moved(self, event):
-        for i in self.master.search_ignore_dirs:
-            if i in event.src_path:
-                return
-
-        try:
-            self.master.update_path(os.path.dirname(event.src_path))
-            self.base.source_control.reload_tree()
-            print("moved", event.src_path, event.dest_path)
-        except FileNotFoundError:
-            pass
+        if self.ignored(event.src_path):
+            return
+
+        self.base.explorer.fileindex.on_moved(
+            event.src_path, event.dest_path, event.is_directory
+        )
+        self.base.explorer.contentindex.on_moved(
+            event.src_path, event.dest_path, event.is_directory
+        )
+        self.check_ignore_file(event.src_path, event.dest_path)
+        self.channel.post(
+            (os.path.dirname(event.src_path), os.path.dirname(event.dest_path))
+        )
+
+    def apply(self, changes: list[tuple[str, ...]]) -> None:
+        """Update the tree for a batch of changes, each a tuple of the directories
+        to refresh, and read the git status once for all of them"""
+
+        for path in dict.fromkeys(path for paths in changes for path in paths):
+            try:
+                self.master.update_path(path)
+            except FileNotFoundError:
+                pass
+        self.base.source_control.reload_tree()
+
+    def check_ignore_file(self, *paths: str) -> bool:
+        """Drop the gitignore rules read so far if a .gitignore changed"""
+
+        if any(os.path.basename(path) == ".gitignore" for path in paths):
+            self.base.git.ignore.invalidate()
+            return True
+        return False
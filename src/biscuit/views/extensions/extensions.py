@@ -37,4 +37,3 @@ class Extensions(SideBarView):
 
     def initialize(self) -> None:
         self.results.refresh()
-        self.results.gui_refresh_loop()
@@ -1,6 +1,5 @@
 from __future__ import annotations
 
-import queue
 import threading
 import tkinter as tk
 import typing
@@ -12,6 +11,7 @@ from .extension import ExtensionGUI
 from .placeholder import ExtensionsPlaceholder
 
 if typing.TYPE_CHECKING:
+    from biscuit.common.dispatcher import Channel
     from biscuit.extensions import ExtensionManager
 
 
@@ -32,7 +32,7 @@ class Results(SideBarViewItem):
     """
 
     manager: ExtensionManager
-    fetch_queue: queue.Queue
+    fetch_queue: Channel
     fetching: threading.Event
 
     def __init__(self, master, *args, **kwargs) -> None:
@@ -58,6 +58,7 @@ class Results(SideBarViewItem):
         self.manager = self.base.extensions_manager
         self.fetch_queue = self.manager.fetch_queue
         self.fetching = self.manager.fetching
+        self.fetch_queue.connect(self.add_extensions)
 
     def show_content(self) -> None:
         self.extension_list.pack(in_=self.content, fill=tk.BOTH, expand=True)
@@ -75,15 +76,12 @@ class Results(SideBarViewItem):
         self.update_idletasks()
         self.after(5, self.manager.run_fetch_extensions())
 
-    def gui_refresh_loop(self) -> None:
-        if not self.fetch_queue.empty():
-            name, data = self.fetch_queue.get()
+    def add_extensions(self, extensions: list[tuple[str, str]]) -> None:
+        for name, data in extensions:
             ext = ExtensionGUI(self, name, data)
             if not self.filter_installed or (self.filter_installed and ext.installed):
                 self.extension_list.add(ext, fill=tk.X)
 
-        self.after(5, self.gui_refresh_loop)
-
     def clear(self, *_) -> None:
         for widget in self.extension_list.items:
             widget.pack_forget()
@@ -1,9 +1,17 @@
-import queue
+import time
 import tkinter as tk
-from datetime import datetime
+import tkinter.font as tkfont
 
-from biscuit.common import caller_class_name
 from biscuit.common.icons import Icons
+from biscuit.common.logbuffer import (
+    ERROR,
+    INFO,
+    LEVELS,
+    TRACE,
+    WARNING,
+    LogBuffer,
+    caller_name,
+)
 from biscuit.common.ui import Scrollbar
 
 from ..panelview import PanelView
@@ -15,6 +23,12 @@ class Logs(PanelView):
     The Logs view displays the logs of the application.
     - Show info, warning, error, trace logs.
     - Clear all logs.
+
+    Logging only stores a compact record in a ring buffer (see `LogBuffer`), records
+    below the configured level are dropped right away. The view shows just the
+    records that fit in it, formatted when they're shown, and is only refreshed
+    while it's on screen. Messages can take %-style arguments, which are formatted
+    along with the record.
     """
 
     def __init__(self, master, *args, **kwargs) -> None:
@@ -24,21 +38,37 @@ class Logs(PanelView):
         self.rowconfigure(0, weight=1)
         self.columnconfigure(0, weight=1)
 
-        self.queue = queue.Queue()
+        config = self.base.config
+        level = config.log_level if config.log_level in LEVELS else "info"
+        self.buffer = LogBuffer(config.log_capacity, LEVELS.index(level))
+        self.buffer.export(config.log_file)
+
+        # number of the first record shown, the view follows new records at the bottom
+        self.first = 0
+        self.follow = True
+        self.visible = False
 
         self.text = tk.Text(
             self,
             relief=tk.FLAT,
             padx=10,
             pady=10,
+            wrap=tk.NONE,
             font=("Consolas", 11))
         self.text.grid(row=0, column=0, sticky=tk.NSEW)
+        self.text.config(state=tk.DISABLED)
+        self.font = tkfont.Font(font=self.text.cget("font"))
 
         self.scrollbar = Scrollbar(self)
         self.scrollbar.grid(sticky=tk.NSEW, row=0, column=1)
+        self.scrollbar.config(command=self.yview)
 
-        self.text.config(yscrollcommand=self.scrollbar.set)
-        self.scrollbar.config(command=self.text.yview)
+        self.text.bind("<MouseWheel>", self.on_mousewheel)
+        self.text.bind("<Button-4>", lambda _: self.scroll(-3))
+        self.text.bind("<Button-5>", lambda _: self.scroll(3))
+        self.text.bind("<Configure>", lambda _: self.render())
+        self.bind("<Map>", self.on_map)
+        self.bind("<Unmap>", self.on_unmap)
 
         fontbold = ("Consolas", 11, "bold")
 
@@ -56,69 +86,36 @@ class Logs(PanelView):
         )
         self.text.tag_config("trace")
 
-        self.gui_refresh_loop()
-
-    def gui_refresh_loop(self) -> None:
-        if not self.queue.empty():
-            self.write(*self.queue.get())
-
-        self.after(10, self.gui_refresh_loop)
-
-    def write(self, *args) -> None:
-        self.text.config(state=tk.NORMAL)
-        for i in args:
-            if isinstance(i, tuple):
-                self.text.insert(tk.END, i[0], i[1])
-            else:
-                self.text.insert(tk.END, i)
-        self.text.config(state=tk.DISABLED)
-        self.text.see(tk.END)
-
-    def newline(self) -> None:
-        self.queue.put(("\n"))
-
-    def log(self, type: str, caller: str, text: str) -> None:
-        self.queue.put(
-            (
-                "[",
-                (datetime.now().strftime("%H:%M:%S:%f"), "time"),
-                "]",
-                type,
-                "[",
-                (caller, "caller"),
-                f"]: {text}")
-        )
-        self.newline()
+        # records can come from any thread, the view catches up on the UI thread
+        self.channel = self.base.dispatcher.channel("logs", self.refresh)
 
-    def info(self, text: str) -> None:
+    def info(self, text: str, *args) -> None:
         """info level log"""
 
-        self._std_log(" [info] ", "info", text)
+        self._add(INFO, text, args)
 
-    def warning(self, text: str) -> None:
+    def warning(self, text: str, *args) -> None:
         """warning level log"""
 
-        self._std_log(" [warning] ", "warning", text)
+        self._add(WARNING, text, args)
 
-    def error(self, text: str) -> None:
+    def error(self, text: str, *args) -> None:
         """error level log"""
 
-        self._std_log(" [error] ", "error", text)
+        self._add(ERROR, text, args)
 
-    def trace(self, text: str) -> None:
+    def trace(self, text: str, *args) -> None:
         """trace level log"""
 
-        # traces are fully greyed out
-        self.queue.put(
-            (
-                (
-                    f"[{datetime.now().strftime('%H:%M:%S:%f')}] [trace] [{caller_class_name(skip=3)}]: {text}",
-                    "trace"),
-                "\n")
-        )
+        self._add(TRACE, text, args)
+
+    def _add(self, level: int, text: str, args: tuple) -> None:
+        if level < self.buffer.level:
+            return
 
-    def _std_log(self, kindtext: str, kind: str, text: str) -> None:
-        self.log((kindtext, kind), caller_class_name(skip=3), text)
+        self.buffer.add(time.time(), level, caller_name(2), text, args)
+        if self.visible or self.buffer.exporter:
+            self.channel.post()
 
     def rawlog(self, text: str, kind: int):
         match kind:
@@ -131,7 +128,92 @@ class Logs(PanelView):
             case _:
                 self.trace(text)
 
-    def clear_all(self, *_) -> None:
+    def refresh(self, _) -> None:
+        self.buffer.flush()
+        if self.visible:
+            self.render()
+
+    def on_map(self, _) -> None:
+        self.visible = True
+        self.render()
+
+    def on_unmap(self, _) -> None:
+        self.visible = False
+
+    @property
+    def capacity(self) -> int:
+        """Lines that fit in the view"""
+
+        padding = int(self.text.cget("pady")) * 2
+        return max((self.text.winfo_height() - padding) // self.font.metrics("linespace"), 1)
+
+    def render(self) -> None:
+        """Show the records that fit in the view"""
+
+        if not self.visible:
+            return
+
+        buffer = self.buffer
+        capacity = self.capacity
+        if self.follow:
+            records = buffer.window(buffer.end - capacity, capacity)
+        else:
+            self.first = min(max(self.first, buffer.start), max(buffer.end - capacity, buffer.start))
+            records = buffer.window(self.first, capacity)
+
+        # multiline records take more than a line, drop records until the rest fits
+        lines = [record.text.count("\n") + 1 for record in records]
+        while len(records) > 1 and sum(lines) > capacity:
+            if self.follow:
+                records.pop(0)
+                lines.pop(0)
+            else:
+                records.pop()
+                lines.pop()
+        if self.follow:
+            self.first = buffer.end - len(records)
+
+        runs = []
+        for record in records:
+            runs += [
+                "[", (), record.timestamp, "time", "] ", (),
+                f"[{LEVELS[record.level]}]", LEVELS[record.level],
+                " [", (), record.caller, "caller", f"]: {record.text}\n", (),
+            ]
+
         self.text.config(state=tk.NORMAL)
-        self.text.delete(1.0, tk.END)
+        self.text.delete("1.0", tk.END)
+        if runs:
+            self.text.insert(tk.END, *runs)
+            self.text.delete("end-2c")
         self.text.config(state=tk.DISABLED)
+
+        total = max(len(buffer), 1)
+        low = (self.first - buffer.start) / total
+        self.scrollbar.set(low, low + len(records) / total)
+
+    def scroll(self, records: int) -> None:
+        self.follow = False
+        self.first += records
+        if self.first + self.capacity >= self.buffer.end:
+            self.follow = True
+        self.render()
+
+    def yview(self, *args) -> None:
+        match args:
+            case ("moveto", fraction):
+                self.follow = False
+                self.first = self.buffer.start + int(float(fraction) * len(self.buffer))
+                self.scroll(0)
+            case ("scroll", number, "pages"):
+                self.scroll(int(number) * self.capacity)
+            case ("scroll", number, _):
+                self.scroll(int(number))
+
+    def on_mousewheel(self, event: tk.Event) -> str:
+        self.scroll(int(-3 * (event.delta / 120)))
+        return "break"
+
+    def clear_all(self, *_) -> None:
+        self.buffer.clear()
+        self.render()
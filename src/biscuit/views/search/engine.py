@@ -0,0 +1,270 @@
+from __future__ import annotations
+
+import mmap
+import os
+import queue
+import re
+import threading
+import typing
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from biscuit.common.files import list_files
+
+
+@dataclass
+class FileResult:
+    """Matches found in a file
+
+    Lines are `(line number, line text, matched text)` tuples."""
+
+    path: str
+    lines: list[tuple[int, str, str]] = field(default_factory=list)
+    occurrences: int = 0
+
+
+@dataclass
+class SearchQuery:
+    """What to search for"""
+
+    term: str
+    case_sensitive: bool = False
+    whole_word: bool = False
+    regex: bool = False
+
+    def compile(self) -> re.Pattern:
+        """Compile the term to the pattern the files are scanned with
+
+        Literal terms are scanned as bytes unless case insensitive matching of
+        non-ASCII text is needed. Regular expressions and whole word searches are
+        compiled to a `str` pattern and run on the decoded text, as `\w`, `\b` and
+        `.` only know about ASCII in bytes patterns.
+
+        Raises:
+            re.error: The term is not a valid regular expression"""
+
+        pattern = self.term if self.regex else re.escape(self.term)
+        if self.whole_word:
+            pattern = rf"\b{pattern}\b"
+
+        flags = 0 if self.case_sensitive else re.IGNORECASE
+        literal = not (self.regex or self.whole_word)
+        if literal and (self.case_sensitive or pattern.isascii()):
+            return re.compile(pattern.encode("utf-8"), flags | re.MULTILINE)
+        return re.compile(pattern, flags | re.MULTILINE)
+
+    @property
+    def needle(self) -> bytes | None:
+        """Bytes every matching file contains, lowercase unless case sensitive.
+
+        Checking for it first is much faster than running a case insensitive pattern."""
+
+        if self.regex or not (self.case_sensitive or self.term.isascii()):
+            return None
+
+        needle = self.term.encode("utf-8")
+        return needle if self.case_sensitive else needle.lower()
+
+
+class SearchJob:
+    """Searches the files of a directory on a pool of worker threads
+
+    Files are listed respecting gitignore and the ignored directories, binary files are
+    skipped by sniffing their first block and large files are scanned through mmap.
+    Results are put on a queue in batches as they are found, for the UI to drain,
+    and `notify` is called from the worker threads whenever there is something new.
+    """
+
+    batch_size = 32
+    sniff_size = 8192
+    mmap_threshold = 1 << 20
+    max_file_size = 64 << 20
+
+    def __init__(
+        self,
+        root: str,
+        query: SearchQuery,
+        ignore_dirs: list[str] = (),
+        ignore_exts: list[str] = (),
+        max_results: int = 10000,
+        workers: int = None,
+        notify: typing.Callable[[], typing.Any] = None,
+    ) -> None:
+        """Start searching
+
+        Args:
+            root (str): Directory to search
+            query (SearchQuery): What to search for
+            ignore_dirs (list[str], optional): Names of directories to skip
+            ignore_exts (list[str], optional): File extensions to skip
+            max_results (int, optional): Lines after which the search stops. Defaults to 10000.
+            workers (int, optional): Number of worker threads. Defaults to a few more
+                than the CPU count, as workers mostly wait on reading files.
+            notify (Callable, optional): Called from any thread when results were
+                added and once the search is done.
+
+        Raises:
+            re.error: The term is not a valid regular expression
+        """
+
+        self.root = root
+        self.query = query
+        self.pattern = query.compile()
+        self.needle = query.needle
+        self.ignore_dirs = ignore_dirs
+        self.ignore_exts = ignore_exts
+        self.max_results = max_results
+        self.workers = workers or min(32, (os.cpu_count() or 1) + 4)
+        self.notify = notify or (lambda: None)
+
+        self.results: queue.Queue[list[FileResult]] = queue.Queue()
+        self.files_total = 0
+        self.files_searched = 0
+        self.matched_lines = 0
+        self.truncated = False
+        self.error = None
+
+        self._cancelled = threading.Event()
+        self._done = threading.Event()
+        self._lock = threading.Lock()
+
+        threading.Thread(target=self.run, daemon=True).start()
+
+    @property
+    def done(self) -> bool:
+        return self._done.is_set()
+
+    def cancel(self) -> None:
+        self._cancelled.set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done.wait(timeout)
+
+    def drain(self, limit: int = None) -> list[FileResult]:
+        """Take the results found so far off the queue
+
+        Args:
+            limit (int, optional): Stop after this many files"""
+
+        found = []
+        while limit is None or len(found) < limit:
+            try:
+                found += self.results.get_nowait()
+            except queue.Empty:
+                break
+        return found
+
+    def run(self) -> None:
+        try:
+            files = list_files(self.root, self.ignore_dirs, self.ignore_exts)
+            self.files_total = len(files)
+
+            batches = (
+                files[i : i + self.batch_size]
+                for i in range(0, len(files), self.batch_size)
+            )
+            with ThreadPoolExecutor(self.workers) as pool:
+                for _ in pool.map(self.search_batch, batches):
+                    if self._cancelled.is_set():
+                        break
+        except Exception as e:
+            self.error = e
+        finally:
+            self._done.set()
+            self.notify()
+
+    def search_batch(self, paths: list[str]) -> None:
+        found = []
+        for path in paths:
+            if self._cancelled.is_set():
+                return
+
+            try:
+                result = self.search_file(os.path.join(self.root, path))
+            except (OSError, ValueError):
+                result = None
+
+            with self._lock:
+                self.files_searched += 1
+                if result:
+                    self.matched_lines += len(result.lines)
+                    if self.matched_lines >= self.max_results:
+                        self.truncated = True
+                        self._cancelled.set()
+
+            if result:
+                found.append(result)
+
+        if found:
+            self.results.put(found)
+            self.notify()
+
+    def search_file(self, path: str) -> FileResult | None:
+        """Search a file, None if nothing was found or the file is binary"""
+
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if not size or size > self.max_file_size:
+                return
+
+            head = f.read(self.sniff_size)
+            if b"\0" in head:
+                return
+
+            if size > self.mmap_threshold:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    if self.needle and self.query.case_sensitive:
+                        if data.find(self.needle) < 0:
+                            return
+                    return self.scan(path, data)
+
+            data = head + f.read()
+
+        if self.needle:
+            if self.needle not in (data if self.query.case_sensitive else data.lower()):
+                return
+        return self.scan(path, data)
+
+    def scan(self, path: str, data: bytes | mmap.mmap) -> FileResult | None:
+        pattern = self.pattern
+        if isinstance(pattern.pattern, str):
+            data = bytes(data).decode("utf-8", errors="replace")
+            newline = "\n"
+        else:
+            newline = b"\n"
+
+        result = None
+        line_number = 1
+        counted = 0
+        line_end = -1
+        for match in pattern.finditer(data):
+            result = result or FileResult(path)
+            result.occurrences += 1
+
+            start = match.start()
+            if start <= line_end:
+                # another match on the same line
+                continue
+            if newline in match.group():
+                # results are lines, like a search line by line would find
+                continue
+
+            # mmap has no count, slicing works for every kind of data
+            line_number += data[counted:start].count(newline)
+            counted = start
+            line_start = data.rfind(newline, 0, start) + 1
+            line_end = data.find(newline, start)
+            if line_end < 0:
+                line_end = len(data)
+
+            line = data[line_start:line_end]
+            text = match.group()
+            if isinstance(line, bytes):
+                line = line.decode("utf-8", errors="replace")
+                text = text.decode("utf-8", errors="replace")
+            result.lines.append((line_number, line.strip(), text))
+
+            if self._cancelled.is_set():
+                break
+
+        return result
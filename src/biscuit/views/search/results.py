@@ -7,6 +7,8 @@ from tkinter.messagebox import askyesno
 
 from biscuit.common.ui import Frame, Label, Tree
 
+from .engine import FileResult, SearchJob, SearchQuery
+
 
 class Results(Frame):
     """The Results view.
@@ -28,6 +30,7 @@ class Results(Frame):
 
         self.treeview = Tree(self)
         self.treeview.pack(fill=tk.BOTH, expand=True)
+        self.treeview.bind("<Double-1>", self.click)
 
         self.ignore_folders = [
             ".git",
@@ -45,6 +48,14 @@ class Results(Frame):
         self.ignore_exts = []
 
         self.results = []
+        self.files_found = 0
+
+        # running search, results are added to the tree in batches while it runs
+        self.job: SearchJob = None
+        self.search_string = ""
+        self.files_per_batch = 200
+        # the search job wakes the view up when it has found something
+        self.channel = self.base.dispatcher.channel("search", self.on_progress)
 
         self.searching = False
         self.case_sensitive = False
@@ -112,128 +123,101 @@ class Results(Frame):
 
     def search(self, *_) -> None:
         """
-        Find every file in the selected directory and then search for occurrences in it
+        Search the files of the active directory for occurrences, a running search is
+        cancelled and replaced by the new one
         """
-        if not self.searching:
-            self.searching = True
-
-            self.label.config(text="Searching...")
-            self.base.notifications.info("Searching...")
-
-            found_files = []
-            search_string = self.master.searchbox.get()
-
-            self.clear_tree()
-            self.results = []
-
-            if self.base.active_directory:
-                for root, _, files in os.walk(self.base.active_directory):
-                    if root in self.ignore_folders:
-                        continue
-
-                    for file in files:
-                        file_path = os.path.join(root, file)
-
-                        if any(file.endswith(ext) for ext in self.ignore_exts):
-                            continue
-
-                        result = self.search_in_file(file_path, search_string)
+        if self.job:
+            self.job.cancel()
+            self.job = None
 
-                        if result:
-                            found_files.append(result[0])
-                            self.label.config(
-                                text=f"Searched {len(found_files)} files..."
-                            )
-
-                        self.base.root.update()
-
-                if len(found_files) > 0:
-                    self.label.config(
-                        text=f"{len(self.results)} results for '{search_string}'"
-                    )
-
-                else:
-                    self.label.config(text="No results.")
-
-            else:
-                self.label.config(text="No folder selected.")
+        self.clear_tree()
+        self.results = []
+        self.files_found = 0
 
-            self.base.notifications.hide()
+        search_string = self.master.searchbox.get()
+        if not self.base.active_directory:
+            self.label.config(text="No folder selected.")
             self.searching = False
+            return
+        if not search_string:
+            self.label.config(text="Search")
+            self.searching = False
+            return
 
-        else:
-            self.base.notifications.warning("Already searching!")
-
-    def search_in_file(self, file_path: str, search_string: str) -> list:
-        """
-        Search a file for occurrences
-        - Case insensitive
-        - Case sensitive
-        - Whole word
-        - Regex
-        """
-        found = False
-        occurrences = 0
-        result_lines = []
-
+        query = SearchQuery(
+            search_string,
+            case_sensitive=self.case_sensitive,
+            whole_word=self.whole_word,
+            regex=self.regex)
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                for line_number, line in enumerate(f, start=1):
-                    if self.case_sensitive:
-                        if search_string in line:
-                            found = True
-                            occurrences += line.count(search_string)
-                            result_lines.append((line_number, line.strip()))
-                            text = search_string
-
-                    elif self.whole_word:
-                        result = re.search(r"\b" + search_string + r"\b", line)
-                        if result:
-                            found = True
-                            occurrences += len(
-                                re.findall(r"\b" + search_string + r"\b", line)
-                            )
-                            result_lines.append((line_number, line.strip()))
-                            text = result.group()
-
-                    elif self.regex:
-                        result = re.search(search_string, line)
-
-                        if result:
-                            found = True
-                            occurrences += len(re.findall(search_string, line))
-                            result_lines.append((line_number, line.strip()))
-                            text = result.group()
-
-                    else:
-                        if search_string.lower() in line.lower():
-                            found = True
-                            occurrences += line.count(search_string.lower())
-                            result_lines.append((line_number, line.strip()))
-                            text = search_string
-        except UnicodeDecodeError:
-            # case: file is non-text
+            self.job = SearchJob(
+                self.base.active_directory,
+                query,
+                ignore_dirs=self.ignore_folders,
+                ignore_exts=self.ignore_exts,
+                notify=self.channel.post)
+        except re.error as e:
+            self.label.config(text=f"Invalid regex: {e}")
+            self.searching = False
             return
 
-        if found:
-            parent = self.add_item(
-                parent="",
-                index=tk.END,
-                open=True,
-                text=f"{os.path.basename(file_path)} | {file_path}")
-
-            for line_number, line in result_lines:
-                child_elm = self.add_item(
-                    parent=parent, index=tk.END, text=f"line {line_number}: {line}"
-                )
-                self.treeview.item(child_elm, tags=(file_path, line_number))
-                self.treeview.bind("<Double-1>", self.click)
-
-                self.results.append(
-                    {"file_path": file_path, "line": line_number, "text": text}
-                )
-
-            return [file_path, occurrences, line_number]
+        self.searching = True
+        self.search_string = search_string
+        self.label.config(text="Searching...")
+
+    def cancel_search(self, *_) -> None:
+        "Stop the running search"
+        if self.job:
+            self.job.cancel()
+
+    def on_progress(self, _) -> bool:
+        "Add the results found so far to the tree, True while more are queued"
+        job = self.job
+        if not job:
+            # wake up from a cancelled or replaced search
+            return False
+
+        done = job.done
+        for result in job.drain(self.files_per_batch):
+            self.add_result(result)
+
+        if not done or not job.results.empty():
+            self.label.config(
+                text=f"Searched {job.files_searched}/{job.files_total} files, "
+                f"{len(self.results)} results...")
+            return not job.results.empty()
+
+        self.job = None
+        self.searching = False
+        if job.error:
+            self.base.logger.error(f"Search failed: {job.error}")
+            self.label.config(text="Search failed: see logs")
+        elif self.results:
+            self.label.config(
+                text=f"{len(self.results)} results in {self.files_found} files for "
+                f"'{self.search_string}'" + (" (stopped early)" if job.truncated else ""))
+        else:
+            self.label.config(text="No results.")
+
+    def add_result(self, result: FileResult) -> None:
+        "Add the matches found in a file to the tree"
+        file_path = result.path
+        self.files_found += 1
+        parent = self.add_item(
+            parent="",
+            index=tk.END,
+            open=True,
+            text=f"{os.path.basename(file_path)} | {file_path}")
+
+        for line_number, line, text in result.lines:
+            child_elm = self.add_item(
+                parent=parent, index=tk.END, text=f"line {line_number}: {line}"
+            )
+            self.treeview.item(child_elm, tags=(file_path, line_number))
+
+            self.results.append(
+                {"file_path": file_path, "line": line_number, "text": text}
+            )
 
     def replace(self) -> None:
         """
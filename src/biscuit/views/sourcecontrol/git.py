@@ -2,6 +2,7 @@ import tkinter as tk
 
 from biscuit.common.icons import Icons
 from biscuit.common.ui import Entry, Frame, IconLabelButton, ScrollableFrame
+from biscuit.git.status import ADDED, DELETED, MODIFIED, UNTRACKED, GitStatus
 
 from .changes import Changes
 from .placeholder import ChangesTreePlaceholder
@@ -54,6 +55,8 @@ class Git(Frame):
         self.placeholder = ChangesTreePlaceholder(self)
         self.placeholder.pack(fill=tk.BOTH, expand=True)
 
+        self.base.git.status.subscribe(self.show_status)
+
     def add_staged_changes(self, changed_files=(), kind=0) -> None:
         for file in changed_files:
             self.staged_changes_tree.add_item(file, kind)
@@ -67,47 +70,32 @@ class Git(Frame):
         self.changes_tree.refresh()
 
     def open_repo(self) -> None:
-        # self.staged_changes_tree.clear_tree()
-        # self.changes_tree.clear_tree()
+        """Bring the changes up to date, once the git status has been read"""
+
         # self.set_title(f"{os.path.basename(self.base.active_directory)}({self.base.git.active_branch})")
 
         if not self.base.git.repo:
             return
 
-        staged = []
-
-        if deleted := self.base.git.repo.get_staged_deleted_files():
-            self.add_staged_changes(deleted, 0)
-            staged += deleted
-        if added := self.base.git.repo.get_staged_added_files():
-            self.add_staged_changes(added, 1)
-            staged += added
-        if modified := self.base.git.repo.get_staged_modified_files():
-            self.add_staged_changes(modified, 2)
-            staged += modified
-
-        if staged:
-            self.staged_changes_tree.clear(otherthan=staged)
-
-        unstaged = []
-
-        if deleted := self.base.git.repo.get_deleted_files():
-            self.add_changes(deleted, 0)
-            unstaged += [(i, 0) for i in deleted]
-        if added := self.base.git.repo.get_added_files():
-            self.add_changes(added, 1)
-            unstaged += [(i, 1) for i in added]
-        if modified := self.base.git.repo.get_modified_files():
-            self.add_changes(modified, 2)
-            unstaged += [(i, 2) for i in modified]
-
-        # untracked files
-        if untracked := self.base.git.repo.get_untracked_files():
-            self.add_changes(untracked, 3)
-            unstaged += [(i, 3) for i in untracked]
-
-        if unstaged:
-            self.changes_tree.clear(otherthan=unstaged)
+        self.base.git.status.refresh()
+
+    def show_status(self, status: GitStatus) -> None:
+        """Show the changes of a git status snapshot"""
+
+        if not self.base.git.repo:
+            return
+
+        for kind in (DELETED, ADDED, MODIFIED):
+            if files := [path for path, k in status.staged.items() if k == kind]:
+                self.add_staged_changes(files, kind)
+        self.staged_changes_tree.clear(otherthan=list(status.staged))
+        self.staged_changes_tree.refresh()
+
+        for kind in (DELETED, ADDED, MODIFIED, UNTRACKED):
+            if files := [path for path, k in status.unstaged.items() if k == kind]:
+                self.add_changes(files, kind)
+        self.changes_tree.clear(otherthan=list(status.unstaged.items()))
+        self.changes_tree.refresh()
 
     def toggle_staged(self, *_) -> None:
         if not self.base.git_found:
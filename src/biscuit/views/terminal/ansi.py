@@ -5,6 +5,41 @@ import re
 SEQ = re.compile(r"\x1b(?:[@-Z\\-_]|\[[0-?]*[ -/]*[@-~])")
 NEWLINE = re.compile(r"\x1b\[\d+\;1H")
 
+# terminal output split into printable text, control characters and escape sequences
+TOKEN = re.compile(
+    r"(?P<text>[^\x00-\x1f\x7f]+)"
+    r"|\x1b\[(?P<csi>[0-?]*)[ -/]*(?P<final>[@-~])"
+    r"|\x1b\](?P<osc>[^\x07\x1b]*)(?:\x07|\x1b\\)"
+    r"|\x1b[ -/]*(?P<esc>[0-~])"
+    r"|(?P<control>[\x00-\x1f\x7f])",
+    re.S,
+)
+# the start of an escape sequence that continues in the next read
+PARTIAL = re.compile(r"\x1b(?:\[[0-?]*[ -/]*|\][^\x07]*|[ -/]*)")
+
+# VS Code light terminal colors, the 16 base colors of the 256 color palette
+PALETTE = [
+    "#000000",
+    "#cd3131",
+    "#00bc00",
+    "#949800",
+    "#0451a5",
+    "#bc05bc",
+    "#0598bc",
+    "#555555",
+    "#666666",
+    "#cd3131",
+    "#14ce14",
+    "#b5ba00",
+    "#0451a5",
+    "#bc05bc",
+    "#0598bc",
+    "#a5a5a5",
+]
+DEFAULT_FOREGROUND = 0
+DEFAULT_BACKGROUND = 15
+CUBE = (0, 95, 135, 175, 215, 255)
+
 
 def strip_ansi_escape_sequences(string):
     return SEQ.sub("", string)
@@ -12,3 +47,35 @@ def strip_ansi_escape_sequences(string):
 
 def replace_newline(string):
     return NEWLINE.sub("\n", string)
+
+
+def color(index: int) -> str:
+    """Color of an index of the 256 color palette"""
+
+    if index < 16:
+        return PALETTE[index]
+    if index < 232:
+        index -= 16
+        r, g, b = CUBE[index // 36], CUBE[index // 6 % 6], CUBE[index % 6]
+        return f"#{r:02x}{g:02x}{b:02x}"
+
+    gray = 8 + (index - 232) * 10
+    return f"#{gray:02x}{gray:02x}{gray:02x}"
+
+
+def nearest_color(r: int, g: int, b: int) -> int:
+    """Closest index of the 256 color palette for a 24 bit color"""
+
+    def level(c: int) -> int:
+        return min(range(6), key=lambda i: abs(CUBE[i] - c))
+
+    cube = 16 + 36 * level(r) + 6 * level(g) + level(b)
+    gray = 232 + min(max(round(((r + g + b) / 3 - 8) / 10), 0), 23)
+
+    def distance(index: int) -> int:
+        c = color(index)
+        return sum(
+            (int(c[i : i + 2], 16) - v) ** 2 for i, v in zip((1, 3, 5), (r, g, b))
+        )
+
+    return min(cube, gray, key=distance)
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import threading
+from collections import deque
+
+
+class OutputBuffer:
+    """Output of a terminal process on its way to the UI
+
+    The reader thread puts chunks as they are read and the UI drains everything
+    pending at once, so a burst of output ends up in a single insert. When the UI
+    falls behind by more than `max_pending` characters, `put` blocks the reader
+    until the UI catches up, which in turn makes the process wait on its PTY.
+    """
+
+    def __init__(self, max_pending: int = 1 << 22) -> None:
+        """Output buffer
+
+        Args:
+            max_pending (int, optional): Characters the UI may lag behind before
+                the reader is held back. Defaults to 4M."""
+
+        self.max_pending = max_pending
+        self.chunks: deque[str] = deque()
+        self.pending = 0
+        self.closed = False
+        self._cond = threading.Condition()
+
+    def put(self, data: str) -> bool:
+        """Queue output, waiting while the UI is saturated. Safe to call from any thread.
+
+        Returns:
+            bool: False if the buffer was closed"""
+
+        with self._cond:
+            while self.pending >= self.max_pending and not self.closed:
+                self._cond.wait()
+            if self.closed:
+                return False
+
+            self.chunks.append(data)
+            self.pending += len(data)
+            return True
+
+    def drain(self, limit: int = None) -> str:
+        """Take the pending output
+
+        Args:
+            limit (int, optional): Stop taking chunks once this many characters are
+                taken, the rest is left for the next drain. Defaults to everything."""
+
+        with self._cond:
+            if limit is None or self.pending <= limit:
+                data = "".join(self.chunks)
+                self.chunks.clear()
+            else:
+                taken = []
+                size = 0
+                while self.chunks and size < limit:
+                    taken.append(self.chunks.popleft())
+                    size += len(taken[-1])
+                data = "".join(taken)
+
+            self.pending -= len(data)
+            self._cond.notify_all()
+            return data
+
+    def close(self) -> None:
+        """Release a waiting reader, further output is dropped"""
+
+        with self._cond:
+            self.closed = True
+            self.chunks.clear()
+            self.pending = 0
+            self._cond.notify_all()
@@ -0,0 +1,573 @@
+from __future__ import annotations
+
+import tkinter as tk
+import tkinter.font as tkfont
+
+from .ansi import (
+    DEFAULT_BACKGROUND,
+    DEFAULT_FOREGROUND,
+    PARTIAL,
+    TOKEN,
+    color,
+    nearest_color,
+)
+
+
+class Line:
+    """A line of the screen, its text and the `(start, end, tag)` spans of its styles"""
+
+    __slots__ = ("text", "spans")
+
+    def __init__(self) -> None:
+        self.text = ""
+        self.spans: list[tuple[int, int, str]] = []
+
+    def put(self, col: int, text: str, tag: str | None) -> None:
+        """Overwrite the text from a column on"""
+
+        end = col + len(text)
+        line = self.text
+        if col > len(line):
+            line += " " * (col - len(line))
+        self.text = line[:col] + text + line[end:]
+
+        if self.spans:
+            self.cut(col, end)
+        if tag:
+            self.spans.append((col, end, tag))
+            self.spans.sort()
+
+    def erase(self, start: int, end: int = None) -> None:
+        """Blank out columns `start` to `end`, to the end of the line if None"""
+
+        if end is None or end >= len(self.text):
+            self.text = self.text[:start]
+            end = None
+        elif end > start:
+            self.text = self.text[:start] + " " * (end - start) + self.text[end:]
+        self.cut(start, end if end is not None else float("inf"))
+
+    def delete(self, col: int, count: int) -> None:
+        """Delete characters, shifting the rest of the line left"""
+
+        self.text = self.text[:col] + self.text[col + count :]
+        spans = []
+        for s, e, tag in self.spans:
+            if e <= col:
+                spans.append((s, e, tag))
+            elif s >= col + count:
+                spans.append((s - count, e - count, tag))
+            else:
+                s, e = min(s, col), max(e - count, col)
+                if e > s:
+                    spans.append((s, e, tag))
+        self.spans = spans
+
+    def insert_blanks(self, col: int, count: int) -> None:
+        if col >= len(self.text):
+            return
+        self.text = self.text[:col] + " " * count + self.text[col:]
+        self.spans = [
+            (s + count, e + count, tag) if s >= col else (s, e, tag)
+            for s, e, tag in self.spans
+        ]
+        self.cut(col, col + count)
+
+    def cut(self, start: int, end: int) -> None:
+        """Remove styles from columns `start` to `end`"""
+
+        spans = []
+        for s, e, tag in self.spans:
+            if e <= start or s >= end:
+                spans.append((s, e, tag))
+                continue
+            if s < start:
+                spans.append((s, start, tag))
+            if e > end:
+                spans.append((end, e, tag))
+        self.spans = spans
+
+    def runs(self) -> list[str]:
+        """Text and tags of the line, as arguments for `Text.insert`"""
+
+        if not self.spans:
+            return [self.text, ""] if self.text else []
+
+        runs = []
+        pos = 0
+        for s, e, tag in self.spans:
+            e = min(e, len(self.text))
+            if s >= e:
+                continue
+            if s > pos:
+                runs += [self.text[pos:s], ""]
+            runs += [self.text[s:e], tag]
+            pos = e
+        if pos < len(self.text):
+            runs += [self.text[pos:], ""]
+        return runs
+
+
+class Screen:
+    """Terminal screen emulator
+
+    Output of the terminal process is parsed incrementally into a model of the
+    screen: the last `rows` lines, each up to `cols` wide, which cursor movement,
+    carriage returns and erase sequences act upon. Text styles (SGR) are mapped
+    to a small set of reusable text tags.
+
+    `flush` brings the text widget up to date with the model, rewriting only the
+    lines that changed since the last flush and appending the new ones. Lines
+    that scroll off the top of the screen can't change anymore, once they are in
+    the widget they are dropped from the model. A progress bar redrawn with `\\r`
+    a thousand times between two flushes is written to the widget once.
+    """
+
+    tab_size = 8
+    # escape sequences that never end are dropped beyond this length
+    max_pending = 4096
+
+    def __init__(self, rows: int = 24, cols: int = 80) -> None:
+        self.rows = rows
+        self.cols = cols
+
+        self.lines: list[Line] = [Line()]
+        # model line at the top of the screen, it only moves down as lines are added
+        self.top = 0
+        self.row = 0
+        self.col = 0
+        self.saved = (0, 0)
+        self.title = None
+
+        # widget line of the first line of the model, model lines in the widget
+        self.first = 1
+        self.flushed = 1
+        self.dirty: set[int] = set()
+        # model lines from here on were removed, their widget lines are stale
+        self.truncated = None
+
+        self.pending = ""
+        self.reset_style()
+        self.sgr_cache: dict[tuple, tuple] = {}
+        self.styles: dict[str, dict] = {}
+        self.configured: set[str] = set()
+        self.fonts: dict[str, tkfont.Font] = {}
+
+    # --- parsing ---
+
+    def feed(self, data: str) -> None:
+        """Apply a chunk of output to the screen, chunks may end anywhere"""
+
+        data = self.pending + data
+        data, self.pending = self.split_incomplete(data)
+        if len(self.pending) > self.max_pending:
+            self.pending = ""
+
+        for match in TOKEN.finditer(data):
+            kind = match.lastgroup
+            if kind == "text":
+                self.write(match.group())
+            elif kind == "control":
+                self.control(match.group())
+            elif kind == "final":
+                self.csi(match.group("csi"), match.group("final"))
+            elif kind == "osc":
+                self.osc(match.group("osc"))
+            elif kind == "esc":
+                self.esc(match.group("esc"))
+
+    def split_incomplete(self, data: str) -> tuple[str, str]:
+        """Split off an escape sequence cut off at the end of the data"""
+
+        osc = data.rfind("\x1b]")
+        if osc >= 0 and "\x07" not in data[osc:] and "\x1b\\" not in data[osc:]:
+            return data[:osc], data[osc:]
+
+        esc = data.rfind("\x1b", max(len(data) - 64, 0))
+        if esc >= 0 and PARTIAL.fullmatch(data, esc):
+            return data[:esc], data[esc:]
+        return data, ""
+
+    def control(self, char: str) -> None:
+        if char == "\n":
+            self.linefeed()
+        elif char == "\r":
+            self.col = 0
+        elif char == "\b":
+            self.col = max(min(self.col, self.cols - 1) - 1, 0)
+        elif char == "\t":
+            self.col = min((self.col // self.tab_size + 1) * self.tab_size, self.cols - 1)
+
+    def esc(self, final: str) -> None:
+        if final == "7":
+            self.save_cursor()
+        elif final == "8":
+            self.restore_cursor()
+        elif final == "D":
+            self.linefeed()
+        elif final == "E":
+            self.linefeed()
+            self.col = 0
+        elif final == "M":
+            self.row = max(self.row - 1, self.top)
+        elif final == "c":
+            self.reset_style()
+            self.erase_display(2)
+
+    def osc(self, command: str) -> None:
+        code, _, value = command.partition(";")
+        if code in ("0", "2"):
+            self.title = value
+
+    def csi(self, params: str, final: str) -> None:
+        if params.startswith(("?", ">", "<", "=")):
+            # private modes, eg. cursor visibility and bracketed paste
+            return
+
+        if final == "m":
+            self.select_graphic_rendition(params)
+            return
+
+        args = [int(p) if p.isdigit() else 0 for p in params.split(";")] if params else []
+        n = args[0] if args and args[0] else 1
+
+        if final == "K":
+            self.erase_line(args[0] if args else 0)
+        elif final == "J":
+            self.erase_display(args[0] if args else 0)
+        elif final == "A":
+            self.row = max(self.row - n, self.top)
+        elif final in "Be":
+            self.move_to(self.row + n, self.col)
+        elif final in "Ca":
+            self.col = min(self.col + n, self.cols - 1)
+        elif final == "D":
+            self.col = max(min(self.col, self.cols - 1) - n, 0)
+        elif final == "E":
+            self.move_to(self.row + n, 0)
+        elif final == "F":
+            self.row = max(self.row - n, self.top)
+            self.col = 0
+        elif final in "G`":
+            self.col = min(n, self.cols) - 1
+        elif final == "d":
+            self.move_to(self.top + n - 1, self.col)
+        elif final in "Hf":
+            col = args[1] if len(args) > 1 and args[1] else 1
+            self.move_to(self.top + n - 1, min(col, self.cols) - 1)
+        elif final == "P":
+            self.current.delete(self.col, n)
+            self.touch(self.row)
+        elif final == "@":
+            self.current.insert_blanks(self.col, n)
+            self.touch(self.row)
+        elif final == "X":
+            self.current.erase(self.col, self.col + n)
+            self.touch(self.row)
+        elif final == "s":
+            self.save_cursor()
+        elif final == "u":
+            self.restore_cursor()
+
+    # --- screen operations ---
+
+    @property
+    def current(self) -> Line:
+        return self.lines[self.row]
+
+    def write(self, text: str) -> None:
+        """Write printable text at the cursor, wrapping at the right margin"""
+
+        while text:
+            if self.col >= self.cols:
+                self.linefeed()
+                self.col = 0
+
+            part = text[: self.cols - self.col]
+            self.current.put(self.col, part, self.tag)
+            self.touch(self.row)
+            self.col += len(part)
+            text = text[len(part) :]
+
+    def linefeed(self) -> None:
+        self.row += 1
+        if self.row == len(self.lines):
+            self.lines.append(Line())
+            self.top = max(self.top, len(self.lines) - self.rows)
+
+    def move_to(self, row: int, col: int) -> None:
+        """Move the cursor, creating the lines up to it"""
+
+        row = max(min(row, self.top + self.rows - 1), self.top)
+        while row >= len(self.lines):
+            self.lines.append(Line())
+        self.row = row
+        self.col = max(col, 0)
+
+    def save_cursor(self) -> None:
+        self.saved = (self.row - self.top, self.col)
+
+    def restore_cursor(self) -> None:
+        row, col = self.saved
+        self.move_to(self.top + row, col)
+
+    def erase_line(self, mode: int) -> None:
+        col = min(self.col, self.cols)
+        if mode == 0:
+            self.current.erase(col)
+        elif mode == 1:
+            self.current.erase(0, col + 1)
+        else:
+            self.current.erase(0)
+        self.touch(self.row)
+
+    def erase_display(self, mode: int) -> None:
+        if mode == 0:
+            self.erase_line(0)
+            self.truncate(self.row + 1)
+        elif mode == 1:
+            for row in range(self.top, self.row):
+                self.lines[row].erase(0)
+                self.touch(row)
+            self.erase_line(1)
+        else:
+            # the screen scrolls out of view, like `clear` does in most terminals
+            self.truncate(self.top + 1)
+            self.lines[self.top].erase(0)
+            self.touch(self.top)
+            self.row = self.top
+            self.col = 0
+
+    def truncate(self, row: int) -> None:
+        """Remove the lines from `row` on"""
+
+        row = max(row, self.top + 1)
+        if row >= len(self.lines):
+            return
+
+        del self.lines[row:]
+        self.dirty = {i for i in self.dirty if i < row}
+        if row < self.flushed:
+            self.flushed = row
+            self.truncated = row if self.truncated is None else min(self.truncated, row)
+        self.row = min(self.row, len(self.lines) - 1)
+
+    def touch(self, row: int) -> None:
+        if row < self.flushed:
+            self.dirty.add(row)
+
+    def clear(self) -> None:
+        """Keep only the line of the cursor, for a text widget that was emptied"""
+
+        self.lines = [self.current]
+        self.top = 0
+        self.row = 0
+        self.first = 1
+        self.flushed = 1
+        self.dirty = {0}
+        self.truncated = None
+
+    def resize(self, rows: int, cols: int) -> None:
+        self.rows = max(rows, 1)
+        self.cols = max(cols, 1)
+        self.top = max(self.top, len(self.lines) - self.rows)
+
+    # --- styles ---
+
+    def reset_style(self) -> None:
+        self.foreground = None
+        self.background = None
+        self.bold = self.italic = self.underline = self.inverse = False
+        self.tag = None
+
+    @property
+    def style(self) -> tuple:
+        return (
+            self.foreground,
+            self.background,
+            self.bold,
+            self.italic,
+            self.underline,
+            self.inverse,
+        )
+
+    @style.setter
+    def style(self, style: tuple) -> None:
+        (
+            self.foreground,
+            self.background,
+            self.bold,
+            self.italic,
+            self.underline,
+            self.inverse,
+        ) = style
+
+    def select_graphic_rendition(self, params: str) -> None:
+        """Apply an SGR sequence, the few distinct ones programs use are cached"""
+
+        key = (params, self.style)
+        if (cached := self.sgr_cache.get(key)) is None:
+            self.apply_sgr([int(p) if p.isdigit() else 0 for p in params.split(";")])
+            if len(self.sgr_cache) >= 1024:
+                self.sgr_cache.clear()
+            cached = self.sgr_cache[key] = (self.style, self.tag)
+
+        self.style, self.tag = cached
+
+    def apply_sgr(self, args: list[int]) -> None:
+        i = 0
+        while i < len(args):
+            code = args[i]
+            if code == 0:
+                self.reset_style()
+            elif code == 1:
+                self.bold = True
+            elif code == 3:
+                self.italic = True
+            elif code == 4:
+                self.underline = True
+            elif code == 7:
+                self.inverse = True
+            elif code == 22:
+                self.bold = False
+            elif code == 23:
+                self.italic = False
+            elif code == 24:
+                self.underline = False
+            elif code == 27:
+                self.inverse = False
+            elif 30 <= code <= 37:
+                self.foreground = code - 30
+            elif 90 <= code <= 97:
+                self.foreground = code - 90 + 8
+            elif code == 39:
+                self.foreground = None
+            elif 40 <= code <= 47:
+                self.background = code - 40
+            elif 100 <= code <= 107:
+                self.background = code - 100 + 8
+            elif code == 49:
+                self.background = None
+            elif code in (38, 48) and i + 1 < len(args):
+                value = None
+                if args[i + 1] == 5 and i + 2 < len(args):
+                    value = args[i + 2] % 256
+                    i += 2
+                elif args[i + 1] == 2 and i + 4 < len(args):
+                    value = nearest_color(*(min(c, 255) for c in args[i + 2 : i + 5]))
+                    i += 4
+                if code == 38:
+                    self.foreground = value
+                else:
+                    self.background = value
+            i += 1
+
+        self.tag = self.style_tag()
+
+    def style_tag(self) -> str | None:
+        """Name of the tag for the current style, None for the default style"""
+
+        foreground, background = self.foreground, self.background
+        if self.inverse:
+            foreground, background = (
+                DEFAULT_BACKGROUND if background is None else background,
+                DEFAULT_FOREGROUND if foreground is None else foreground,
+            )
+        if self.bold and foreground is not None and foreground < 8:
+            # bold text in one of the base colors is shown in its bright variant
+            foreground += 8
+
+        name = "ansi"
+        if foreground is not None:
+            name += f"-fg{foreground}"
+        if background is not None:
+            name += f"-bg{background}"
+        for flag, letter in ((self.bold, "b"), (self.italic, "i"), (self.underline, "u")):
+            if flag:
+                name += f"-{letter}"
+
+        if name == "ansi":
+            return None
+        if name not in self.styles:
+            style = {}
+            if foreground is not None:
+                style["foreground"] = color(foreground)
+            if background is not None:
+                style["background"] = color(background)
+            if self.underline:
+                style["underline"] = True
+            if self.bold or self.italic:
+                style["font"] = (self.bold, self.italic)
+            self.styles[name] = style
+        return name
+
+    def configure_tag(self, text: tk.Text, name: str) -> None:
+        style = dict(self.styles[name])
+        if "font" in style:
+            bold, italic = style["font"]
+            key = f"{bold}{italic}"
+            if key not in self.fonts:
+                font = tkfont.Font(root=text, font=text.cget("font"))
+                font.configure(
+                    weight="bold" if bold else "normal",
+                    slant="italic" if italic else "roman",
+                )
+                self.fonts[key] = font
+            style["font"] = self.fonts[key]
+
+        text.tag_configure(name, **style)
+        self.configured.add(name)
+
+    # --- widget ---
+
+    def flush(self, text: tk.Text) -> None:
+        """Bring the text widget up to date with the screen
+
+        Lines the user is typing after the `input` mark are kept at the end."""
+
+        typed = text.get("input", "end-1c")
+        if typed:
+            text.delete("input", "end-1c")
+
+        if self.truncated is not None:
+            text.delete(f"{self.first + self.truncated - 1}.end", "end-1c")
+            self.truncated = None
+
+        for row in sorted(self.dirty):
+            line = self.first + row
+            text.delete(f"{line}.0", f"{line}.end")
+            if runs := self.runs(text, self.lines[row]):
+                text.insert(f"{line}.0", *runs)
+        self.dirty.clear()
+
+        if len(self.lines) > self.flushed:
+            runs = []
+            for line in self.lines[self.flushed :]:
+                runs += ["\n", ""]
+                runs += self.runs(text, line)
+            text.insert("end-1c", *runs)
+            self.flushed = len(self.lines)
+
+        # lines above the screen can't change anymore
+        if top := self.top:
+            del self.lines[:top]
+            self.first += top
+            self.flushed -= top
+            self.row -= top
+            self.top = 0
+
+        text.mark_set("input", "end-1c")
+        if typed:
+            text.insert("end-1c", typed)
+
+    def runs(self, text: tk.Text, line: Line) -> list[str]:
+        runs = line.runs()
+        for tag in runs[1::2]:
+            if tag and tag not in self.configured:
+                self.configure_tag(text, tag)
+        return runs
+
+    def scrolled_off(self, lines: int) -> None:
+        """Lines were removed from the top of the widget"""
+
+        self.first -= lines
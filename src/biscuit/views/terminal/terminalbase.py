@@ -1,6 +1,6 @@
 import os
-import queue
 import tkinter as tk
+import tkinter.font as tkfont
 from threading import Thread
 
 if os.name == "nt":
@@ -12,7 +12,9 @@ from biscuit.common.ui import Scrollbar
 
 from ..panelview import PanelView
 from .ai import AI
-from .ansi import replace_newline, strip_ansi_escape_sequences
+from .ansi import strip_ansi_escape_sequences
+from .output import OutputBuffer
+from .screen import Screen
 from .text import TerminalText
 
 
@@ -31,8 +33,13 @@ class TerminalBase(PanelView):
         destroy: Destroys the terminal.
         run_command: Runs a command in the terminal.
         enter: Handles the enter key press.
-        write_loop: Writes the terminal output.
-        insert: Inserts text into the terminal.
+        write_loop: Reads the terminal output into the output buffer.
+        on_output: Applies the buffered output to the screen, woken by the dispatcher.
+        insert: Writes text to the terminal screen.
+        render: Brings the text widget up to date and scrolls to the end.
+        flush: Writes the screen changes to the text widget and trims the scrollback.
+        on_resize: Resizes the screen and the PTY to fit the text widget.
+        trim_scrollback: Drops the oldest lines beyond the scrollback limit.
         newline: Inserts a new line.
         clear: Clears the terminal.
         ctrl_key: Handles the ctrl key press.
@@ -44,6 +51,12 @@ class TerminalBase(PanelView):
     shell: str
     p: PTY
 
+    # characters read from the PTY at once, and inserted per dispatch at most
+    read_size = 1 << 16
+    frame_size = 1 << 20
+    # characters fed to the screen at once, the scrollback is trimmed in between
+    feed_size = 1 << 14
+
     def __init__(self, master, cwd=".", *args, **kwargs) -> None:
         """Initialize the terminal
 
@@ -63,7 +76,10 @@ class TerminalBase(PanelView):
         self.cwd = cwd
         self.last_command = ""
         self.last_command_index = ""
-        self.queue = queue.Queue()
+        self.output = OutputBuffer()
+        self.channel = self.base.dispatcher.channel("terminal", self.on_output)
+        self.screen = Screen()
+        self.scrollback = self.base.config.terminal_scrollback
         # self.prediction = ""
 
         self.text = TerminalText(
@@ -71,6 +87,8 @@ class TerminalBase(PanelView):
         )
         self.text.grid(row=0, column=0, sticky=tk.NSEW)
         self.text.bind("<Return>", self.enter)
+        self.text.bind("<Configure>", self.on_resize)
+        self.char_font = tkfont.Font(font=self.text.cget("font"))
 
         self.terminal_scrollbar = Scrollbar(self)
         self.terminal_scrollbar.grid(row=0, column=1, sticky="NSW")
@@ -92,25 +110,41 @@ class TerminalBase(PanelView):
         self.last_command = None
 
         try:
-            self.p = PTY.spawn([self.shell], cwd=self.cwd)
+            self.p = PTY.spawn(
+                [self.shell],
+                cwd=self.cwd,
+                dimensions=(self.screen.rows, self.screen.cols),
+            )
             self.base.logger.info(f"Terminal process spawned: {self.shell}")
         except Exception as e:
             self.base.logger.error(f"Terminal process spawn failed: {e}")
             return
 
         Thread(target=self.write_loop, daemon=True).start()
-        self.after(10, self.gui_refresh_loop)
 
-    def gui_refresh_loop(self) -> None:
-        if not self.queue.empty():
-            output = self.queue.get()
-            self.insert(output)
-        
-        if self.alive:
-            self.after(10, self.gui_refresh_loop)
+    def on_output(self, _) -> bool:
+        # everything that arrived since the last dispatch is applied to the widget at
+        # once, or every tenth of the scrollback so that it never grows much beyond it
+        budget = self.frame_size
+        fed = False
+        while budget > 0 and (output := self.output.drain(min(self.feed_size, budget))):
+            budget -= len(output)
+            self.screen.feed(output)
+            fed = True
+            if (
+                self.scrollback
+                and len(self.screen.lines) - self.screen.flushed > self.scrollback // 10
+            ):
+                self.flush()
+
+        if fed:
+            self.render()
+        return self.output.pending > 0
 
     def destroy(self, *_) -> None:
         self.alive = False
+        self.output.close()
+        self.channel.close()
 
     def run_command(self, command: str) -> None:
         self.text.insert("end", command, "command")
@@ -137,22 +171,22 @@ class TerminalBase(PanelView):
 
     def write_loop(self) -> None:
         while self.alive:
-            if buf := self.p.read():
-                p = buf.find("\x1b]0;")
-
-                if p != -1:
-                    buf = buf[:p]
-                buf = [
-                    strip_ansi_escape_sequences(i)
-                    for i in replace_newline(buf).splitlines()
-                ]
-                buf = "\n".join(buf)
-
-                self.queue.put(buf)
-                
+            try:
+                buf = self.p.read(self.read_size)
+            except EOFError:
+                break
+
+            if buf:
+                # blocks while the UI is behind, holding back the process
+                if not self.output.put(buf):
+                    break
+                self.channel.post()
+
                 # Context Engine Hook
                 if self.base.config.clippy_enabled and self.base.context_engine:
-                    self.base.context_engine.report_terminal_output(buf, command=self.last_command)
+                    self.base.context_engine.report_terminal_output(
+                        strip_ansi_escape_sequences(buf), command=self.last_command
+                    )
 
                 # TODO: BISCUIT AI (Need a stronger implementation - do it later)
                 # (Not to be confused with the context engine / clippy / terminal watcher - unrelated to em)
@@ -162,17 +196,78 @@ class TerminalBase(PanelView):
     def error(self):
         self.ai.get_response(self.last_command)
 
-    def insert(self, output: str, tag="") -> None:
-        self.text.insert(tk.END, output, tag)
+    def insert(self, output: str) -> None:
+        self.screen.feed(output)
+        self.render()
+
+    def render(self) -> None:
+        self.flush()
         # self.terminal.tag_add("prompt", "insert linestart", "insert")
         self.text.see(tk.END)
-        self.text.mark_set("input", "insert")
+        self.text.mark_set("insert", tk.END)
+
+    def flush(self) -> None:
+        """Write the screen changes to the widget and trim the scrollback"""
+
+        self.text.proxy_enabled = False
+        try:
+            self.screen.flush(self.text)
+        finally:
+            self.text.proxy_enabled = True
+
+        self.trim_scrollback()
+
+    def on_resize(self, event: tk.Event) -> None:
+        padding = int(self.text.cget("padx")) * 2, int(self.text.cget("pady")) * 2
+        cols = max((event.width - padding[0]) // self.char_font.measure("0"), 20)
+        rows = max((event.height - padding[1]) // self.char_font.metrics("linespace"), 5)
+        if (rows, cols) == (self.screen.rows, self.screen.cols):
+            return
+
+        self.screen.resize(rows, cols)
+        if self.alive and getattr(self, "p", None):
+            try:
+                self.p.setwinsize(rows, cols)
+            except Exception:
+                pass
+
+    def trim_scrollback(self) -> None:
+        """Drop the oldest lines when there are more than `scrollback` lines.
+
+        Lines are dropped in bulk, a tenth of the limit more than needed, so that
+        trimming doesn't happen on every insert once the limit is reached."""
+
+        if not self.scrollback:
+            return
+
+        lines = int(self.text.index("end-1c").split(".")[0])
+        if lines <= self.scrollback:
+            return
+
+        # lines still on the screen can change, they stay
+        excess = lines - self.scrollback + self.scrollback // 10
+        excess = min(excess, self.screen.first - 1)
+        if excess <= 0:
+            return
+
+        self.screen.scrolled_off(excess)
+        self.text.proxy_enabled = False
+        try:
+            self.text.delete("1.0", f"{excess + 1}.0")
+        finally:
+            self.text.proxy_enabled = True
 
     def newline(self):
-        self.insert("\n")
+        self.insert("\r\n")
 
     def clear(self) -> None:
-        self.text.clear()
+        self.screen.clear()
+        self.text.proxy_enabled = False
+        try:
+            self.text.delete("1.0", tk.END)
+        finally:
+            self.text.proxy_enabled = True
+        self.render()
 
     # def ghost_insert(self, output: str) -> None:
     #     self.text.insert(tk.END, output, "ghost")
@@ -0,0 +1,203 @@
+import random
+from types import SimpleNamespace
+
+import pytest
+
+from biscuit.editor.text.highlighter import Highlighter
+
+SNIPPETS = [
+    "def f(x):",
+    '    """Docstring',
+    '    over lines"""',
+    "    return x + 1",
+    's = "a # b"',
+    "t = '''",
+    "still a string '''",
+    '# comment "',
+    "x = [1, 2,",
+    "     3]",
+    "",
+    "class A:",
+    "    pass",
+    "r = r'\\d+'",
+    '{"key": [1, 2.5, true, null], "other": "v"}',
+]
+
+EDITS = ['"""', "'''", '"', "'", "#", "\n", "x", "(", ")", "\n    ", "\\", "[", "]", ":"]
+
+
+class FakeText:
+    """Text widget stand-in: lines of text and the characters of each tag"""
+
+    def __init__(self, content: str, height: int = 20) -> None:
+        self.lines = content.split("\n")
+        self.height = height
+        self.tags: dict[str, set[tuple[int, int]]] = {}
+        self.idle = []
+        self.base = SimpleNamespace(notifications=None)
+        self.path = "test.py"
+        self.encoding = "utf-8"
+
+    def _pos(self, index: str) -> tuple[int, int]:
+        if index == "end":
+            return len(self.lines) + 1, 0
+        line, column = map(int, index.split("."))
+        return line, column
+
+    def _offset(self, index: str) -> int:
+        line, column = self._pos(index)
+        if line > len(self.lines):
+            return len("\n".join(self.lines)) + 1
+        return sum(len(l) + 1 for l in self.lines[: line - 1]) + min(
+            column, len(self.lines[line - 1])
+        )
+
+    def get(self, start: str, end: str) -> str:
+        return ("\n".join(self.lines) + "\n")[self._offset(start) : self._offset(end)]
+
+    def index(self, index: str) -> str:
+        if index == "end-1c":
+            return f"{len(self.lines)}.{len(self.lines[-1])}"
+        if index == "@0,0":
+            return "1.0"
+        return f"{min(self.height, len(self.lines))}.0"
+
+    def winfo_height(self) -> int:
+        return self.height
+
+    def tag_configure(self, *_, **__) -> None: ...
+
+    def tag_add(self, tag: str, *indices: str) -> None:
+        chars = self.tags.setdefault(tag, set())
+        for start, end in zip(indices[::2], indices[1::2]):
+            line, s = self._pos(start)
+            _, e = self._pos(end)
+            chars.update((line, c) for c in range(s, e))
+
+    def tag_remove(self, tag: str, start: str, end: str) -> None:
+        first, _ = self._pos(start)
+        last, _ = self._pos(end)
+        chars = self.tags.get(tag, set())
+        chars.difference_update([char for char in chars if first <= char[0] < last])
+
+    def after_idle(self, callback) -> str:
+        self.idle.append(callback)
+        return "idle"
+
+    def run_idle(self, slices: int = None) -> None:
+        while self.idle and slices != 0:
+            self.idle.pop(0)()
+            if slices:
+                slices -= 1
+
+    def _move_tags(self, move) -> None:
+        """Move the tagged characters like the widget does when text is edited,
+        `move` gives the new position of a character, None if it was deleted"""
+
+        for tag, chars in self.tags.items():
+            self.tags[tag] = {new for char in chars if (new := move(*char))}
+
+    def insert(self, line: int, column: int, text: str) -> tuple:
+        current = self.lines[line - 1]
+        new = (current[:column] + text + current[column:]).split("\n")
+        self.lines[line - 1 : line] = new
+
+        added = text.count("\n")
+        tail = len(text.rpartition("\n")[2])
+
+        def move(l, c):
+            if l == line and c >= column:
+                return l + added, (c - column if added else c) + tail
+            return (l + added, c) if l > line else (l, c)
+
+        self._move_tags(move)
+        return line, 0, added
+
+    def delete(self, line: int, column: int, count: int) -> tuple:
+        content = "\n".join(self.lines)
+        start = self._offset(f"{line}.{column}")
+        removed = content[start : start + count]
+        content = content[:start] + content[start + count :]
+        self.lines = content.split("\n")
+
+        last = line + removed.count("\n")
+        end = len(removed.rpartition("\n")[2]) + (column if last == line else 0)
+
+        def move(l, c):
+            if (l, c) < (line, column):
+                return l, c
+            if (l, c) < (last, end):
+                return None
+            if l == last:
+                return line, column + c - end
+            return l - (last - line), c
+
+        self._move_tags(move)
+        return line, last - line, 0
+
+    def char_tags(self) -> dict:
+        return {tag: chars for tag, chars in self.tags.items() if chars}
+
+
+def full_tags(highlighter: Highlighter, text: FakeText) -> dict:
+    """Tags of every character when lexing the whole document at once"""
+
+    content = "\n".join(text.lines) + "\n"
+    tokens = highlighter.lexer.get_tokens_unprocessed(content)
+    tags = {}
+    for line, (spans, _) in enumerate(highlighter._split_lines(content, tokens), 1):
+        for s, e, tag in spans:
+            tags.setdefault(tag, set()).update((line, c) for c in range(s, e))
+    return tags
+
+
+def make(language: str, seed: int) -> tuple[Highlighter, FakeText, random.Random]:
+    rng = random.Random(seed)
+    text = FakeText("\n".join(rng.choice(SNIPPETS) for _ in range(150)))
+    highlighter = Highlighter(text, language)
+    highlighter.slice_budget = 0.0005
+    text.highlighter = highlighter
+    return highlighter, text, rng
+
+
+def edit(text: FakeText, rng: random.Random) -> tuple:
+    line = rng.randint(1, len(text.lines))
+    column = rng.randint(0, len(text.lines[line - 1]))
+    if rng.random() < 0.6:
+        return text.insert(line, column, rng.choice(EDITS))
+    return text.delete(line, column, rng.randint(1, 12))
+
+
+@pytest.mark.parametrize("language", ["python", "json"])
+@pytest.mark.parametrize("seed", range(4))
+def test_incremental_matches_full_lexing(language, seed):
+    highlighter, text, rng = make(language, seed)
+    highlighter.highlight()
+    text.run_idle()
+    assert text.char_tags() == full_tags(highlighter, text)
+
+    for _ in range(60):
+        highlighter.invalidate(*edit(text, rng))
+        highlighter.highlight()
+        # sometimes edit again before the idle slices are done
+        text.run_idle(rng.choice([None, 0, 1, 5]))
+        if not text.idle:
+            assert text.char_tags() == full_tags(highlighter, text)
+
+    text.run_idle()
+    assert text.char_tags() == full_tags(highlighter, text)
+
+
+def test_docstring_longer_than_the_viewport():
+    highlighter, text, _ = make("python", 0)
+    text.lines = ['"""'] + [f"line {i}" for i in range(300)] + ['"""', "x = 1"]
+    highlighter.reset()
+    highlighter.highlight()
+    text.run_idle()
+    assert text.char_tags() == full_tags(highlighter, text)
+
+    # dropping the opening quotes retags everything below, lazily
+    highlighter.invalidate(*text.delete(1, 0, 3))
+    highlighter.highlight()
+    text.run_idle()
+    assert text.char_tags() == full_tags(highlighter, text)
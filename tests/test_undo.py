@@ -0,0 +1,124 @@
+import random
+
+from biscuit.editor.text.changes import Change
+from biscuit.editor.text.undo import UndoHistory
+
+
+class FakeText:
+    """Text widget stand-in recording its edits like `Text._proxy` does"""
+
+    def __init__(self, content: str = "") -> None:
+        self.content = content
+        self.cursor = "1.0"
+        self.idle = []
+        self.history = UndoHistory(self)
+
+    def _offset(self, index: str) -> int:
+        line, column = map(int, index.split("."))
+        lines = self.content.split("\n")
+        line = min(max(line, 1), len(lines))
+        return sum(len(l) + 1 for l in lines[: line - 1]) + min(
+            column, len(lines[line - 1])
+        )
+
+    def _index(self, offset: int) -> str:
+        before = self.content[:offset]
+        return f"{before.count(chr(10)) + 1}.{len(before.rpartition(chr(10))[2])}"
+
+    def get(self, start: str, end: str) -> str:
+        return self.content[self._offset(start) : self._offset(end)]
+
+    def replace(self, start: str, end: str, text: str) -> None:
+        s, e = self._offset(start), self._offset(end)
+        start, end = self._index(s), self._index(max(s, e))
+        change = Change.make(start, end, self.content[s:e], text)
+        cursor = self.cursor
+        self.content = self.content[:s] + text + self.content[max(s, e) :]
+        self.cursor = change.new_end_index
+        self.history.record(change, cursor)
+
+    def insert(self, index: str, text: str) -> None:
+        self.replace(index, index, text)
+
+    def delete(self, start: str, end: str) -> None:
+        self.replace(start, end, "")
+
+    def mark_set(self, mark: str, index: str) -> None:
+        self.cursor = index
+
+    def after_idle(self, callback) -> None:
+        self.idle.append(callback)
+
+    def run_idle(self) -> None:
+        while self.idle:
+            self.idle.pop(0)()
+
+
+def random_edit(text: FakeText, rng: random.Random) -> None:
+    offset = rng.randint(0, len(text.content))
+    start = text._index(offset)
+    kind = rng.random()
+    if kind < 0.4:
+        text.insert(start, rng.choice(["a", " ", "\n", "word", "two\nlines\n"]))
+    elif kind < 0.7:
+        end = text._index(min(offset + rng.randint(1, 15), len(text.content)))
+        text.delete(start, end)
+    else:
+        end = text._index(min(offset + rng.randint(1, 5), len(text.content)))
+        text.replace(start, end, rng.choice(["x", "\n"]))
+
+
+def test_undo_and_redo_round_trip():
+    rng = random.Random(3)
+    text = FakeText("def f(x):\n    return x\n\nprint(f(1))")
+    states = [text.content]
+    for _ in range(200):
+        random_edit(text, rng)
+        text.run_idle()
+        states.append(text.content)
+
+    final = text.content
+    while text.history.undo():
+        assert text.content in states
+    assert text.content == states[0]
+
+    while text.history.redo():
+        assert text.content in states
+    assert text.content == final
+
+
+def test_edits_of_the_same_event_are_undone_together():
+    text = FakeText("a")
+    text.insert("1.1", "\n")
+    text.insert("2.0", "    ")
+    text.run_idle()
+
+    text.history.undo()
+    assert text.content == "a"
+    text.history.redo()
+    assert text.content == "a\n    "
+
+
+def test_typing_is_merged_until_a_word_ends():
+    text = FakeText()
+    for i, char in enumerate("hello world"):
+        text.insert(f"1.{i}", char)
+        text.run_idle()
+
+    text.history.undo()
+    assert text.content == "hello"
+    text.history.undo()
+    assert text.content == ""
+    assert not text.history.undo()
+
+
+def test_a_new_edit_drops_the_redo_history():
+    text = FakeText("abc")
+    text.delete("1.0", "1.1")
+    text.run_idle()
+    text.history.undo()
+    text.insert("1.3", "d")
+    text.run_idle()
+
+    assert not text.history.redo()
+    assert text.content == "abcd"